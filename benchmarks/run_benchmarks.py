@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+MemInspector benchmark suite
+
+Runs the meminspector command line modes (list, ndjson, refresh and the
+--serve-stdio remote TUI server) and measures per-tick latency, CPU time
+(the inspector plus its collection workers) and peak inspector RSS in three
+kinds of scenarios:
+
+  fake-1k, fake-5k, fake-20k   Generated /proc trees (psutil.PROCFS_PATH)
+  docker                       Stub Docker API server with configurable latency
+  spawn                        N real processes spawned on this machine
+
+One-shot modes are timed per run, start-up included; refresh and
+--serve-stdio run with -i 0 and are timed between consecutive updates.
+Every scenario runs in its own child process so spawned processes and stub
+servers do not leak between scenarios.
+
+Results are compared against a stored baseline, scaled by a CPU-bound
+calibration loop timed alongside every mode (VM speed drifts by tens of
+percent from one minute to the next), and the script exits with status 1
+when a metric regresses beyond the tolerance, or 2 when there is no baseline,
+or only one recorded with other --workers, to compare against.
+
+Usage:
+  python3 benchmarks/run_benchmarks.py                      # Default scenarios
+  python3 benchmarks/run_benchmarks.py --save-baseline      # Record a baseline
+  python3 benchmarks/run_benchmarks.py -s fake-20k docker --docker-latency-ms 200
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+FAKE_SCENARIOS = {'fake-1k': 1000, 'fake-5k': 5000, 'fake-20k': 20000}
+SCENARIOS = tuple(FAKE_SCENARIOS) + ('docker', 'spawn')
+DEFAULT_SCENARIOS = ('fake-1k', 'fake-5k', 'docker', 'spawn')
+
+# Command line of each mode. One-shot modes are timed per run; the others
+# keep updating with -i 0 and are timed between consecutive updates
+MODES = {
+    'list': ['-l'],
+    'ndjson': ['--format', 'ndjson'],
+    'refresh': ['-r', '-i', '0'],
+    'serve-stdio': ['--serve-stdio', '-i', '0'],
+}
+ONE_SHOT_MODES = ('list', 'ndjson')
+REFRESH_MARKER = b'Continuous Refresh Mode (Update #'
+
+# Same as the console entry point (meminspector:main), with the /proc root
+# of fake scenarios swapped in first
+LAUNCHER = (
+    "import os, sys, psutil\n"
+    "psutil.PROCFS_PATH = os.environ.get('MEMINSPECTOR_BENCH_PROCFS', psutil.PROCFS_PATH)\n"
+    "sys.argv[0] = 'meminspector'\n"
+    "from meminspector import main\n"
+    "main()\n"
+)
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+UPDATE_TIMEOUT = 300  # Seconds for all updates of one mode
+
+# Metrics compared against the baseline, with the absolute slack below which
+# differences are treated as noise (/proc CPU times tick every 10 ms)
+COMPARED_METRICS = {'p50_ms': 5.0, 'cpu_ms': 10.0, 'peak_rss_mb': 2.0}
+
+
+def build_fake_procfs(root, count, seed=0):
+    """Generates a /proc tree with COUNT processes that psutil can read"""
+    rnd = random.Random(seed)
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total_kb = 64 * 1024 * 1024
+    boot_time = int(time.time()) - 86400
+
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write("cpu  100 0 100 1000 0 0 0 0 0 0\n"
+                "cpu0 100 0 100 1000 0 0 0 0 0 0\n"
+                f"btime {boot_time}\n")
+    with open(os.path.join(root, 'meminfo'), 'w') as f:
+        f.write(
+            f"MemTotal:       {total_kb} kB\n"
+            f"MemFree:        {total_kb // 4} kB\n"
+            f"MemAvailable:   {total_kb // 2} kB\n"
+            f"Buffers:        {total_kb // 64} kB\n"
+            f"Cached:         {total_kb // 8} kB\n"
+            "SwapCached:     0 kB\n"
+            f"Active:         {total_kb // 4} kB\n"
+            f"Inactive:       {total_kb // 8} kB\n"
+            "Shmem:          65536 kB\n"
+            "SReclaimable:   131072 kB\n"
+            "SUnreclaim:     65536 kB\n"
+            "KernelStack:    16384 kB\n"
+            "PageTables:     32768 kB\n"
+            "SwapTotal:      0 kB\n"
+            "SwapFree:       0 kB\n"
+        )
+    with open(os.path.join(root, 'vmstat'), 'w') as f:
+        f.write("pswpin 0\npswpout 0\n")
+
+    for index in range(count):
+        pid = 1000 + index
+        rss_pages = rnd.randint(100, 200000)
+        name = f"svc{index % 97}"
+        threads = 1 + index % 8
+        path = os.path.join(root, str(pid))
+        os.mkdir(path)
+
+        stat = (
+            f"{pid} ({name}) S 1 {pid} {pid} 0 -1 4194560 {rnd.randint(0, 10**6)} 0 "
+            f"{rnd.randint(0, 100)} 0 10 5 0 0 20 0 {threads} 0 {1000 + index} "
+            f"{rss_pages * page_size * 2} {rss_pages} 18446744073709551615"
+            + " 0" * 26 + "\n"
+        )
+        with open(os.path.join(path, 'stat'), 'w') as f:
+            f.write(stat)
+        # Main thread only; list mode reads the threads of the largest processes
+        os.makedirs(os.path.join(path, 'task', str(pid)))
+        with open(os.path.join(path, 'task', str(pid), 'stat'), 'w') as f:
+            f.write(stat)
+        with open(os.path.join(path, 'statm'), 'w') as f:
+            f.write(f"{rss_pages * 2} {rss_pages} {rss_pages // 4} 10 0 {rss_pages} 0\n")
+        with open(os.path.join(path, 'status'), 'w') as f:
+            f.write(
+                f"Name:\t{name}\nState:\tS (sleeping)\nPid:\t{pid}\nPPid:\t1\n"
+                "Uid:\t0\t0\t0\t0\nGid:\t0\t0\t0\t0\n"
+                f"VmSize:\t{rss_pages * 8} kB\nVmHWM:\t{rss_pages * 4} kB\nVmRSS:\t{rss_pages * 4} kB\n"
+                f"VmSwap:\t0 kB\nThreads:\t{threads}\n"
+            )
+        with open(os.path.join(path, 'cgroup'), 'w') as f:
+            f.write(f"0::/system.slice/svc{index % 40}.service\n")
+        with open(os.path.join(path, 'cmdline'), 'w') as f:
+            f.write(f"/usr/bin/{name}\0--serve\0")
+
+
+class DockerStubHandler(BaseHTTPRequestHandler):
+    """Answers the Docker Engine API calls made by get_docker_containers"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split('?', 1)[0]
+        # Strip the /v1.xx API version prefix
+        parts = [p for p in path.split('/') if p]
+        if parts and parts[0].startswith('v1.'):
+            parts = parts[1:]
+
+        if parts == ['_ping']:
+            body = b'OK'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif parts == ['version']:
+            self.send_json({'ApiVersion': '1.41', 'Version': '20.10.0', 'MinAPIVersion': '1.12'})
+        elif parts == ['containers', 'json']:
+            self.send_json([{'Id': cid} for cid in server.containers])
+        elif len(parts) == 3 and parts[0] == 'containers' and parts[2] == 'json':
+            cid = parts[1]
+            self.send_json({
+                'Id': cid,
+                'Name': '/' + server.containers[cid],
+                'Image': 'sha256:' + cid,
+                'Config': {'Image': f"bench/{server.containers[cid]}:latest"},
+                'State': {'Status': 'running'},
+            })
+        elif len(parts) == 3 and parts[0] == 'containers' and parts[2] == 'stats':
+            # Real daemons take a while to sample stats; this is what latency models
+            time.sleep(server.latency)
+            self.send_json({'memory_stats': {
+                'usage': 512 * 1024 * 1024, 'limit': 4 * 1024 ** 3, 'stats': {'cache': 0}
+            }})
+        elif len(parts) == 3 and parts[0] == 'images' and parts[2] == 'json':
+            self.send_json({'Id': parts[1], 'RepoTags': [f"bench/{parts[1][7:19]}:latest"]})
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+
+def start_docker_stub(containers=10, latency=0.05):
+    """Starts the stub Docker API on a free port; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DockerStubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.containers = {f"{index:064x}": f"bench-{index}" for index in range(1, containers + 1)}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def spawn_processes(count):
+    """Spawns COUNT idle processes"""
+    return [subprocess.Popen(['sleep', '3600'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for _ in range(count)]
+
+
+def calibrate():
+    """Time in ms of a fixed CPU-bound loop, the current speed of this machine"""
+    started = time.perf_counter()
+    rows = {}
+    for index in range(50000):
+        rows[index % 5000] = f"{index}:{index * 4096}".split(':')
+    return (time.perf_counter() - started) * 1000
+
+
+def cli_command(mode, workers):
+    """Command line that runs MODE through the meminspector entry point"""
+    return [sys.executable, '-c', LAUNCHER] + MODES[mode] + ['-w', str(workers)]
+
+
+def process_tree(pid):
+    """PID and its live descendants, read from the real /proc"""
+    pids = [pid]
+    for parent in pids:
+        try:
+            for tid in os.listdir(f"/proc/{parent}/task"):
+                with open(f"/proc/{parent}/task/{tid}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def tree_usage(pid):
+    """Returns (CPU seconds, peak RSS in MB) of PID's process tree.
+
+    CPU includes children already reaped; the peak is the largest process.
+    """
+    cpu, peak = 0, 0
+    for proc in process_tree(pid):
+        try:
+            with open(f"/proc/{proc}/stat", 'rb') as f:
+                fields = f.read().rsplit(b')', 1)[1].split()
+            with open(f"/proc/{proc}/status", 'rb') as f:
+                for line in f:
+                    if line.startswith(b'VmHWM:'):
+                        peak = max(peak, int(line.split()[1]) / 1024)
+        except OSError:
+            continue
+        cpu += sum(int(value) for value in fields[11:15]) / CLOCK_TICKS  # utime stime cutime cstime
+    return cpu, peak
+
+
+def run_once(command, env):
+    """Runs a one-shot mode to completion; returns (wall s, CPU s, peak RSS MB)"""
+    with tempfile.TemporaryFile() as errors:
+        started = time.perf_counter()
+        child = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                 stderr=errors, cwd=REPO_DIR, env=env)
+        child.stdin.write(b'y\n')  # Answer the not-macOS prompt
+        child.stdin.close()
+        # wait4 reports the CPU of the reaped collection workers too
+        _, status, usage = os.wait4(child.pid, 0)
+        wall = time.perf_counter() - started
+        child.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if child.returncode != 0:
+            errors.seek(0)
+            lines = errors.read().decode(errors='replace').strip().splitlines()
+            raise RuntimeError(f"{' '.join(command[3:])} exited with {child.returncode}: "
+                               f"{lines[-1] if lines else ''}")
+    return wall, usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024
+
+
+def iter_updates(mode, stream):
+    """Yields once per update MODE writes to STREAM"""
+    if mode == 'refresh':
+        for line in stream:
+            if REFRESH_MARKER in line:
+                yield
+    else:
+        from meminspector import read_frame
+        decompressor = zlib.decompressobj()
+        while read_frame(stream, decompressor) is not None:
+            yield
+
+
+def time_updating_mode(mode, command, env, ticks):
+    """Times TICKS updates of a mode running with -i 0, after one warm-up update"""
+    calibrations = [calibrate() for _ in range(3)]
+    child = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, cwd=REPO_DIR, env=env)
+    child.stdin.write(b'y\n')  # Answer the not-macOS prompt; --serve-stdio stops at end of stdin
+    child.stdin.flush()
+    # A mode that stops updating fails the scenario instead of hanging it
+    watchdog = threading.Timer(UPDATE_TIMEOUT, child.kill)
+    watchdog.start()
+    marks = []
+    try:
+        for _ in iter_updates(mode, child.stdout):
+            marks.append((time.perf_counter(), tree_usage(child.pid)))
+            if len(marks) == ticks + 2:
+                break
+        if len(marks) < ticks + 2:
+            raise RuntimeError(f"{' '.join(command[3:])} exited after {len(marks)} updates")
+    finally:
+        watchdog.cancel()
+        child.send_signal(signal.SIGINT)
+        try:
+            child.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            child.kill()
+            child.communicate()
+
+    calibrations += [calibrate() for _ in range(3)]
+    marks = marks[1:]  # The first update includes start-up
+    walls = [marks[i + 1][0] - marks[i][0] for i in range(ticks)]
+    cpu = (marks[-1][1][0] - marks[0][1][0]) / ticks
+    return summarize(walls, [cpu], max(usage[1] for _, usage in marks), calibrations)
+
+
+def time_one_shot_mode(command, env, ticks):
+    """Times TICKS runs of a one-shot mode, after one warm-up run"""
+    run_once(command, env)
+    walls, cpus, calibrations, peak = [], [], [], 0
+    for _ in range(ticks):
+        calibrations.append(calibrate())
+        wall, cpu, rss = run_once(command, env)
+        walls.append(wall)
+        cpus.append(cpu)
+        peak = max(peak, rss)
+    return summarize(walls, cpus, peak, calibrations)
+
+
+def summarize(walls, cpus, peak_rss_mb, calibrations):
+    """Latency/CPU stats of one mode, with the calibration loop timed alongside"""
+    walls = sorted(walls)
+    return {
+        'p50_ms': walls[len(walls) // 2] * 1000,
+        'p95_ms': walls[min(len(walls) - 1, int(len(walls) * 0.95))] * 1000,
+        'mean_ms': sum(walls) / len(walls) * 1000,
+        'cpu_ms': sorted(cpus)[len(cpus) // 2] * 1000,
+        'peak_rss_mb': peak_rss_mb,
+        'calibration_ms': sorted(calibrations)[len(calibrations) // 2],
+    }
+
+
+def run_scenario(name, args):
+    """Runs one scenario in this process and returns its results"""
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    env.pop('DOCKER_HOST', None)
+    proc_root = '/proc'
+    cleanup = []
+    try:
+        if name in FAKE_SCENARIOS:
+            proc_root = tempfile.mkdtemp(prefix='meminspector-proc-')
+            cleanup.append(lambda: shutil.rmtree(proc_root, ignore_errors=True))
+            build_fake_procfs(proc_root, FAKE_SCENARIOS[name])
+            os.sync()  # Background writeback of the tree would steal CPU from the timed modes
+            env['MEMINSPECTOR_BENCH_PROCFS'] = proc_root
+        elif name == 'docker':
+            if importlib.util.find_spec('docker') is None:
+                return {'skipped': 'docker SDK unavailable'}
+            server = start_docker_stub(args.docker_containers, args.docker_latency_ms / 1000)
+            cleanup.append(server.shutdown)
+            env['DOCKER_HOST'] = f"tcp://127.0.0.1:{server.server_address[1]}"
+        elif name == 'spawn':
+            children = spawn_processes(args.spawn_count)
+
+            def reap():
+                for child in children:
+                    child.kill()
+                for child in children:
+                    child.wait()
+            cleanup.append(reap)
+
+        results = {'processes': sum(entry.isdigit() for entry in os.listdir(proc_root))}
+        for mode in args.modes:
+            command = cli_command(mode, args.workers)
+            if mode in ONE_SHOT_MODES:
+                results[mode] = time_one_shot_mode(command, env, args.ticks)
+            else:
+                results[mode] = time_updating_mode(mode, command, env, args.ticks)
+        return results
+    finally:
+        for action in reversed(cleanup):
+            action()
+
+
+def run_isolated(name, args):
+    """Runs a scenario in a child process and returns its results"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_file = f.name
+    command = [
+        sys.executable, os.path.abspath(__file__), '--run-scenario', name,
+        '--result-file', result_file, '--ticks', str(args.ticks),
+        '--workers', str(args.workers), '--modes', *args.modes,
+        '--docker-latency-ms', str(args.docker_latency_ms),
+        '--docker-containers', str(args.docker_containers),
+        '--spawn-count', str(args.spawn_count),
+    ]
+    try:
+        completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if completed.returncode != 0:
+            return {'error': completed.stderr.decode(errors='replace').strip().splitlines()[-1:]}
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_file)
+
+
+def display_results(results, workers):
+    """Prints a table per scenario"""
+    print(f"\nWorkers: {workers}")
+    for name, result in results.items():
+        print(f"\n{'='*100}")
+        if 'skipped' in result or 'error' in result:
+            print(f"{name}: {'skipped' if 'skipped' in result else 'FAILED'} - "
+                  f"{result.get('skipped') or result.get('error')}")
+            continue
+        print(f"{name} ({result['processes']} processes)")
+        print(f"{'='*100}")
+        print(f"{'Mode':<20} {'p50 ms':<12} {'p95 ms':<12} {'mean ms':<12} {'CPU ms/tick':<12} "
+              f"{'peak RSS MB':<12} {'calib. ms':<12}")
+        print(f"{'-'*100}")
+        for mode, stats in result.items():
+            if isinstance(stats, dict):
+                print(f"{mode:<20} {stats['p50_ms']:<12.2f} {stats['p95_ms']:<12.2f} "
+                      f"{stats['mean_ms']:<12.2f} {stats['cpu_ms']:<12.2f} {stats['peak_rss_mb']:<12.1f} "
+                      f"{stats['calibration_ms']:<12.2f}")
+
+
+def scaled_reference(base, stats):
+    """Baseline metrics of a mode at the machine speed STATS were measured at.
+
+    The calibration loop timed alongside each mode scales CPU time, and the
+    CPU share of latency; time spent waiting (e.g. on Docker) is unscaled.
+    """
+    scale = stats['calibration_ms'] / base['calibration_ms']
+    return {
+        'p50_ms': base['p50_ms'] + base['cpu_ms'] * (scale - 1),
+        'cpu_ms': base['cpu_ms'] * scale,
+        'peak_rss_mb': base['peak_rss_mb'],
+    }
+
+
+def compare_baseline(results, baseline, tolerance):
+    """Returns a list of regression messages against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline['scenarios'].get(name)
+        if not base or 'skipped' in result or 'error' in result or 'skipped' in base:
+            continue
+        for mode, stats in result.items():
+            if not (isinstance(stats, dict) and isinstance(base.get(mode), dict)):
+                continue
+            references = scaled_reference(base[mode], stats)
+            for metric, slack in COMPARED_METRICS.items():
+                value, reference = stats[metric], references[metric]
+                if value > reference * (1 + tolerance) + slack:
+                    regressions.append(f"{name} {mode}.{metric}: {value:.2f} vs baseline {reference:.2f} "
+                                       f"(+{(value / reference - 1) * 100 if reference else 0:.0f}%)")
+    return regressions
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='MemInspector benchmark suite')
+    parser.add_argument('-s', '--scenarios', nargs='+', choices=SCENARIOS, default=list(DEFAULT_SCENARIOS),
+                        help=f"Scenarios to run (default: {' '.join(DEFAULT_SCENARIOS)})")
+    parser.add_argument('-m', '--modes', nargs='+', choices=list(MODES), default=list(MODES),
+                        help=f"Command line modes to run (default: {' '.join(MODES)})")
+    parser.add_argument('-n', '--ticks', type=int, default=10,
+                        help='Measured runs or updates per mode (default: 10)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Collection workers (meminspector -w); must match the baseline (default: 1)')
+    parser.add_argument('--docker-latency-ms', type=float, default=50,
+                        help='Latency of the stub Docker stats endpoint (default: 50)')
+    parser.add_argument('--docker-containers', type=int, default=10,
+                        help='Containers served by the Docker stub (default: 10)')
+    parser.add_argument('--spawn-count', type=int, default=500,
+                        help='Processes spawned by the spawn scenario (default: 500)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Baseline JSON to compare against (default: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Write the results as the new baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown/growth over the scaled baseline (default: 0.25 = 25%%)')
+    parser.add_argument('-o', '--output', help='Also write the results to this JSON file')
+    parser.add_argument('--run-scenario', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if sys.platform != 'linux':
+        parser.error('the benchmark suite needs Linux (/proc)')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+
+    # Child mode: one scenario, results to a file
+    if args.run_scenario:
+        result = run_scenario(args.run_scenario, args)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+
+    results = {}
+    for name in args.scenarios:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = run_isolated(name, args)
+    display_results(results, args.workers)
+
+    recorded = {'workers': args.workers, 'scenarios': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(recorded, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(recorded, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.",
+              file=sys.stderr)
+        sys.exit(2)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('workers') != args.workers:
+        print(f"\nThe baseline at {args.baseline} was recorded with --workers {baseline.get('workers')}; "
+              f"rerun with -w {baseline.get('workers')} or record a new one with --save-baseline.",
+              file=sys.stderr)
+        sys.exit(2)
+    regressions = compare_baseline(results, baseline, args.tolerance)
+    failed = [name for name, result in results.items() if 'error' in result]
+
+    print(f"\n{'='*100}")
+    if regressions or failed:
+        print(f"REGRESSIONS AGAINST {args.baseline} (tolerance {args.tolerance * 100:.0f}%)")
+        print(f"{'='*100}")
+        for message in regressions:
+            print(f"  REGRESSION {message}")
+        for name in failed:
+            print(f"  FAILED {name}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
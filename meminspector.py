@@ -5,429 +5,4684 @@ Tool to analyze memory consumption of applications and threads on macOS
 """
 
 import psutil
+import os
+import shutil
 import sys
-from tqdm import tqdm
-from collections import defaultdict
+from collections import defaultdict, deque, namedtuple
 import time
 import argparse
-from datetime import datetime
-from rich.console import Console
-from rich.table import Table
-from rich.live import Live
-from rich.panel import Panel
-from rich.layout import Layout
-from rich.progress import BarColumn, Progress, TextColumn
-from rich.text import Text
-from rich import box
+import bisect
+import concurrent.futures
+from contextlib import contextmanager, nullcontext
+import csv
+import errno
+import glob
+import heapq
+import importlib
+import importlib.util
+import itertools
+import json
+import math
+import multiprocessing
+import operator
+import pwd
+import re
+from datetime import datetime, timedelta
 import threading
 import queue
 import select
+import shlex
+import socket
+import subprocess
+import struct
 import tty
 import termios
+import zlib
 
-# Try to import docker
-try:
-    import docker
-    DOCKER_AVAILABLE = True
-except ImportError:
-    DOCKER_AVAILABLE = False
+# Slow imports that most runs do not need are deferred: the Docker SDK until a
+# daemon may be reachable, numpy until rates are computed, asyncio until an
+# agent or fleet aggregator starts, and rich until an interactive view renders
+DOCKER_AVAILABLE = importlib.util.find_spec('docker') is not None
+DOCKER_SOCKET = '/var/run/docker.sock'
 
 
-class MemInspector:
-    def __init__(self):
-        self.processes = []
-        self.history_timestamps = []
-        self.history_memory_used = []
-        self.history_memory_available = []
-        self.history_top_processes = defaultdict(list)
-        self.console = Console()
-        self.show_graph = False
-        self.stop_tui = False
-        self.docker_client = None
-        self.docker_error = None
+# Fields emitted per process by the ndjson/csv output formats
+SNAPSHOT_FIELDS = (
+    'ts', 'pid', 'name', 'username', 'rss', 'vms',
+    'memory_percent', 'num_threads', 'status'
+)
+
+
+class SnapshotWriter:
+    """Streams process snapshots as NDJSON or CSV records.
+    
+    Records are tuples ordered like SNAPSHOT_FIELDS. Serialization uses a
+    template built once per writer, and rows are joined into a single
+    write per batch instead of one write per row.
+    """
+    
+    FORMATS = ('ndjson', 'csv')
+    
+    def __init__(self, stream, output_format='ndjson', batch_size=1024):
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.stream = stream
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.header_written = False
+        self._escaped = {}
         
-        # Try to connect to Docker
-        if DOCKER_AVAILABLE:
+        if output_format == 'ndjson':
+            self.template = (
+                '{{"ts":{},"pid":{},"name":{},"username":{},"rss":{},"vms":{},'
+                '"memory_percent":{:.3f},"num_threads":{},"status":{}}}\n'
+            )
+        else:
+            self.template = '{},{},{},{},{},{},{:.3f},{},{}\n'
+    
+    def _quote(self, value):
+        """Escapes a string field, caching results since names repeat a lot"""
+        try:
+            return self._escaped[value]
+        except KeyError:
+            pass
+        if value is None:
+            escaped = 'null' if self.output_format == 'ndjson' else ''
+        elif self.output_format == 'ndjson':
+            escaped = json.dumps(value)
+        elif any(c in value for c in ',"\r\n'):
+            escaped = '"' + value.replace('"', '""') + '"'
+        else:
+            escaped = value
+        if len(self._escaped) > 65536:
+            self._escaped.clear()
+        self._escaped[value] = escaped
+        return escaped
+    
+    def write_records(self, records):
+        """Writes an iterable of records in batches and flushes the stream"""
+        quote = self._quote
+        fmt = self.template.format
+        chunk = []
+        
+        if self.output_format == 'csv' and not self.header_written:
+            chunk.append(','.join(SNAPSHOT_FIELDS) + '\n')
+            self.header_written = True
+        
+        for ts, pid, name, username, rss, vms, mem_pct, threads, status in records:
+            chunk.append(fmt(ts, pid, quote(name), quote(username), rss, vms,
+                             mem_pct, threads, quote(status)))
+            if len(chunk) >= self.batch_size:
+                self.stream.write(''.join(chunk))
+                chunk = []
+        
+        if chunk:
+            self.stream.write(''.join(chunk))
+        self.stream.flush()
+
+
+# Columns of the ndjson/csv snapshot diff output
+DIFF_FIELDS = (
+    'kind', 'pid', 'name', 'group', 'rss_before', 'rss_after', 'delta', 'change'
+)
+
+SNAPSHOT_SELECTOR_RE = re.compile(r'^(.*)@(\d{1,2}):(\d{2})$')
+
+
+def parse_snapshot_selector(spec):
+    """Splits 'FILE@HH:MM' into (path, (hour, minute)); the time is optional"""
+    match = SNAPSHOT_SELECTOR_RE.match(spec)
+    if not match:
+        return spec, None
+    hour, minute = int(match.group(2)), int(match.group(3))
+    if hour > 23 or minute > 59:
+        raise ValueError(f"invalid time in snapshot selector: {spec}")
+    return match.group(1), (hour, minute)
+
+
+def snapshot_line_ts(line):
+    """Timestamp of an NDJSON snapshot line without decoding the whole record"""
+    if line.startswith('{"ts":'):
+        end = line.find(',', 6)
+        if end > 0:
             try:
-                self.docker_client = docker.from_env()
-                # Test connection
-                self.docker_client.ping()
-            except docker.errors.DockerException as e:
-                self.docker_error = f"Docker connection error: {str(e)}"
-                self.docker_client = None
-            except Exception as e:
-                self.docker_error = f"Unexpected error: {str(e)}"
-                self.docker_client = None
+                return float(line[6:end])
+            except ValueError:
+                pass
+    return json.loads(line)['ts']
+
+
+def load_snapshot(path, at=None):
+    """Loads one snapshot (list of record dicts) from an NDJSON file.
+    
+    Files written by ``--save-snapshot`` or ``--format ndjson`` may hold many
+    snapshots, one per timestamp. The last one is used unless ``at`` gives
+    an (hour, minute), in which case the snapshot closest to the most recent
+    occurrence of that local time is picked. Only the lines of the chosen
+    snapshot are decoded.
+    """
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"{path}: no snapshot records")
+    try:
+        stamps = [snapshot_line_ts(line) for line in lines]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"{path}: not an NDJSON snapshot") from None
+    
+    if at is None:
+        chosen = stamps[-1]
+    else:
+        last = datetime.fromtimestamp(stamps[-1])
+        target = last.replace(hour=at[0], minute=at[1], second=0, microsecond=0)
+        if target > last:
+            target -= timedelta(days=1)
+        target = target.timestamp()
+        chosen = min(set(stamps), key=lambda ts: abs(ts - target))
+    
+    return [json.loads(line) for line, ts in zip(lines, stamps) if ts == chosen]
+
+
+def diff_snapshots(before, after):
+    """Compares two snapshots per process and per container/unit.
+    
+    Processes are hash-joined on (pid, create_time), or on (pid, name) when
+    either snapshot lacks create times. Leftovers are then paired by
+    (name, group), largest first, which catches restarted services; what is
+    still unmatched appeared or disappeared. Returns a dict with 'processes'
+    and 'groups' rows of (pid, name, group, rss_before, rss_after, change)
+    plus the totals of both snapshots.
+    """
+    use_create_time = all(r.get('create_time') is not None for r in before) and \
+        all(r.get('create_time') is not None for r in after)
+    
+    def join_key(record):
+        if use_create_time:
+            return record['pid'], round(record['create_time'], 2)
+        return record['pid'], record['name']
+    
+    unmatched_before = {join_key(r): r for r in before}
+    unmatched_after = []
+    processes = []
+    for record in after:
+        old = unmatched_before.pop(join_key(record), None)
+        if old is None:
+            unmatched_after.append(record)
+            continue
+        delta = record['rss'] - old['rss']
+        change = 'grew' if delta > 0 else 'shrank' if delta < 0 else 'same'
+        processes.append((record['pid'], record['name'], record.get('group'),
+                          old['rss'], record['rss'], change))
+    
+    # Name-based fallback: pair leftovers with the same name and group
+    by_name = defaultdict(list)
+    for record in unmatched_before.values():
+        by_name[(record['name'], record.get('group'))].append(record)
+    for candidates in by_name.values():
+        candidates.sort(key=operator.itemgetter('rss'))
+    unmatched_after.sort(key=operator.itemgetter('rss'), reverse=True)
+    
+    for record in unmatched_after:
+        candidates = by_name.get((record['name'], record.get('group')))
+        if candidates:
+            old = candidates.pop()
+            processes.append((record['pid'], record['name'], record.get('group'),
+                              old['rss'], record['rss'], 'restarted'))
         else:
-            self.docker_error = "Docker library not installed (pip install docker)"
+            processes.append((record['pid'], record['name'], record.get('group'),
+                              0, record['rss'], 'appeared'))
+    for candidates in by_name.values():
+        for old in candidates:
+            processes.append((old['pid'], old['name'], old.get('group'),
+                              old['rss'], 0, 'disappeared'))
+    
+    # Per container/unit totals over all processes of each snapshot
+    group_rss = defaultdict(lambda: [0, 0])
+    for index, snapshot in enumerate((before, after)):
+        for record in snapshot:
+            group = record.get('group')
+            if group:
+                group_rss[group][index] += record['rss']
+    groups = []
+    for group, (old_rss, new_rss) in group_rss.items():
+        change = 'appeared' if not old_rss else 'disappeared' if not new_rss else \
+            'grew' if new_rss > old_rss else 'shrank' if new_rss < old_rss else 'same'
+        kind, _, label = group.partition(':')
+        groups.append((None, label, kind, old_rss, new_rss, change))
+    
+    return {
+        'before_ts': before[0]['ts'] if before else None,
+        'after_ts': after[0]['ts'] if after else None,
+        'before_total': sum(r['rss'] for r in before),
+        'after_total': sum(r['rss'] for r in after),
+        'before_count': len(before),
+        'after_count': len(after),
+        'processes': processes,
+        'groups': groups,
+    }
+
+
+def largest_changes(rows, top_n=None, changes=None):
+    """Rows with the largest absolute RSS delta first, optionally limited"""
+    if changes is not None:
+        rows = [row for row in rows if row[5] in changes]
+    key = lambda row: abs(row[4] - row[3])
+    if top_n is None:
+        return sorted(rows, key=key, reverse=True)
+    return heapq.nlargest(top_n, rows, key=key)
+
+
+class ProcessFilter:
+    """Filter expression compiled once and evaluated inside the collector.
+    
+    Expressions are predicates joined by ``and``, e.g.
+    ``user=app and rss>100M and name~java|python``. Supported operators are
+    ``= != > >= < <=`` and ``~ !~`` (regular expression search). Predicates
+    are evaluated cheapest first, and a process attribute is only read from
+    psutil when a predicate actually needs it, so expensive fields like
+    ``username`` or ``cmdline`` are never fetched for processes rejected by
+    an earlier predicate.
+    """
+    
+    # field -> (cost, psutil attribute, snapshot record key)
+    FIELDS = {
+        'pid': (0, 'pid', 'pid'),
+        'name': (1, 'name', 'name'),
+        'status': (2, 'status', 'status'),
+        'rss': (2, 'memory_info', 'rss'),
+        'vms': (2, 'memory_info', 'vms'),
+        'mem': (2, 'memory_info', 'memory_percent'),
+        'threads': (2, 'num_threads', 'num_threads'),
+        'user': (3, 'username', 'username'),
+        'cmdline': (4, 'cmdline', 'cmdline'),
+    }
+    NUMERIC_FIELDS = ('pid', 'rss', 'vms', 'mem', 'threads')
+    SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+    OPERATORS = {
+        '=': operator.eq, '!=': operator.ne,
+        '>': operator.gt, '>=': operator.ge,
+        '<': operator.lt, '<=': operator.le,
+    }
+    TERM_RE = re.compile(r'^\s*([a-z_]+)\s*(!=|>=|<=|!~|=|>|<|~)\s*(.+?)\s*$')
+    
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        self.predicates = []
         
-    def format_bytes(self, bytes_value):
-        """Converts bytes to readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_value < 1024.0:
-                return f"{bytes_value:.2f} {unit}"
-            bytes_value /= 1024.0
-        return f"{bytes_value:.2f} PB"
+        for term in re.split(r'\s+and\s+', self.expression, flags=re.IGNORECASE):
+            match = self.TERM_RE.match(term)
+            if not match:
+                raise ValueError(f"Invalid filter term: '{term.strip()}'")
+            field, op, raw_value = match.groups()
+            if field not in self.FIELDS:
+                valid = ', '.join(sorted(self.FIELDS))
+                raise ValueError(f"Unknown filter field '{field}' (valid fields: {valid})")
+            self.predicates.append((self.FIELDS[field][0], field,
+                                    self._compile_test(field, op, raw_value)))
+        
+        # Cheap predicates first; sort is stable so ties keep the user's order
+        self.predicates.sort(key=lambda p: p[0])
+        self.attrs = sorted({self.FIELDS[field][1] for _, field, _ in self.predicates})
+        self._total_memory = None
+    
+    def __str__(self):
+        return self.expression
+    
+    def _parse_number(self, field, raw_value):
+        """Parses a numeric value, accepting size suffixes for rss/vms"""
+        raw_value = raw_value.strip().strip('"\'')
+        if field in ('rss', 'vms'):
+            match = re.match(r'^([\d.]+)\s*([KMGT]?)I?B?$', raw_value, re.IGNORECASE)
+            if not match:
+                raise ValueError(f"Invalid size for '{field}': '{raw_value}'")
+            return float(match.group(1)) * self.SIZE_UNITS[match.group(2).upper()]
+        try:
+            return float(raw_value.rstrip('%'))
+        except ValueError:
+            raise ValueError(f"Invalid number for '{field}': '{raw_value}'")
+    
+    def _compile_test(self, field, op, raw_value):
+        """Builds the value test for a single predicate"""
+        if op in ('~', '!~'):
+            try:
+                pattern = re.compile(raw_value.strip('"\''))
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression '{raw_value}': {e}")
+            if op == '~':
+                return lambda value: value is not None and pattern.search(str(value)) is not None
+            return lambda value: value is None or pattern.search(str(value)) is None
+        
+        compare = self.OPERATORS[op]
+        if field in self.NUMERIC_FIELDS:
+            expected = self._parse_number(field, raw_value)
+        elif op in ('=', '!='):
+            expected = raw_value.strip('"\'')
+        else:
+            raise ValueError(f"Operator '{op}' is not supported for field '{field}'")
+        
+        if op == '!=':
+            return lambda value: value is None or compare(value, expected)
+        return lambda value: value is not None and compare(value, expected)
+    
+    def _field_value(self, field, info):
+        """Extracts a field value from psutil attributes already read"""
+        if field in ('rss', 'vms', 'mem'):
+            mem_info = info.get('memory_info')
+            if mem_info is None:
+                return None
+            if field == 'mem':
+                if self._total_memory is None:
+                    self._total_memory = psutil.virtual_memory().total
+                return mem_info.rss * 100.0 / self._total_memory
+            return getattr(mem_info, field)
+        if field == 'cmdline':
+            cmdline = info.get('cmdline')
+            return ' '.join(cmdline) if cmdline else None
+        return info.get(self.FIELDS[field][1])
+    
+    def match(self, proc):
+        """Evaluates the filter against a psutil.Process.
+        
+        Returns the dict of attributes read while evaluating (so callers can
+        reuse them), or None when the process does not match.
+        """
+        info = {}
+        for _, field, test in self.predicates:
+            attr = self.FIELDS[field][1]
+            if attr not in info:
+                try:
+                    info[attr] = getattr(proc, attr)() if attr != 'pid' else proc.pid
+                except psutil.AccessDenied:
+                    info[attr] = None
+            if not test(self._field_value(field, info)):
+                return None
+        return info
+    
+    def uses(self, field):
+        """Whether a predicate of the filter tests the given field"""
+        return any(predicate_field == field for _, predicate_field, _ in self.predicates)
+    
+    def match_record(self, record):
+        """Evaluates the filter against a snapshot record dict"""
+        for _, field, test in self.predicates:
+            value = record.get(self.FIELDS[field][2])
+            if field == 'cmdline' and isinstance(value, (list, tuple)):
+                value = ' '.join(value)
+            if not test(value):
+                return False
+        return True
+
+
+class PressureMonitor:
+    """Waits on Linux PSI memory pressure triggers with poll().
+    
+    A trigger such as ``some 100000 1000000`` asks the kernel to wake us when
+    tasks stalled on memory for 100 ms within a 1 s window. The cgroup v2
+    ``memory.pressure`` file of the current cgroup is preferred (so containers
+    see their own pressure), falling back to the system-wide
+    ``/proc/pressure/memory``. When no trigger can be registered, ``wait``
+    degrades to a plain sleep and ``error`` explains why.
+    """
+    
+    def __init__(self, threshold_ms=100, window_ms=1000, kind='some', path=None):
+        self.threshold_ms = threshold_ms
+        self.window_ms = window_ms
+        self.kind = kind
+        self.path = None
+        self.fd = None
+        self.poller = None
+        self.error = None
+        self.events = 0
+        
+        if not hasattr(select, 'poll'):
+            self.error = "poll() is not available on this platform"
+            return
+        
+        candidates = [path] if path else self.find_pressure_files()
+        if not candidates:
+            self.error = "PSI not available (requires Linux 4.20+ with CONFIG_PSI)"
+            return
+        
+        for candidate in candidates:
+            if self._register(candidate):
+                return
+    
+    @staticmethod
+    def find_pressure_files():
+        """Returns candidate memory.pressure files, most specific first"""
+        candidates = []
+        try:
+            with open('/proc/self/cgroup') as f:
+                for line in f:
+                    # cgroup v2 entries look like "0::/system.slice/app.service"
+                    if line.startswith('0::'):
+                        cgroup = line[3:].strip()
+                        path = os.path.join('/sys/fs/cgroup', cgroup.lstrip('/'), 'memory.pressure')
+                        if cgroup != '/' and os.path.exists(path):
+                            candidates.append(path)
+        except OSError:
+            pass
+        if os.path.exists('/proc/pressure/memory'):
+            candidates.append('/proc/pressure/memory')
+        return candidates
+    
+    def _register(self, path):
+        """Opens a pressure file and registers the trigger on it"""
+        # Unprivileged triggers need a window that is a multiple of 2s,
+        # so retry with a scaled 2s window if the requested one is refused
+        attempts = [(self.threshold_ms, self.window_ms)]
+        if self.window_ms % 2000:
+            scale = 2000.0 / self.window_ms
+            attempts.append((int(self.threshold_ms * scale), 2000))
+        
+        for threshold_ms, window_ms in attempts:
+            fd = None
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+                trigger = f"{self.kind} {threshold_ms * 1000} {window_ms * 1000}"
+                os.write(fd, trigger.encode() + b'\0')
+            except OSError as e:
+                if fd is not None:
+                    os.close(fd)
+                self.error = f"Cannot register PSI trigger on {path}: {e.strerror}"
+                continue
+            
+            self.poller = select.poll()
+            self.poller.register(fd, select.POLLPRI)
+            self.fd = fd
+            self.path = path
+            self.threshold_ms = threshold_ms
+            self.window_ms = window_ms
+            self.error = None
+            return True
+        return False
+    
+    @property
+    def available(self):
+        return self.fd is not None
+    
+    def wait(self, timeout):
+        """Blocks up to timeout seconds; returns True if pressure was signalled"""
+        if not self.available:
+            time.sleep(timeout)
+            return False
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                events = self.poller.poll(remaining * 1000)
+            except InterruptedError:
+                continue
+            for _, mask in events:
+                if mask & select.POLLERR:
+                    # The cgroup went away; stop using the trigger
+                    self.close()
+                    self.error = f"PSI trigger on {self.path} was removed"
+                    time.sleep(max(deadline - time.monotonic(), 0))
+                    return False
+                if mask & select.POLLPRI:
+                    self.events += 1
+                    return True
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.poller = None
+
+
+# Largest single protocol line the fleet aggregator accepts (full snapshots)
+FLEET_LINE_LIMIT = 64 * 1024 * 1024
+# Agents drop clients whose unsent backlog grows beyond this many bytes
+FLEET_MAX_CLIENT_BACKLOG = 8 * 1024 * 1024
+
+
+def parse_address(address, default_host='127.0.0.1'):
+    """Parses 'unix:/path', 'host:port' or ':port' into (kind, target)"""
+    if address.startswith('unix:'):
+        return 'unix', address[5:]
+    host, sep, port = address.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}' (expected host:port or unix:/path)")
+    return 'tcp', (host.strip('[]') or default_host, int(port))
+
+
+def diff_rows(previous, current):
+    """Returns the changed/new rows and the removed keys between two row maps"""
+    upsert = {key: row for key, row in current.items() if previous.get(key) != row}
+    remove = [key for key in previous if key not in current]
+    return {'upsert': upsert, 'remove': remove}
+
+
+def apply_rows_delta(rows, delta):
+    """Applies a diff_rows() delta to a row map in place"""
+    for key in delta.get('remove', ()):
+        rows.pop(key, None)
+    rows.update(delta.get('upsert', {}))
+
+
+def encode_message(message):
+    """Encodes a protocol message as one compact JSON line"""
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+def encode_frame(compressor, message):
+    """Encodes a --serve-stdio frame: 4-byte length + zlib data flushed with Z_SYNC_FLUSH.
+    
+    One compressor spans the whole stream, so names and keys repeated in later
+    frames compress against earlier ones.
+    """
+    data = compressor.compress(json.dumps(message, separators=(',', ':')).encode())
+    data += compressor.flush(zlib.Z_SYNC_FLUSH)
+    return struct.pack('!I', len(data)) + data
+
+
+def read_frame(stream, decompressor):
+    """Reads one frame; returns (message, wire bytes, JSON bytes), or None at end of stream"""
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    length, = struct.unpack('!I', header)
+    if length > FLEET_LINE_LIMIT:
+        raise ValueError(f"Frame of {length} bytes exceeds the limit")
+    data = stream.read(length)
+    if len(data) < length:
+        return None
+    # Bounded like the wire size, so a small frame cannot inflate without limit
+    payload = decompressor.decompress(data, FLEET_LINE_LIMIT)
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"Frame decompresses beyond {FLEET_LINE_LIMIT} bytes")
+    return json.loads(payload), length + 4, len(payload)
+
+
+# Columns of --serve-stdio process rows (rates per second, None until known)
+REMOTE_PROCESS_FIELDS = (
+    'pid', 'name', 'username', 'rss', 'num_threads', 'status', 'group',
+    'rss_rate', 'minflt_rate', 'majflt_rate', 'swapin_rate'
+)
+
+# Navigation keys forwarded by name by the raw keyboard listener
+ESCAPE_KEYS = {'[A': 'up', '[B': 'down', '[5~': 'pgup', '[6~': 'pgdn', 'OA': 'up', 'OB': 'down'}
+
+
+def split_keys(data):
+    """Splits raw terminal input into keys, naming arrow and page escape sequences.
+    
+    A lone ESC is kept as '\\x1b'; other escape sequences are dropped.
+    """
+    keys = []
+    i = 0
+    while i < len(data):
+        if data[i] != '\x1b' or i + 1 == len(data):
+            keys.append(data[i])
+            i += 1
+            continue
+        end = i + 1
+        if data[end] in '[O':
+            end += 1
+            while end < len(data) and not (data[end].isalpha() or data[end] == '~'):
+                end += 1
+            end += 1
+            if data[i + 1:end] in ESCAPE_KEYS:
+                keys.append(ESCAPE_KEYS[data[i + 1:end]])
+        else:
+            keys.append('\x1b')  # ESC followed by a regular key
+        i = end
+    return keys
+
+
+def proc_path(*parts):
+    """Builds a path under the procfs root used by psutil (overridable for fixtures)"""
+    return os.path.join(getattr(psutil, 'PROCFS_PATH', '/proc'), *[str(part) for part in parts])
+
+
+def read_fault_counters(pid):
+    """Returns (minor_faults, major_faults) from /proc/<pid>/stat, or None"""
+    try:
+        with open(proc_path(pid, 'stat'), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces/parens; fields start after the last ')'
+    fields = data[data.rfind(b')') + 2:].split()
+    try:
+        return int(fields[7]), int(fields[9])
+    except (IndexError, ValueError):
+        return None
+
+
+def read_swap_usage(pid):
+    """Returns the swapped-out size of a process in bytes (VmSwap), or None"""
+    try:
+        with open(proc_path(pid, 'status'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'VmSwap:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class RateTracker:
+    """Per-process rates between consecutive samples.
+    
+    The previous sample is kept as one numpy array with a row per process and
+    a dict mapping (pid, create_time) to its row, so a PID reused by a new
+    process never inherits old counters. Deltas, rates and sort orders are
+    computed for all processes at once.
+    """
+    
+    # Columns of the sample and rate arrays
+    RSS, MINFLT, MAJFLT, SWAP = range(4)
+    SORT_KEYS = ('rss', 'rss_rate', 'faults', 'major_faults', 'swapin')
+    SORT_LABELS = {
+        'rss': 'Memory Usage',
+        'rss_rate': 'RSS Growth',
+        'faults': 'Page Faults',
+        'major_faults': 'Major Faults',
+        'swapin': 'Swap-in',
+    }
+    
+    def __init__(self):
+        self.index = {}
+        self.last_sample = None  # (n, 4) array once sampled
+        self.timestamp = None
+    
+    def read_sample(self, processes):
+        """Builds the (n, 4) sample array: rss, minor faults, major faults, swap"""
+        import numpy as np
+        sample = np.full((len(processes), 4), np.nan)
+        linux = sys.platform.startswith('linux')
+        # VmSwap only changes when swap is in use, so skip reading status otherwise
+        read_swap = linux and psutil.swap_memory().used > 0
+        
+        for row, pinfo in enumerate(processes):
+            mem_info = pinfo['memory_info']
+            if mem_info is None:
+                continue  # Access denied: the row stays NaN
+            sample[row, self.RSS] = mem_info.rss
+            if linux:
+                faults = read_fault_counters(pinfo['pid'])
+                if faults is not None:
+                    sample[row, self.MINFLT], sample[row, self.MAJFLT] = faults
+                swap = read_swap_usage(pinfo['pid']) if read_swap else 0
+                if swap is not None:
+                    sample[row, self.SWAP] = swap
+            else:
+                # macOS exposes fault and pagein counters through memory_info
+                sample[row, self.MINFLT] = getattr(mem_info, 'pfaults', np.nan)
+                sample[row, self.MAJFLT] = getattr(mem_info, 'pageins', np.nan)
+                sample[row, self.SWAP] = 0
+        return sample
+    
+    def update(self, keys, sample, timestamp=None):
+        """Stores a sample and returns per-second rates (NaN for new processes).
+        
+        Rate columns are RSS growth (bytes/s), minor and major faults (/s)
+        and swap-in (bytes/s, from decreases of the swapped-out size).
+        """
+        import numpy as np
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        rates = np.full(sample.shape, np.nan)
+        
+        if self.timestamp is not None and len(keys) and timestamp > self.timestamp:
+            rows = np.fromiter((self.index.get(key, -1) for key in keys),
+                               dtype=np.int64, count=len(keys))
+            known = rows >= 0
+            delta = sample[known] - self.last_sample[rows[known]]
+            delta[:, self.SWAP] = np.clip(-delta[:, self.SWAP], 0, None)
+            rates[known] = delta / (timestamp - self.timestamp)
+        
+        self.index = {key: row for row, key in enumerate(keys)}
+        self.last_sample = sample
+        self.timestamp = timestamp
+        return rates
+    
+    def sample(self, processes, timestamp=None):
+        """Reads counters for processes and returns their rate array"""
+        keys = [(pinfo['pid'], pinfo.get('create_time')) for pinfo in processes]
+        return self.update(keys, self.read_sample(processes), timestamp)
+    
+    def sort_order(self, rates, sort_key='rss'):
+        """Returns indices into the last sample ordered by sort_key, largest first"""
+        import numpy as np
+        if sort_key == 'rss':
+            column = self.last_sample[:, self.RSS]
+        elif sort_key == 'rss_rate':
+            column = rates[:, self.RSS]
+        elif sort_key == 'faults':
+            column = rates[:, self.MINFLT] + rates[:, self.MAJFLT]
+        elif sort_key == 'major_faults':
+            column = rates[:, self.MAJFLT]
+        elif sort_key == 'swapin':
+            column = rates[:, self.SWAP]
+        else:
+            raise ValueError(f"Unknown sort key: {sort_key}")
+        # New processes have no rate yet and sort last
+        return np.argsort(-np.nan_to_num(column, nan=-np.inf), kind='stable')
+
+
+class CgroupResolver:
+    """Tags processes with their container or systemd unit.
+    
+    /proc/<pid>/cgroup is parsed once per (pid, create_time) and cached, so
+    already-known processes cost one dict lookup per tick. Tags are
+    ('container', <64-hex id>) for Docker/containerd/CRI-O/Podman, or
+    ('unit', <name>) for systemd services and scopes, or None.
+    """
+    
+    CONTAINER_ID_RE = re.compile(r'([0-9a-f]{64})')
+    UNIT_RE = re.compile(r'([^/]+\.(?:service|scope))$')
+    
+    def __init__(self):
+        self.cache = {}
+    
+    def parse_cgroup(self, data):
+        """Extracts the tag from the contents of a /proc/<pid>/cgroup file"""
+        paths = {}
+        for line in data.splitlines():
+            hierarchy, _, rest = line.partition(':')
+            controllers, _, path = rest.partition(':')
+            if hierarchy == '0':
+                paths['unified'] = path
+            elif controllers == 'name=systemd':
+                paths['systemd'] = path
+            elif 'memory' in controllers.split(','):
+                paths['memory'] = path
+        
+        for source in ('unified', 'systemd', 'memory'):
+            path = paths.get(source)
+            if not path or path == '/':
+                continue
+            match = self.CONTAINER_ID_RE.search(path)
+            if match:
+                return ('container', match.group(1))
+            match = self.UNIT_RE.search(path)
+            if match:
+                return ('unit', match.group(1))
+        return None
+    
+    def resolve(self, pid, create_time):
+        """Returns the cached tag of a process, parsing its cgroup file if new"""
+        cached = self.cache.get(pid)
+        if cached is not None and cached[0] == create_time:
+            return cached[1]
+        
+        try:
+            with open(proc_path(pid, 'cgroup')) as f:
+                tag = self.parse_cgroup(f.read())
+        except OSError:
+            tag = None
+        self.cache[pid] = (create_time, tag)
+        return tag
+    
+    def prune(self, live_pids):
+        """Drops cache entries of exited processes once the cache has grown"""
+        if len(self.cache) > len(live_pids) * 3 // 2 + 64:
+            self.cache = {pid: entry for pid, entry in self.cache.items() if pid in live_pids}
+
+
+class MappingsAnalyzer:
+    """Aggregates resident memory by backing file across processes.
+    
+    Parses /proc/<pid>/smaps and sums Rss/Pss/Shared/Private/Swap per mapped
+    file (keyed by device and inode) and per anonymous region kind. A process
+    is only re-parsed when its /proc/<pid>/maps content changed since the
+    last analysis or its usage is older than ``max_age`` seconds (resident
+    pages change without any change to maps). File details are cached by the
+    (dev, inode) of the maps line plus the file's mtime, so a file rewritten
+    in place is described again. Files are stat'ed through /proc/<pid>/root,
+    so containerized processes resolve in their own mount namespace.
+    """
+    
+    RSS, PSS, SHARED, PRIVATE, SWAP = range(5)
+    FIELDS = {
+        b'Rss': RSS, b'Pss': PSS,
+        b'Shared_Clean': SHARED, b'Shared_Dirty': SHARED,
+        b'Private_Clean': PRIVATE, b'Private_Dirty': PRIVATE,
+        b'Swap': SWAP,
+    }
+    HEX_DIGITS = b'0123456789abcdef'
+    
+    def __init__(self, max_age=30.0):
+        self.max_age = max_age
+        self.processes = {}
+        self.files = {}
+        self.paths = {}
+        self.owners = {}
+        self.executable = set()
+        self.reparsed = 0
+        self.reused = 0
+        self.denied = 0
     
-    def get_process_info(self, proc):
-        """Gets information from a process"""
+    def parse_smaps(self, data, pid=None):
+        """Returns {mapping key: [rss, pss, shared, private, swap]} in bytes"""
+        usage = {}
+        current = None
+        fields = self.FIELDS
+        for line in data.split(b'\n'):
+            if not line:
+                continue
+            if line[0] in self.HEX_DIGITS:
+                # Mapping header: address perms offset dev inode [path]
+                parts = line.split(None, 5)
+                path = parts[5].strip().decode('utf-8', 'replace') if len(parts) > 5 else ''
+                inode = int(parts[4]) if len(parts) > 4 else 0
+                if inode:
+                    key = (parts[3].decode(), inode)
+                    self.owners[key] = pid
+                    if b'x' in parts[1]:
+                        self.executable.add(key)
+                else:
+                    key = ('anon', path if path.startswith('[') else '[anon]')
+                    path = key[1]
+                self.paths[key] = path
+                current = usage.get(key)
+                if current is None:
+                    current = usage[key] = [0, 0, 0, 0, 0]
+            elif current is not None:
+                name, _, value = line.partition(b':')
+                column = fields.get(name)
+                if column is not None:
+                    current[column] += int(value.split()[0]) * 1024
+        return usage
+    
+    def process_usage(self, pid, create_time):
+        """Per-file usage of one process, re-parsing smaps if maps changed or max_age passed"""
+        now = time.monotonic()
         try:
-            pinfo = proc.as_dict(attrs=[
-                'pid', 'name', 'memory_info', 'memory_percent',
-                'num_threads', 'status', 'username'
-            ])
-            return pinfo
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            with open(proc_path(pid, 'maps'), 'rb') as f:
+                signature = hash(f.read())
+            cached = self.processes.get(pid)
+            if (cached is not None and cached[0] == create_time and cached[1] == signature
+                    and now - cached[3] < self.max_age):
+                self.reused += 1
+                return cached[2]
+            with open(proc_path(pid, 'smaps'), 'rb') as f:
+                usage = self.parse_smaps(f.read(), pid)
+        except PermissionError:
+            self.denied += 1
             return None
+        except OSError:
+            return None
+        
+        self.reparsed += 1
+        self.processes[pid] = (create_time, signature, usage, now)
+        return usage
     
-    def get_thread_info(self, proc):
-        """Gets thread information from a process"""
+    def file_info(self, key):
+        """Details of a mapped file, cached by the (dev, inode) of its maps line and its mtime"""
+        path = self.paths.get(key, '')
+        if key[0] == 'anon':
+            return {'path': path, 'size': None, 'kind': 'anonymous'}
+        
+        # Stat through the mapping process's root: its mount namespace, not ours
+        st = None
+        owner = self.owners.get(key)
+        if owner is not None and path.startswith('/'):
+            try:
+                st = os.stat(proc_path(owner, 'root') + path)
+                if st.st_ino != key[1]:
+                    st = None  # Replaced on disk; the mapping still holds the old inode
+            except OSError:
+                pass  # Deleted, or the process exited
+        mtime = st.st_mtime_ns if st is not None else None
+        
+        cached = self.files.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if '.so' in os.path.basename(path):
+            kind = 'library'
+        elif key in self.executable:
+            kind = 'executable'
+        else:
+            kind = 'file'
+        info = {'path': path, 'size': st.st_size if st is not None else None, 'kind': kind}
+        self.files[key] = (mtime, info)
+        return info
+    
+    def analyze(self, processes):
+        """Aggregates mappings of the given processes (dicts with pid/create_time).
+        
+        Returns (entries, totals): entries are dicts sorted by summed RSS with
+        path, kind, size, procs, rss, pss, shared, private and swap; totals
+        holds the same sums over every mapping.
+        """
+        self.reparsed = self.reused = self.denied = 0
+        aggregated = {}
+        live = set()
+        
+        for pinfo in processes:
+            pid = pinfo['pid']
+            live.add(pid)
+            usage = self.process_usage(pid, pinfo.get('create_time'))
+            if not usage:
+                continue
+            for key, values in usage.items():
+                entry = aggregated.get(key)
+                if entry is None:
+                    entry = aggregated[key] = [0, 0, 0, 0, 0, 0]
+                for column in range(5):
+                    entry[column] += values[column]
+                entry[5] += 1
+        
+        # Forget processes that exited or were not part of this analysis
+        self.processes = {pid: cached for pid, cached in self.processes.items() if pid in live}
+        self.paths = {key: path for key, path in self.paths.items() if key in aggregated}
+        self.owners = {key: pid for key, pid in self.owners.items() if key in aggregated}
+        self.executable &= set(aggregated)
+        self.files = {key: info for key, info in self.files.items() if key in aggregated}
+        
+        entries = []
+        totals = {'rss': 0, 'pss': 0, 'shared': 0, 'private': 0, 'swap': 0}
+        for key, values in aggregated.items():
+            info = self.file_info(key)
+            entry = {
+                'path': info['path'], 'kind': info['kind'], 'size': info['size'],
+                'procs': values[5], 'rss': values[self.RSS], 'pss': values[self.PSS],
+                'shared': values[self.SHARED], 'private': values[self.PRIVATE],
+                'swap': values[self.SWAP],
+            }
+            for name in totals:
+                totals[name] += entry[name]
+            entries.append(entry)
+        
+        entries.sort(key=lambda e: e['rss'], reverse=True)
+        return entries, totals
+
+
+class KernelMemoryReader:
+    """Kernel-side memory breakdown from /proc/meminfo and /proc/slabinfo.
+    
+    /proc/meminfo is read with a single pread() on a descriptor kept open,
+    and values are picked through a precomputed table of line positions
+    built on the first read (and rebuilt if the layout ever changes), so
+    sampling every few hundred milliseconds stays cheap. Each sample is
+    diffed against the previous one to report growth rates.
+    """
+    
+    # (label, meminfo fields summed) shown in the kernel memory panel
+    COMPONENTS = (
+        ('Page cache', ('Cached',)),
+        ('Buffers', ('Buffers',)),
+        ('Shmem', ('Shmem',)),
+        ('Slab reclaimable', ('SReclaimable',)),
+        ('Slab unreclaimable', ('SUnreclaim',)),
+        ('Kernel stacks', ('KernelStack',)),
+        ('Page tables', ('PageTables',)),
+        ('Vmalloc', ('VmallocUsed',)),
+        ('Per-CPU', ('Percpu',)),
+        ('Anon huge pages', ('AnonHugePages',)),
+    )
+    HUGEPAGE_FIELDS = ('HugePages_Total', 'HugePages_Free', 'Hugepagesize')
+    
+    def __init__(self, slab_top=5):
+        self.slab_top = slab_top
+        self.fd = None
+        self.offsets = None
+        self.fields = sorted({field for _, fields in self.COMPONENTS for field in fields}
+                             | set(self.HUGEPAGE_FIELDS))
+        self.previous = None
+        self.previous_slabs = None
+        self.slab_error = None
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
         try:
-            threads = proc.threads()
-            thread_info = []
-            for thread in threads:
-                thread_info.append({
-                    'id': thread.id,
-                    'user_time': thread.user_time,
-                    'system_time': thread.system_time
-                })
-            return thread_info
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return []
+            self.fd = os.open(proc_path('meminfo'), os.O_RDONLY)
+        except OSError:
+            self.fd = None
     
-    def collect_processes(self):
-        """Collects information from all processes"""
-        print("\nCollecting process information...\n")
+    @property
+    def available(self):
+        return self.fd is not None
+    
+    def _build_offsets(self, lines):
+        """Maps each wanted field to its line number in /proc/meminfo"""
+        offsets = []
+        for index, line in enumerate(lines):
+            name = line.split(b':', 1)[0].decode()
+            if name in self.fields:
+                offsets.append((index, name, line[:len(name) + 1]))
+        self.offsets = offsets
+    
+    def read_meminfo(self):
+        """Returns {field: value} (kB fields in bytes, HugePages_* as counts)"""
+        data = os.pread(self.fd, 16384, 0)
+        lines = data.split(b'\n')
+        if self.offsets is None:
+            self._build_offsets(lines)
+        
+        values = {}
+        for index, name, prefix in self.offsets:
+            if index >= len(lines) or not lines[index].startswith(prefix):
+                # Layout changed (e.g. kernel update); rebuild the table once
+                self._build_offsets(lines)
+                return self.read_meminfo()
+            parts = lines[index][len(prefix):].split()
+            value = int(parts[0])
+            values[name] = value * 1024 if len(parts) > 1 else value
+        return values
+    
+    def read_slabinfo(self):
+        """Returns {cache name: bytes} for slab caches (requires root)"""
+        try:
+            with open(proc_path('slabinfo'), 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            self.slab_error = f"slabinfo: {e.strerror} (run as root)"
+            return None
+        
+        slabs = {}
+        for line in data.split(b'\n')[2:]:
+            parts = line.split()
+            if len(parts) < 15:
+                continue
+            # name active_objs num_objs objsize objperslab pagesperslab : tunables ... : slabdata active num shared
+            slabs[parts[0].decode()] = int(parts[14]) * int(parts[5]) * self.page_size
+        self.slab_error = None
+        return slabs
+    
+    def sample(self, timestamp=None):
+        """Returns (components, slabs): lists of (label, bytes, bytes per second)"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        meminfo = self.read_meminfo()
         
-        all_processes = list(psutil.process_iter())
+        current = {}
+        for label, fields in self.COMPONENTS:
+            current[label] = sum(meminfo.get(field, 0) for field in fields)
+        hugepages = meminfo.get('HugePages_Total', 0) - meminfo.get('HugePages_Free', 0)
+        current['Huge pages (used)'] = hugepages * meminfo.get('Hugepagesize', 0)
         
-        for proc in tqdm(all_processes, desc="Analyzing processes", unit="proc"):
-            pinfo = self.get_process_info(proc)
-            if pinfo:
-                self.processes.append(pinfo)
-            time.sleep(0.001)  # Pequeno delay para não sobrecarregar o sistema
+        slabs = self.read_slabinfo() if self.slab_top else None
+        
+        components = self._with_rates(current, self.previous, timestamp)
+        top_slabs = []
+        if slabs:
+            largest = dict(heapq.nlargest(self.slab_top, slabs.items(), key=lambda item: item[1]))
+            top_slabs = self._with_rates(largest, self.previous_slabs, timestamp)
+            top_slabs.sort(key=lambda item: item[1], reverse=True)
+        
+        self.previous = (timestamp, current)
+        self.previous_slabs = (timestamp, slabs) if slabs else None
+        return components, top_slabs
+    
+    @staticmethod
+    def _with_rates(current, previous, timestamp):
+        """Pairs values with their growth rate against the previous sample"""
+        rows = []
+        for name, value in current.items():
+            rate = None
+            if previous is not None and timestamp > previous[0] and name in previous[1]:
+                rate = (value - previous[1][name]) / (timestamp - previous[0])
+            rows.append((name, value, rate))
+        return rows
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+# Netlink proc connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_NONE = 0x00000000
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_DONE = 3
+NLMSG_HEADER = struct.Struct('=IHHII')
+CN_MSG_HEADER = struct.Struct('=IIIIHH')
+PROC_EVENT_HEADER = struct.Struct('=IIQ')
+PROC_EVENT_PIDS = struct.Struct('=IIII')
+
+
+def read_peak_rss(pid):
+    """Peak RSS (VmHWM) of a process in bytes, or None once it is gone"""
+    try:
+        with open(proc_path(pid, 'status'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_comm(pid):
+    """Command name of a process, or None once it is gone"""
+    try:
+        with open(proc_path(pid, 'comm'), 'rb') as f:
+            return f.read().strip().decode(errors='replace')
+    except OSError:
+        return None
+
+
+class ProcessEventMonitor:
+    """Tracks the live PID set from netlink proc connector events (Linux).
+    
+    After one initial scan of /proc, fork/exec/exit events keep the PID set
+    up to date, so collectors no longer re-enumerate /proc every tick. Young
+    processes have their peak RSS (VmHWM) sampled every ``sample_interval``
+    from the event thread; it cannot be read at exit, when /proc/<pid> is
+    already gone. Processes that exit within ``young_window`` seconds are
+    recorded as short-lived, since ticks usually miss them. /proc reads never
+    happen under the lock that live_pids() takes. Subscribing needs
+    CAP_NET_ADMIN; without it ``available`` is False, ``error`` says why and
+    callers fall back to rescanning /proc.
+    """
+    
+    def __init__(self, young_window=2.0, sample_interval=0.1, max_young=1024, history=100):
+        self.young_window = young_window
+        self.sample_interval = sample_interval
+        self.max_young = max_young
+        self.lock = threading.Lock()
+        self.live = {}
+        self.young = {}
+        self.short_lived = deque(maxlen=history)
+        self.resync = False
+        self.events = 0
+        self.error = None
+        self.sock = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        
+        if not sys.platform.startswith('linux') or not hasattr(socket, 'AF_NETLINK'):
+            self.error = "proc connector unavailable: requires Linux netlink sockets"
+            return
+        try:
+            self.sock = self.subscribe()
+        except OSError as e:
+            self.error = f"proc connector unavailable: {e.strerror or e}"
+            if self.sock is not None:
+                self.sock.close()
+            self.sock = None
+            return
+        
+        self.rescan()
+        self.thread = threading.Thread(target=self.run, name='proc-events', daemon=True)
+        self.thread.start()
+    
+    @property
+    def available(self):
+        return self.sock is not None
+    
+    def subscribe(self):
+        """Opens the connector socket and asks for proc events (raises OSError)"""
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        self.sock = sock
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        sock.bind((0, CN_IDX_PROC))
+        self.send_control(sock, PROC_CN_MCAST_LISTEN)
+        
+        # The kernel acknowledges the request with an error code
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        deadline = time.monotonic() + 1.0
+        while poller.poll(max(deadline - time.monotonic(), 0) * 1000):
+            data = sock.recv(65536)
+            for what, payload in self.parse(data):
+                if what == PROC_EVENT_NONE:
+                    err = struct.unpack_from('=I', payload)[0]
+                    if err:
+                        raise OSError(err, os.strerror(err))
+                    return sock
+        raise OSError("no acknowledgement from the proc connector")
+    
+    @staticmethod
+    def send_control(sock, op):
+        """Sends PROC_CN_MCAST_LISTEN/IGNORE to the proc connector"""
+        body = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, 4, 0) + struct.pack('=I', op)
+        header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(body), NLMSG_DONE, 0, 0, os.getpid())
+        sock.send(header + body)
+    
+    @staticmethod
+    def parse(data):
+        """Yields (event type, event payload) from a netlink datagram"""
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            length = NLMSG_HEADER.unpack_from(data, offset)[0]
+            if length < NLMSG_HEADER.size:
+                break
+            start = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+            if start + PROC_EVENT_HEADER.size <= offset + length:
+                what = PROC_EVENT_HEADER.unpack_from(data, start)[0]
+                yield what, data[start + PROC_EVENT_HEADER.size:offset + length]
+            offset += (length + 3) & ~3
+    
+    def rescan(self):
+        """Rebuilds the live PID set from /proc (startup and after lost events)"""
+        pids = psutil.pids()
+        with self.lock:
+            previous = self.live
+            self.live = {pid: previous.get(pid, 0) for pid in pids}
+            self.young = {pid: entry for pid, entry in self.young.items() if pid in self.live}
+            self.resync = False
+    
+    def live_pids(self):
+        """Returns {pid: birth stamp}; the stamp changes when a PID is reused"""
+        if self.resync:
+            self.rescan()
+        with self.lock:
+            return dict(self.live)
+    
+    def take_short_lived(self):
+        """Returns and clears the short-lived processes recorded so far"""
+        with self.lock:
+            processes = list(self.short_lived)
+            self.short_lived.clear()
+        return processes
+    
+    def handle(self, what, payload):
+        """Applies one fork/exec/exit event to the live and young sets"""
+        if what == PROC_EVENT_FORK:
+            _, _, child_pid, child_tgid = PROC_EVENT_PIDS.unpack_from(payload)
+            if child_pid != child_tgid:
+                return  # New thread, not a new process
+            now = time.time()
+            name = read_comm(child_tgid)  # /proc I/O stays outside the lock
+            with self.lock:
+                self.live[child_tgid] = now
+                if len(self.young) < self.max_young:
+                    self.young[child_tgid] = [now, name, None]
+        elif what == PROC_EVENT_EXEC:
+            pid, tgid = struct.unpack_from('=II', payload)
+            with self.lock:
+                if tgid not in self.young:
+                    return
+            name = read_comm(tgid)
+            with self.lock:
+                entry = self.young.get(tgid)
+                if entry is not None and name:
+                    entry[1] = name
+        elif what == PROC_EVENT_EXIT:
+            pid, tgid = struct.unpack_from('=II', payload)
+            if pid != tgid:
+                return  # Thread exit
+            now = time.time()
+            with self.lock:
+                self.live.pop(tgid, None)
+                entry = self.young.pop(tgid, None)
+                if entry is not None and now - entry[0] < self.young_window:
+                    # /proc/<pid> is gone by now: the peak is the last periodic sample
+                    started, name, peak = entry
+                    self.short_lived.append({
+                        'pid': tgid, 'name': name, 'started': started,
+                        'lifetime': now - started, 'peak_rss': peak,
+                    })
+    
+    def sample_young(self):
+        """Updates the peak RSS of young processes and retires old ones"""
+        now = time.time()
+        with self.lock:
+            entries = list(self.young.items())
+        expired = []
+        peaks = []
+        for pid, entry in entries:
+            if now - entry[0] >= self.young_window:
+                expired.append(pid)
+                continue
+            peak = read_peak_rss(pid)
+            if peak is not None:
+                peaks.append((entry, peak))
+        with self.lock:
+            for entry, peak in peaks:
+                if entry[2] is None or peak > entry[2]:
+                    entry[2] = peak
+            for pid in expired:
+                self.young.pop(pid, None)
+    
+    def run(self):
+        """Event thread: reads connector messages and samples young processes"""
+        poller = select.poll()
+        poller.register(self.sock, select.POLLIN)
+        last_sample = 0
+        while not self.stop_event.is_set():
+            try:
+                ready = poller.poll(self.sample_interval * 1000)
+                if ready:
+                    data = self.sock.recv(65536)
+                    for what, payload in self.parse(data):
+                        self.events += 1
+                        self.handle(what, payload)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # Events were dropped; resynchronize from /proc on next use
+                    self.resync = True
+                    continue
+                if self.stop_event.is_set():
+                    break
+                # Give up on events; callers see available=False and rescan /proc
+                self.error = f"proc connector failed: {e.strerror or e}"
+                self.sock.close()
+                self.sock = None
+                break
+            
+            if self.young and time.monotonic() - last_sample >= self.sample_interval:
+                self.sample_young()
+                last_sample = time.monotonic()
+    
+    def close(self):
+        self.stop_event.set()
+        if self.sock is not None:
+            try:
+                self.send_control(self.sock, PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            if self.thread is not None:
+                self.thread.join(timeout=1.0)
+            self.sock.close()
+            self.sock = None
+
+
+# Shared no-op context used for stage timers when --self-profile is off
+NULL_STAGE = nullcontext()
+
+
+class StageProfiler:
+    """Per-stage hot-path timers with log2 histograms for --self-profile.
+    
+    Stages nest: time spent in an inner stage (e.g. docker while building
+    the layout for render) is only charged to the inner one. Each sample
+    lands in a power-of-two microsecond bucket, so percentiles come from
+    fixed-size histograms. Optional cProfile and tracemalloc captures run
+    for a fixed window and are written to files when it ends.
+    """
+    
+    STAGES = ('collect', 'docker', 'aggregate', 'render', 'write')
+    BUCKETS = 32
+    
+    def __init__(self):
+        self.histograms = {stage: [0] * self.BUCKETS for stage in self.STAGES}
+        self.totals = dict.fromkeys(self.STAGES, 0.0)
+        self.counts = dict.fromkeys(self.STAGES, 0)
+        self.maxima = dict.fromkeys(self.STAGES, 0.0)
+        self.current = dict.fromkeys(self.STAGES, 0.0)
+        self.last_tick = dict.fromkeys(self.STAGES, 0.0)
+        self.stack = []
+        self.ticks = 0
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.tick_started = self.started
+        self.tick_cpu_started = self.cpu_started
+        self.last_tick_wall = 0.0
+        self.last_tick_cpu = 0.0
+        self.profile = None
+        self.profile_until = None
+        self.tracemalloc_until = None
+        self.output_dir = '.'
+        self.outputs = []
+    
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block, excluding nested stages"""
+        frame = [time.perf_counter(), 0.0]
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame[0]
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1][1] += elapsed
+            self.record(name, elapsed - frame[1])
+    
+    def record(self, name, seconds):
+        """Adds one sample to a stage's histogram and the current tick"""
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        self.histograms[name][bucket] += 1
+        self.totals[name] += seconds
+        self.counts[name] += 1
+        self.current[name] += seconds
+        if seconds > self.maxima[name]:
+            self.maxima[name] = seconds
+    
+    def percentile(self, name, fraction):
+        """Upper bound in seconds of the bucket holding the given percentile (capped at the max)"""
+        target = self.counts[name] * fraction
+        seen = 0
+        for bucket, count in enumerate(self.histograms[name]):
+            seen += count
+            if count and seen >= target:
+                return min((1 << bucket) / 1e6, self.maxima[name])
+        return 0.0
+    
+    def tick(self):
+        """Closes the current tick and ends capture windows that are over"""
+        now = time.perf_counter()
+        cpu = time.process_time()
+        self.last_tick = self.current
+        self.current = dict.fromkeys(self.STAGES, 0.0)
+        self.last_tick_wall = now - self.tick_started
+        self.last_tick_cpu = cpu - self.tick_cpu_started
+        self.tick_started = now
+        self.tick_cpu_started = cpu
+        self.ticks += 1
+        
+        if self.profile_until is not None and now >= self.profile_until:
+            self.stop_cprofile()
+        if self.tracemalloc_until is not None and now >= self.tracemalloc_until:
+            self.stop_tracemalloc()
+    
+    def start_captures(self, cprofile_seconds=0, tracemalloc_seconds=0, output_dir='.'):
+        """Starts cProfile and/or tracemalloc for a fixed window"""
+        self.output_dir = output_dir
+        if cprofile_seconds:
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile_until = time.perf_counter() + cprofile_seconds
+            self.profile.enable()
+        if tracemalloc_seconds:
+            import tracemalloc
+            tracemalloc.start(25)
+            self.tracemalloc_until = time.perf_counter() + tracemalloc_seconds
+    
+    def capture_path(self, suffix):
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        return os.path.join(self.output_dir, f"meminspector-{stamp}.{suffix}")
+    
+    def stop_cprofile(self):
+        """Ends the cProfile window and dumps stats loadable with pstats"""
+        if self.profile is None:
+            return
+        self.profile.disable()
+        path = self.capture_path('prof')
+        self.profile.dump_stats(path)
+        self.outputs.append(path)
+        self.profile = None
+        self.profile_until = None
+    
+    def stop_tracemalloc(self):
+        """Ends the tracemalloc window, dumping the snapshot and its top allocations"""
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        path = self.capture_path('tracemalloc')
+        snapshot.dump(path)
+        with open(path + '.txt', 'w') as f:
+            for stat in snapshot.statistics('lineno')[:25]:
+                f.write(f"{stat}\n")
+        self.outputs.extend([path, path + '.txt'])
+        self.tracemalloc_until = None
+    
+    def overhead_line(self):
+        """One-line breakdown of the last tick for the TUI footer"""
+        parts = [f"{stage} {self.last_tick[stage] * 1000:.1f}ms" for stage in self.STAGES]
+        cpu_percent = self.last_tick_cpu / self.last_tick_wall * 100 if self.last_tick_wall else 0.0
+        return f"Self-profile: {' | '.join(parts)} | CPU {cpu_percent:.1f}%"
+    
+    def summary_lines(self):
+        """Per-stage summary printed on exit"""
+        wall = time.perf_counter() - self.started
+        cpu = time.process_time() - self.cpu_started
+        lines = [
+            "=" * 100,
+            f"SELF-PROFILE SUMMARY ({self.ticks} ticks, {wall:.1f}s wall, {cpu:.2f}s CPU, "
+            f"{cpu / wall * 100 if wall else 0:.1f}% overhead)",
+            "=" * 100,
+            "",
+            f"{'Stage':<12} {'Calls':<8} {'Total':<12} {'Mean':<12} {'p50':<12} "
+            f"{'p95':<12} {'p99':<12} {'Max':<12}",
+            "-" * 100,
+        ]
+        for stage in self.STAGES:
+            count = self.counts[stage]
+            mean = self.totals[stage] / count if count else 0.0
+            lines.append(
+                f"{stage:<12} {count:<8} {self.totals[stage] * 1000:<12.1f} {mean * 1000:<12.2f} "
+                f"{self.percentile(stage, 0.5) * 1000:<12.2f} {self.percentile(stage, 0.95) * 1000:<12.2f} "
+                f"{self.percentile(stage, 0.99) * 1000:<12.2f} {self.maxima[stage] * 1000:<12.2f}"
+            )
+        lines.append("(times in ms; percentiles are power-of-two bucket upper bounds, capped at the max)")
+        for path in self.outputs:
+            lines.append(f"Wrote {path}")
+        return lines
+    
+    def close(self):
+        """Ends any capture window that is still open"""
+        self.stop_cprofile()
+        if self.tracemalloc_until is not None:
+            self.stop_tracemalloc()
+
+
+class AlertRule:
+    """One compiled alert rule.
+    
+    Rules come from a JSON file, e.g.::
+    
+        {"name": "container-near-limit", "entity": "container",
+         "metric": "memory_limit_percent", "op": ">", "value": 90,
+         "clear": 85, "for": 30, "cooldown": 300,
+         "actions": [{"type": "log", "path": "alerts.log"}]}
+    
+    The rule fires once the condition held for ``for`` seconds and resolves
+    when the value crosses ``clear`` (hysteresis; defaults to ``value``).
+    Actions run at most once per ``cooldown`` seconds per entity. ``match``
+    is an optional filter expression limiting the entities considered.
+    """
+    
+    METRICS = {
+        'process': ('rss', 'rss_slope', 'faults', 'major_faults', 'swapin', 'memory_percent'),
+        'container': ('rss', 'memory_limit_percent'),
+        'system': ('memory_percent', 'available', 'swap_percent'),
+    }
+    OPERATORS = ('>', '>=', '<', '<=')
+    ACTIONS = ('exec', 'log', 'snapshot')
+    VALUE_RE = re.compile(r'^([\d.]+)\s*([KMGT]?)I?B?\s*(%|/s|/min)?$', re.IGNORECASE)
+    
+    def __init__(self, spec):
+        self.name = spec.get('name') or f"{spec.get('entity')}.{spec.get('metric')}"
+        self.entity = spec.get('entity', 'process')
+        self.metric = spec.get('metric')
+        if self.entity not in self.METRICS:
+            raise ValueError(f"rule '{self.name}': unknown entity '{self.entity}' "
+                             f"(valid: {', '.join(self.METRICS)})")
+        if self.metric not in self.METRICS[self.entity]:
+            raise ValueError(f"rule '{self.name}': unknown {self.entity} metric '{self.metric}' "
+                             f"(valid: {', '.join(self.METRICS[self.entity])})")
+        self.op = spec.get('op', '>')
+        if self.op not in self.OPERATORS:
+            raise ValueError(f"rule '{self.name}': unsupported operator '{self.op}'")
+        self.upper = self.op in ('>', '>=')
+        self.compare = ProcessFilter.OPERATORS[self.op]
+        if 'value' not in spec:
+            raise ValueError(f"rule '{self.name}': missing 'value'")
+        self.threshold = self.parse_value(spec['value'])
+        self.clear = self.parse_value(spec['clear']) if 'clear' in spec else self.threshold
+        if (self.upper and self.clear > self.threshold) or (not self.upper and self.clear < self.threshold):
+            raise ValueError(f"rule '{self.name}': 'clear' must be on the resolving side of 'value'")
+        self.duration = float(spec.get('for', 0))
+        self.cooldown = float(spec.get('cooldown', 300))
+        self.filter = ProcessFilter(spec['match']) if spec.get('match') else None
+        self.actions = list(spec.get('actions') or [{'type': 'log', 'path': '-'}])
+        for action in self.actions:
+            if action.get('type') not in self.ACTIONS:
+                raise ValueError(f"rule '{self.name}': unknown action type '{action.get('type')}' "
+                                 f"(valid: {', '.join(self.ACTIONS)})")
+            if action['type'] == 'exec' and not action.get('command'):
+                raise ValueError(f"rule '{self.name}': exec action needs a 'command'")
+        
+        # Per-entity state: pending since, firing since, last action, filter result
+        self.pending = {}
+        self.firing = {}
+        self.last_action = {}
+        self.matches = {}
+    
+    def parse_value(self, raw):
+        """Parses a threshold: numbers, sizes (50M), rates (50M/min) or percentages"""
+        if isinstance(raw, (int, float)):
+            return float(raw)
+        match = self.VALUE_RE.match(str(raw).strip())
+        if not match:
+            raise ValueError(f"rule '{self.name}': invalid value '{raw}'")
+        value = float(match.group(1)) * ProcessFilter.SIZE_UNITS[match.group(2).upper()]
+        if (match.group(3) or '').lower() == '/s' and self.metric == 'rss_slope':
+            value *= 60  # rss_slope is per minute
+        return value
+    
+    BYTE_METRICS = {'rss': '', 'rss_slope': '/min', 'swapin': '/s', 'available': ''}
+    
+    def format_value(self, value):
+        """Formats a metric value with its unit (sizes in MiB)"""
+        if self.metric in self.BYTE_METRICS:
+            return f"{value / 1024 ** 2:.1f}M{self.BYTE_METRICS[self.metric]}"
+        if self.metric.endswith('percent'):
+            return f"{value:.1f}%"
+        return f"{value:.1f}/s"
+    
+    def cleared(self, value):
+        """Whether a firing entity resolved (crossed the clear threshold)"""
+        return value < self.clear if self.upper else value > self.clear
+    
+    def forget(self, entity_id):
+        self.pending.pop(entity_id, None)
+        self.firing.pop(entity_id, None)
+        self.matches.pop(entity_id, None)
+    
+    def __str__(self):
+        return f"{self.entity}.{self.metric} {self.op} {self.format_value(self.threshold)}"
+
+
+# Process metrics computed from the rate tracker rather than the snapshot itself
+RATE_METRICS = {'rss_slope', 'faults', 'major_faults', 'swapin'}
+
+
+class AlertEngine:
+    """Evaluates compiled alert rules incrementally on every snapshot.
+    
+    Rules are indexed by (entity, metric) and sorted by threshold, so for an
+    entity without alert state a bisect finds the few rules its value could
+    trigger. Only entities whose value changed since the previous snapshot
+    are evaluated, plus pending ones waiting for their ``for`` duration.
+    """
+    
+    def __init__(self, rules, snapshot_callback=None):
+        self.rules = rules
+        self.snapshot_callback = snapshot_callback
+        self.index = defaultdict(lambda: ([], [], [], []))
+        for rule in rules:
+            upper_rules, upper_thresholds, lower_rules, lower_thresholds = self.index[(rule.entity, rule.metric)]
+            rules_list, thresholds = (upper_rules, upper_thresholds) if rule.upper else (lower_rules, lower_thresholds)
+            position = bisect.bisect_right(thresholds, rule.threshold)
+            thresholds.insert(position, rule.threshold)
+            rules_list.insert(position, rule)
+        self.index = dict(self.index)
+        self.entities = {entity for entity, _ in self.index}
+        self.last_values = {key: {} for key in self.index}
+        self.stateful = {key: defaultdict(set) for key in self.index}
+        self.children = []
+        self.fired = 0
+        self.recent = deque(maxlen=20)
+    
+    @classmethod
+    def from_file(cls, path, snapshot_callback=None):
+        """Loads and compiles rules from a JSON file (a list or {"rules": [...]})"""
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{path}: invalid JSON: {e}")
+        specs = data.get('rules', []) if isinstance(data, dict) else data
+        if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+            raise ValueError(f"{path}: expected a list of rule objects")
+        return cls([AlertRule(spec) for spec in specs], snapshot_callback)
+    
+    def metrics(self, entity):
+        """Metrics of an entity type that at least one rule looks at"""
+        return {metric for rule_entity, metric in self.index if rule_entity == entity}
+    
+    @property
+    def needs_rates(self):
+        """Whether any rule looks at a per-process rate (RSS slope, faults, swap-in)"""
+        return bool(self.metrics('process') & RATE_METRICS)
+    
+    def candidates(self, key, value):
+        """Rules of a key whose threshold the value meets"""
+        upper_rules, upper_thresholds, lower_rules, lower_thresholds = self.index[key]
+        found = upper_rules[:bisect.bisect_right(upper_thresholds, value)]
+        if lower_rules:
+            found = found + lower_rules[bisect.bisect_left(lower_thresholds, value):]
+        return found
+    
+    @staticmethod
+    def describe(entity, record):
+        """Returns (label, filter record) for a process info dict, container dict or system"""
+        if record is None:
+            return entity, {}
+        if entity == 'process':
+            mem_info = record.get('memory_info')
+            return f"{record.get('name')}[{record.get('pid')}]", {
+                'pid': record.get('pid'),
+                'name': record.get('name'),
+                'status': record.get('status'),
+                'rss': mem_info.rss if mem_info else None,
+                'vms': mem_info.vms if mem_info else None,
+                'memory_percent': record.get('memory_percent'),
+                'num_threads': record.get('num_threads'),
+                'username': record.get('username'),
+                'cmdline': record.get('cmdline'),
+            }
+        return record.get('name', entity), record
+    
+    def evaluate(self, observations, records, now=None):
+        """Applies one snapshot.
+        
+        observations maps (entity, metric) to {entity_id: value}; records maps
+        entity type to {entity_id: info dict}, described only when a rule needs it.
+        """
+        now = time.monotonic() if now is None else now
+        self.reap_children()
+        
+        for key, values in observations.items():
+            if key not in self.index:
+                continue
+            last = self.last_values[key]
+            stateful = self.stateful[key]
+            entity_records = records.get(key[0], {})
+            
+            for entity_id, value in values.items():
+                if value != value:  # NaN: no data yet (e.g. first rate sample)
+                    continue
+                if last.get(entity_id) == value and entity_id not in stateful:
+                    continue
+                rules = self.candidates(key, value)
+                if entity_id in stateful:
+                    rules = set(rules) | stateful[entity_id]
+                for rule in rules:
+                    self.apply(rule, key, entity_id, value, entity_records.get(entity_id), now)
+            
+            # Entities that went away resolve silently
+            gone = [e for e in last if e not in values]
+            for entity_id in gone:
+                for rule in stateful.pop(entity_id, ()):
+                    rule.forget(entity_id)
+            if gone:
+                for rule_list in (self.index[key][0], self.index[key][2]):
+                    for rule in rule_list:
+                        if rule.matches:
+                            for entity_id in gone:
+                                rule.matches.pop(entity_id, None)
+            self.last_values[key] = values
+    
+    def apply(self, rule, key, entity_id, value, record, now):
+        """State transitions of one rule for one entity"""
+        stateful = self.stateful[key]
+        if entity_id in rule.firing:
+            if rule.cleared(value):
+                rule.firing.pop(entity_id)
+                stateful[entity_id].discard(rule)
+                if not stateful[entity_id]:
+                    del stateful[entity_id]
+                self.run_actions(rule, entity_id, value, record, 'RESOLVED', now)
+            return
+        
+        if not rule.compare(value, rule.threshold):
+            if rule.pending.pop(entity_id, None) is not None:
+                stateful[entity_id].discard(rule)
+            if entity_id in stateful and not stateful[entity_id]:
+                del stateful[entity_id]
+            return
+        
+        if rule.filter is not None:
+            matches = rule.matches.get(entity_id)
+            if matches is None:
+                matches = record is not None and rule.filter.match_record(self.describe(rule.entity, record)[1])
+                rule.matches[entity_id] = matches
+            if not matches:
+                return
+        
+        since = rule.pending.setdefault(entity_id, now)
+        stateful[entity_id].add(rule)
+        if now - since >= rule.duration:
+            rule.pending.pop(entity_id)
+            rule.firing[entity_id] = now
+            self.fired += 1
+            self.run_actions(rule, entity_id, value, record, 'FIRING', now)
+    
+    def run_actions(self, rule, entity_id, value, record, state, now):
+        """Runs the rule's actions (logs on every transition, others on firing)"""
+        label = self.describe(rule.entity, record)[0]
+        if state == 'FIRING':
+            self.recent.append((datetime.now(), rule.name, label, rule.format_value(value)))
+            if now - rule.last_action.get(entity_id, -float('inf')) < rule.cooldown:
+                return
+            rule.last_action[entity_id] = now
+        
+        line = (f"{datetime.now().isoformat(timespec='seconds')} {state} rule={rule.name} "
+                f"{rule.entity}={label} {rule.metric}={rule.format_value(value)} ({rule})\n")
+        for action in rule.actions:
+            kind = action['type']
+            try:
+                if kind == 'log':
+                    path = action.get('path', '-')
+                    if path == '-':
+                        sys.stderr.write(line)
+                    else:
+                        with open(path, 'a') as f:
+                            f.write(line)
+                elif state != 'FIRING':
+                    continue
+                elif kind == 'exec':
+                    env = dict(os.environ,
+                               MEMINSPECTOR_RULE=rule.name, MEMINSPECTOR_ENTITY=rule.entity,
+                               MEMINSPECTOR_TARGET=label, MEMINSPECTOR_METRIC=rule.metric,
+                               MEMINSPECTOR_VALUE=f"{value:g}", MEMINSPECTOR_THRESHOLD=f"{rule.threshold:g}")
+                    self.children.append(subprocess.Popen(
+                        shlex.split(action['command']), env=env,
+                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL
+                    ))
+                elif kind == 'snapshot' and self.snapshot_callback is not None:
+                    self.snapshot_callback(action, rule)
+            except OSError as e:
+                sys.stderr.write(f"Alert action {kind} of rule {rule.name} failed: {e}\n")
+    
+    def reap_children(self):
+        """Collects exited exec actions so they don't linger as zombies"""
+        if self.children:
+            self.children = [child for child in self.children if child.poll() is None]
+    
+    def status(self):
+        """Short status for the TUI header"""
+        firing = sum(len(rule.firing) for rule in self.rules)
+        return f"Alerts: {len(self.rules)} rules, {firing} firing"
+
+
+class Collector:
+    """Base class for data sources run by the CollectorScheduler.
+    
+    Subclasses declare the fields they provide, a default cadence in seconds
+    (0: once per update) and a cost class, and implement collect(fields),
+    which returns {field: value}. Background collectors (by default the
+    expensive ones) run on a worker thread, so a slow source never stalls an
+    update. Plugins are loaded with --collector module:Class[=ARG] and get
+    ARG as their only constructor argument.
+    """
+    
+    COSTS = ('cheap', 'moderate', 'expensive')
+    
+    name = None
+    fields = ()
+    cadence = 0.0
+    cost = 'cheap'
+    background = None
+    
+    def __init__(self, argument=None):
+        self.argument = argument
+        if self.name is None:
+            self.name = type(self).__name__
+        if self.background is None:
+            self.background = self.cost == 'expensive'
+    
+    def collect(self, fields):
+        """Returns {field: value}; fields are the ones that were requested"""
+        raise NotImplementedError
+    
+    def summary(self, values, format_bytes):
+        """Display rows (label, text) for the latest values"""
+        return [(field, str(value)) for field, value in values.items() if value is not None]
+    
+    def close(self):
+        pass
+
+
+class CollectorScheduler:
+    """Runs collectors on demand, dedupes requests and accounts their cost.
+    
+    get(field) returns the cached value while it is fresh: collected during
+    the current update (advanced by tick()) or within the collector's
+    cadence. Otherwise the providing collector runs once and every other
+    caller of that update shares the result. Update-scoped values also
+    expire after UPDATE_TTL seconds, for loops that never tick. Wall and
+    CPU time are accounted per collector (CPU of the calling thread, so
+    pool workers are not included).
+    """
+    
+    UPDATE_TTL = 1.0
+    
+    def __init__(self):
+        self.collectors = {}
+        self.providers = {}
+        self.values = {}  # field -> (value, generation, monotonic time)
+        self.stats = {}
+        self.generation = 0
+        self.executor = None
+        self.in_flight = set()
+        self.lock = threading.Lock()
+    
+    def register(self, collector):
+        """Adds a collector; its fields must not be provided by another one"""
+        if collector.cost not in Collector.COSTS:
+            raise ValueError(f"collector '{collector.name}': unknown cost class '{collector.cost}' "
+                             f"(valid: {', '.join(Collector.COSTS)})")
+        if collector.name in self.collectors:
+            raise ValueError(f"collector '{collector.name}' is already registered")
+        for field in collector.fields:
+            if field in self.providers:
+                raise ValueError(f"collector '{collector.name}': field '{field}' is already "
+                                 f"provided by '{self.providers[field].name}'")
+        self.collectors[collector.name] = collector
+        for field in collector.fields:
+            self.providers[field] = collector
+        self.stats[collector.name] = {
+            'runs': 0, 'requests': 0, 'reused': 0, 'wall': 0.0, 'cpu': 0.0,
+            'last_wall': 0.0, 'errors': 0, 'last_error': None,
+        }
+        return collector
+    
+    def set_cadence(self, name, seconds):
+        self.collectors[name].cadence = seconds
+    
+    def fresh(self, collector, entry, now):
+        _, generation, collected = entry
+        age = now - collected
+        return age < collector.cadence or (generation == self.generation and age < self.UPDATE_TTL)
+    
+    def get(self, field, default=None):
+        """Returns a field's value, running its collector when it is stale"""
+        collector = self.providers[field]
+        stats = self.stats[collector.name]
+        entry = self.values.get(field)
+        reused = entry is not None and self.fresh(collector, entry, time.monotonic())
+        with self.lock:
+            stats['requests'] += 1
+            if reused:
+                stats['reused'] += 1
+        if reused:
+            return entry[0]
+        
+        if collector.background:
+            # Keep serving the previous value until the worker has a new one
+            self.submit(collector, (field,))
+        else:
+            self.run(collector, (field,))
+            entry = self.values.get(field)
+        return entry[0] if entry is not None else default
+    
+    def run(self, collector, fields):
+        """Runs one collection, timing it and caching every field it returned"""
+        stats = self.stats[collector.name]
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            values = collector.collect(fields)
+        except Exception as e:
+            with self.lock:
+                stats['errors'] += 1
+                stats['last_error'] = str(e) or type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - started
+            with self.lock:
+                stats['runs'] += 1
+                stats['wall'] += wall
+                stats['cpu'] += time.thread_time() - cpu_started
+                stats['last_wall'] = wall
+        
+        collected = time.monotonic()
+        with self.lock:
+            for field, value in values.items():
+                if self.providers.get(field) is collector:
+                    self.values[field] = (value, self.generation, collected)
+    
+    def submit(self, collector, fields):
+        """Queues a background collection unless one is already running"""
+        with self.lock:
+            if collector.name in self.in_flight:
+                return
+            self.in_flight.add(collector.name)
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='collector')
+        self.executor.submit(self.run_background, collector, fields)
+    
+    def run_background(self, collector, fields):
+        try:
+            self.run(collector, fields)
+        except Exception:
+            pass  # Recorded in stats; the previous values are kept
+        finally:
+            with self.lock:
+                self.in_flight.discard(collector.name)
+    
+    def invalidate(self, *fields):
+        """Drops cached values (all without arguments) so the next get() collects again"""
+        for field in fields or list(self.values):
+            self.values.pop(field, None)
+    
+    def tick(self):
+        """Starts a new update: update-scoped values are collected again"""
+        self.generation += 1
+    
+    def summary_lines(self):
+        """Per-collector accounting printed with the self-profile summary"""
+        lines = [
+            "=" * 100,
+            "COLLECTORS",
+            "=" * 100,
+            "",
+            f"{'Collector':<14} {'Cost':<10} {'Cadence':<9} {'Runs':<7} {'Requests':<9} "
+            f"{'Reused':<8} {'Total':<10} {'Mean':<9} {'CPU':<10} {'Errors':<6}",
+            "-" * 100,
+        ]
+        for name, collector in self.collectors.items():
+            stats = self.stats[name]
+            mean = stats['wall'] / stats['runs'] if stats['runs'] else 0.0
+            cadence = f"{collector.cadence:g}s" if collector.cadence else "update"
+            lines.append(
+                f"{name[:13]:<14} {collector.cost:<10} {cadence:<9} {stats['runs']:<7} "
+                f"{stats['requests']:<9} {stats['reused']:<8} {stats['wall'] * 1000:<10.1f} "
+                f"{mean * 1000:<9.2f} {stats['cpu'] * 1000:<10.1f} {stats['errors']:<6}"
+            )
+            if stats['last_error']:
+                lines.append(f"  last error: {stats['last_error']}")
+        lines.append("(times in ms; CPU of the collecting thread only, pool workers are not included)")
+        return lines
+    
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        for collector in self.collectors.values():
+            collector.close()
+
+
+class SystemMemoryCollector(Collector):
+    """System memory and swap usage"""
+    
+    name = 'system'
+    fields = ('virtual_memory', 'swap_memory')
+    
+    def collect(self, fields):
+        return {'virtual_memory': psutil.virtual_memory(), 'swap_memory': psutil.swap_memory()}
+
+
+class ProcessCollector(Collector):
+    """All processes (sharded over the worker pool), and those with readable memory for tables"""
+    
+    name = 'processes'
+    fields = ('processes', 'process_rows')
+    cost = 'expensive'
+    background = False
+    
+    def __init__(self, inspector):
+        super().__init__()
+        self.inspector = inspector
+    
+    def collect(self, fields):
+        # One collection provides both fields for the rest of the update
+        processes = self.inspector._collect_all_processes()
+        return {
+            'processes': processes,
+            'process_rows': [pinfo for pinfo in processes if pinfo['memory_info']],
+        }
+
+
+class DockerCollector(Collector):
+    """Running containers and their memory stats (one stats call per container)"""
+    
+    name = 'docker'
+    fields = ('containers',)
+    cadence = 1.0
+    cost = 'expensive'
+    background = False
+    
+    def __init__(self, inspector):
+        super().__init__()
+        self.inspector = inspector
+    
+    def collect(self, fields):
+        with self.inspector.stage('docker'):
+            return {'containers': self.inspector.fetch_docker_containers()}
+
+
+class KernelCollector(Collector):
+    """Kernel memory components and top slab caches with growth rates"""
+    
+    name = 'kernel'
+    fields = ('kernel_memory',)
+    cost = 'moderate'
+    
+    def __init__(self, inspector):
+        super().__init__()
+        self.inspector = inspector
+    
+    def collect(self, fields):
+        reader = self.inspector.get_kernel_reader()
+        return {'kernel_memory': reader.sample() if reader else None}
+
+
+class JstatCollector(Collector):
+    """JVM heap usage from jstat logs, e.g. `jstat -gc -t PID 5s > /var/log/jvm/app.jstat`.
+    
+    The argument is a glob of log files, one JVM each, labelled by file name.
+    Only the header and the last complete line of each file are read.
+    """
+    
+    name = 'jstat'
+    fields = ('jvm_heap',)
+    cadence = 5.0
+    TAIL_BYTES = 4096
+    HEAP_COLUMNS = ('S0', 'S1', 'E', 'O')
+    
+    def __init__(self, argument=None):
+        if not argument:
+            raise ValueError("jstat collector needs a file glob (jstat=/path/*.jstat)")
+        super().__init__(argument)
+    
+    def read_log(self, path):
+        """Returns the last sample of a jstat -gc log as a dict (None if there is none)"""
+        with open(path, 'rb') as f:
+            header = f.readline().decode('ascii', 'replace').split()
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(size - self.TAIL_BYTES, 0))
+            tail = f.read()
+        lines = tail.splitlines()
+        if not tail.endswith(b'\n'):
+            lines = lines[:-1]  # jstat is still writing the last line
+        
+        for line in reversed(lines):
+            parts = line.split()
+            if len(parts) != len(header):
+                continue
+            try:
+                sample = dict(zip(header, map(float, parts)))
+            except ValueError:
+                continue  # Repeated header (jstat -h)
+            kb = 1024
+            return {
+                'used': sum(sample.get(c + 'U', 0) for c in self.HEAP_COLUMNS) * kb,
+                'capacity': sum(sample.get(c + 'C', 0) for c in self.HEAP_COLUMNS) * kb,
+                'metaspace': sample.get('MU', 0) * kb,
+                'young_gcs': int(sample.get('YGC', 0)),
+                'full_gcs': int(sample.get('FGC', 0)),
+                'gc_time': sample.get('GCT', 0.0),
+            }
+        return None
+    
+    def collect(self, fields):
+        heaps = {}
+        for path in sorted(glob.glob(self.argument)):
+            try:
+                sample = self.read_log(path)
+            except OSError:
+                continue
+            if sample is not None:
+                heaps[os.path.splitext(os.path.basename(path))[0]] = sample
+        return {'jvm_heap': heaps}
+    
+    def summary(self, values, format_bytes):
+        heaps = values.get('jvm_heap')
+        if not heaps:
+            return [("JVM heap", f"no samples in {self.argument}")]
+        return [
+            (f"JVM {label}", f"{format_bytes(heap['used'])} / {format_bytes(heap['capacity'])} heap, "
+                             f"{format_bytes(heap['metaspace'])} metaspace, {heap['full_gcs']} full GCs "
+                             f"({heap['gc_time']:.1f}s GC)")
+            for label, heap in heaps.items()
+        ]
+
+
+class TracemallocCollector(Collector):
+    """Python heap from tracemalloc snapshot dumps (Snapshot.dump or --profile-tracemalloc).
+    
+    The argument is a glob; the newest matching dump is loaded, and only
+    again when it changes. Dumps are pickles: only point this at trusted files.
+    """
+    
+    name = 'tracemalloc'
+    fields = ('python_heap',)
+    cadence = 30.0
+    cost = 'expensive'
+    TOP = 3
+    
+    def __init__(self, argument=None):
+        if not argument:
+            raise ValueError("tracemalloc collector needs a file glob (tracemalloc=/path/*.tracemalloc)")
+        super().__init__(argument)
+        self.loaded = None
+        self.heap = None
+    
+    def collect(self, fields):
+        import tracemalloc
+        dumps = []
+        for path in glob.glob(self.argument):
+            if path.endswith('.txt'):
+                continue  # Text reports written next to --profile-tracemalloc dumps
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            dumps.append((stat.st_mtime, stat.st_size, path))
+        if not dumps:
+            return {'python_heap': None}
+        
+        mtime, size, path = max(dumps)
+        if (path, mtime, size) != self.loaded:
+            stats = tracemalloc.Snapshot.load(path).statistics('lineno')
+            self.heap = {
+                'path': path,
+                'total': sum(stat.size for stat in stats),
+                'blocks': sum(stat.count for stat in stats),
+                'top': [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                         stat.size) for stat in stats[:self.TOP]],
+            }
+            self.loaded = (path, mtime, size)
+        return {'python_heap': self.heap}
+    
+    def summary(self, values, format_bytes):
+        heap = values.get('python_heap')
+        if heap is None:
+            return [("Python heap", f"no dumps in {self.argument}")]
+        rows = [("Python heap", f"{format_bytes(heap['total'])} in {heap['blocks']} blocks "
+                                f"({os.path.basename(heap['path'])})")]
+        rows.extend((f"  {where}", format_bytes(size)) for where, size in heap['top'])
+        return rows
+
+
+# Collectors available by name to --collector NAME=ARG
+BUILTIN_COLLECTORS = {
+    'jstat': JstatCollector,
+    'tracemalloc': TracemallocCollector,
+}
+
+
+def load_collector(spec):
+    """Instantiates a collector from NAME[=ARG], module:Class[=ARG] or path.py:Class[=ARG].
+    
+    Modules are imported from the existing sys.path only; plugins elsewhere
+    are loaded from the explicit file path, never from the working directory.
+    """
+    target, _, argument = spec.partition('=')
+    if ':' in target:
+        module_name, _, class_name = target.rpartition(':')
+        # Plugins import Collector from meminspector, also when run as a script
+        sys.modules.setdefault('meminspector', sys.modules[__name__])
+        if module_name.endswith('.py'):
+            path = os.path.abspath(module_name)
+            if not os.path.isfile(path):
+                raise ValueError(f"collector file {module_name} not found")
+            name = os.path.splitext(os.path.basename(path))[0]
+            module_spec = importlib.util.spec_from_file_location(f"meminspector_plugin_{name}", path)
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+        else:
+            module = importlib.import_module(module_name)
+        cls = getattr(module, class_name, None)
+        if not (isinstance(cls, type) and issubclass(cls, Collector)):
+            raise ValueError(f"{target} is not a Collector subclass")
+    elif target in BUILTIN_COLLECTORS:
+        cls = BUILTIN_COLLECTORS[target]
+    else:
+        raise ValueError(f"unknown collector '{target}' "
+                         f"(built-in: {', '.join(BUILTIN_COLLECTORS)}; or module:Class)")
+    return cls(argument or None)
+
+
+# Process attributes collected by default for list and refresh modes
+PROCESS_ATTRS = [
+    'pid', 'name', 'memory_info', 'memory_percent',
+    'num_threads', 'status', 'username', 'create_time'
+]
+
+# Compact rows sent back by pool workers: one tuple per process, in this order
+ROW_FIELDS = ('pid', 'name', 'rss', 'vms', 'memory_percent', 'num_threads', 'status',
+              'username', 'create_time')
+
+# Rows only carry RSS and VMS, the parts of psutil's memory_info that are used
+MemoryInfo = namedtuple('MemoryInfo', ['rss', 'vms'])
+
+# /proc/<pid>/stat state letters, named like psutil's STATUS_* values
+PROC_STATES = {
+    'R': 'running', 'S': 'sleeping', 'D': 'disk-sleep', 'T': 'stopped', 't': 'tracing-stop',
+    'Z': 'zombie', 'X': 'dead', 'x': 'dead', 'K': 'wake-kill', 'W': 'waking', 'I': 'idle',
+    'P': 'parked',
+}
+
+# Units of /proc/<pid>/statm sizes and of the /proc/<pid>/stat start time
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+# Processes read per pool task once PIDs are ranked by RSS; the first chunk
+# is printed while the following ones are still being read
+RANK_CHUNK = 256
+
+# Filters compiled inside pool workers, keyed by expression
+_worker_filters = {}
+
+# uid -> user name, resolved once per worker
+_usernames = {}
+
+
+def read_process_info(proc, attrs=PROCESS_ATTRS, process_filter=None):
+    """Reads attrs of a process (None if gone, denied or rejected by the filter)"""
+    try:
+        with proc.oneshot():
+            pinfo = {}
+            if process_filter is not None:
+                # Filter fields are read lazily; rejected processes stop here
+                pinfo = process_filter.match(proc)
+                if pinfo is None:
+                    return None
+            missing = [attr for attr in attrs if attr not in pinfo]
+            if missing:
+                pinfo.update(proc.as_dict(attrs=missing))
+        return pinfo
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def process_rss(pinfo):
+    """Sort key: RSS of a process info dict (0 when unknown)"""
+    mem_info = pinfo.get('memory_info')
+    return mem_info.rss if mem_info else 0
+
+
+def row_rss(row):
+    """Sort key: RSS of a compact row (0 when unknown)"""
+    return row[2] or 0
+
+
+def pinfo_row(pinfo):
+    """Packs a psutil info dict into a compact row (see ROW_FIELDS)"""
+    mem_info = pinfo.get('memory_info')
+    return (pinfo['pid'], pinfo.get('name'), mem_info.rss if mem_info else None,
+            mem_info.vms if mem_info else None, pinfo.get('memory_percent'),
+            pinfo.get('num_threads'), pinfo.get('status'), pinfo.get('username'),
+            pinfo.get('create_time'))
+
+
+def row_pinfo(row):
+    """Expands a compact row into the info dict used by the rest of the inspector"""
+    pid, name, rss, vms, memory_percent, num_threads, status, username, create_time = row
+    return {
+        'pid': pid, 'name': name,
+        'memory_info': MemoryInfo(rss, vms) if rss is not None else None,
+        'memory_percent': memory_percent, 'num_threads': num_threads, 'status': status,
+        'username': username, 'create_time': create_time,
+    }
+
+
+def worker_filter(process_filter):
+    """Compiles a filter expression once per worker (compiled filters are not picklable)"""
+    if isinstance(process_filter, str):
+        if process_filter not in _worker_filters:
+            _worker_filters[process_filter] = ProcessFilter(process_filter)
+        return _worker_filters[process_filter]
+    return process_filter
+
+
+def lookup_username(uid):
+    """User name of a uid, or the uid itself when it has no passwd entry (like psutil)"""
+    name = _usernames.get(uid)
+    if name is None:
+        try:
+            name = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            name = str(uid)
+        _usernames[uid] = name
+    return name
+
+
+def psutil_row(pid, process_filter=None):
+    """Reads one compact row through psutil (None if gone or rejected by the filter)"""
+    try:
+        proc = psutil.Process(pid)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    pinfo = read_process_info(proc, PROCESS_ATTRS, process_filter)
+    return pinfo_row(pinfo) if pinfo else None
+
+
+def collect_pid_shard(pids, process_filter=None):
+    """Collects one shard of PIDs through psutil, as rows sorted by RSS (largest first).
+    
+    Runs inside pool workers on platforms without a Linux procfs; the filter
+    arrives as its expression string.
+    """
+    process_filter = worker_filter(process_filter)
+    rows = []
+    for pid in pids:
+        row = psutil_row(pid, process_filter)
+        if row is not None:
+            rows.append(row)
+    rows.sort(key=row_rss, reverse=True)
+    return rows
+
+
+def read_proc_file(path, size=4096):
+    """Reads the start of a procfs file with a single read() (cheaper than open())"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+
+def rank_pid_shard(pids, total_memory):
+    """Reads /proc/<pid>/status of a shard of PIDs, as rows sorted by RSS (largest first).
+    
+    status holds every row field but the name and start time, which
+    read_ranked_chunk fills in from stat; values match what psutil reports
+    for the same attributes (VmRSS and VmSize are exact, unlike the RSS in
+    stat), without the cost of a psutil.Process per PID. Processes whose
+    status is not readable are ranked last with RSS None, for psutil to
+    read later.
+    """
+    root = getattr(psutil, 'PROCFS_PATH', '/proc')
+    rows = []
+    for pid in pids:
+        try:
+            status = read_proc_file(f"{root}/{pid}/status")
+        except PermissionError:
+            rows.append((pid, None, None, None, None, None, None, None, None))
+            continue
+        except OSError:
+            continue  # Gone
+        # Values are parsed in place: this runs for every process on each update
+        uid_at = status.find(b'\nUid:\t')
+        if uid_at < 0:
+            continue
+        uid = int(status[uid_at + 6:status.find(b'\t', uid_at + 6)])  # Real uid, like psutil
+        state_at = status.find(b'\nState:\t') + 8
+        threads_at = status.find(b'\nThreads:\t') + 10
+        # Kernel threads and zombies have no memory lines (statm reads 0 for them)
+        rss = vms = 0
+        rss_at = status.find(b'\nVmRSS:')
+        if rss_at >= 0:
+            rss = int(status[rss_at + 7:status.find(b' kB', rss_at)]) * 1024
+        vms_at = status.find(b'\nVmSize:')
+        if vms_at >= 0:
+            vms = int(status[vms_at + 8:status.find(b' kB', vms_at)]) * 1024
+        rows.append((
+            pid, None, rss, vms, (rss / float(total_memory)) * 100,
+            int(status[threads_at:status.find(b'\n', threads_at)]),
+            PROC_STATES.get(status[state_at:state_at + 1].decode(), '?'),
+            lookup_username(uid), None,
+        ))
+    rows.sort(key=row_rss, reverse=True)
+    return rows
+
+
+def read_cmdline(root, pid):
+    """Reads /proc/<pid>/cmdline split like psutil does ([] when unreadable)"""
+    try:
+        with open(f"{root}/{pid}/cmdline", 'rb') as f:
+            data = os.fsdecode(f.read())
+    except OSError:
+        return []
+    if not data:
+        return []
+    # Processes that rewrite their title often separate arguments with spaces
+    sep = '\x00' if data.endswith('\x00') else ' '
+    if data.endswith(sep):
+        data = data[:-1]
+    cmdline = data.split(sep)
+    if sep == '\x00' and len(cmdline) == 1 and ' ' in data:
+        cmdline = data.split(' ')
+    return cmdline
+
+
+def read_ranked_chunk(rows, process_filter=None):
+    """Completes ranked rows from rank_pid_shard, keeping their order.
+    
+    Runs inside pool workers on Linux: adds the name and start time from
+    /proc/<pid>/stat (the full name when the 15-character comm is
+    truncated, like psutil), then applies the filter. Processes gone
+    meanwhile are dropped; unreadable ones go through psutil instead.
+    """
+    process_filter = worker_filter(process_filter)
+    needs_cmdline = process_filter is not None and process_filter.uses('cmdline')
+    root = getattr(psutil, 'PROCFS_PATH', '/proc')
+    boot_time = psutil.boot_time()
+    
+    completed = []
+    for row in rows:
+        pid = row[0]
+        try:
+            stat = read_proc_file(f"{root}/{pid}/stat") if row[2] is not None else None
+        except PermissionError:
+            stat = None
+        except OSError:
+            continue  # Gone
+        if stat is None:
+            row = psutil_row(pid, process_filter)  # Applies the filter itself
+            if row is not None:
+                completed.append(row)
+            continue
+        
+        # The command name may contain spaces/parens; fields start after the last ')'
+        rpar = stat.rfind(b')')
+        name = os.fsdecode(stat[stat.find(b'(') + 1:rpar])
+        fields = stat[rpar + 2:].split(None, 20)
+        if len(fields) < 20:
+            continue
+        if len(name) >= 15:
+            # comm is truncated to 15 characters; psutil then prefers the cmdline basename
+            cmdline = read_cmdline(root, pid)
+            if cmdline:
+                extended_name = os.path.basename(cmdline[0])
+                if extended_name.startswith(name):
+                    name = extended_name
+        row = (pid, name) + row[2:8] + (int(fields[19]) / CLOCK_TICKS + boot_time,)
+        
+        if process_filter is not None:
+            record = dict(zip(ROW_FIELDS, row))
+            if needs_cmdline:
+                record['cmdline'] = read_cmdline(root, pid)
+            if not process_filter.match_record(record):
+                continue
+        completed.append(row)
+    return completed
+
+
+def default_workers():
+    """Default size of the collection worker pool"""
+    return min(8, os.cpu_count() or 1)
+
+
+# Samples kept for the headless timeline summary before it is downsampled
+TIMELINE_MAX_POINTS = 10000
+
+
+class MemInspector:
+    def __init__(self, process_filter=None, workers=None):
+        self.processes = []
+        self.history_timestamps = []
+        self.history_memory_used = []
+        self.history_memory_available = []
+        self.history_top_processes = defaultdict(list)
+        self.record_timeline = False
+        self.timeline_timestamps = []
+        self.timeline_memory_used = []
+        self.timeline_memory_available = []
+        self.timeline_peaks = {}
+        self.timeline_stride = 1
+        self.timeline_skipped = 0
+        self.console = None  # rich Console of the interactive views (see get_console)
+        self.show_graph = False
+        self.stop_tui = False
+        self.docker_client = None
+        self.docker_error = None
+        self.process_filter = process_filter
+        self.rate_tracker = RateTracker()
+        self.sort_key = 'rss'
+        self.cgroup_resolver = CgroupResolver()
+        self.mappings_analyzer = None
+        self.mappings_top = 0
+        self.kernel_reader = None
+        self.process_events = None
+        self.process_cache = {}
+        self.short_lived = deque(maxlen=50)
+        self.profiler = None
+        self.scheduler = CollectorScheduler()
+        for collector in (SystemMemoryCollector(), ProcessCollector(self),
+                          DockerCollector(self), KernelCollector(self)):
+            self.scheduler.register(collector)
+        self.plugin_collectors = []
+        self.container_names = {}
+        self.container_usage = {}
+        self.selected_container = None
+        self.workers = workers or default_workers()
+        self.worker_pool = None
+        self.pressure_monitor = None
+        self.pressure_error = None
+        self.pressure_capture = None
+        self.pressure_capture_file = None
+        self.last_capture_path = None
+        self.burst_until = 0
+        self.capture_interval = None
+        self.pressure_ring = deque(maxlen=20)
+        self.burst_interval = 0.25
+        self.burst_duration = 10.0
+        self.capture_dir = '.'
+        self.alert_engine = None
+        
+        # Try to connect to Docker
+        if DOCKER_AVAILABLE and not os.environ.get('DOCKER_HOST') and not os.path.exists(DOCKER_SOCKET):
+            self.docker_error = f"Docker connection error: {DOCKER_SOCKET} not found"
+        elif DOCKER_AVAILABLE:
+            import docker
+            try:
+                self.docker_client = docker.from_env()
+                # Test connection
+                self.docker_client.ping()
+            except docker.errors.DockerException as e:
+                self.docker_error = f"Docker connection error: {str(e)}"
+                self.docker_client = None
+            except Exception as e:
+                self.docker_error = f"Unexpected error: {str(e)}"
+                self.docker_client = None
+        else:
+            self.docker_error = "Docker library not installed (pip install docker)"
+        
+    def format_bytes(self, bytes_value):
+        """Converts bytes to readable format"""
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if bytes_value < 1024.0:
+                return f"{bytes_value:.2f} {unit}"
+            bytes_value /= 1024.0
+        return f"{bytes_value:.2f} PB"
+    
+    def get_process_info(self, proc, attrs=PROCESS_ATTRS):
+        """Gets information from a process (None if it fails the active filter)"""
+        return read_process_info(proc, attrs, self.process_filter)
+    
+    def enable_self_profile(self, cprofile_seconds=0, tracemalloc_seconds=0, output_dir='.'):
+        """Turns on per-stage timers and optional cProfile/tracemalloc windows"""
+        self.profiler = StageProfiler()
+        self.profiler.start_captures(cprofile_seconds, tracemalloc_seconds, output_dir)
+    
+    def stage(self, name):
+        """Timer context for a hot-path stage (no-op unless self-profiling)"""
+        if self.profiler is None:
+            return NULL_STAGE
+        return self.profiler.stage(name)
+    
+    def get_console(self):
+        """Returns the rich console of the interactive views, creating it on first use"""
+        if self.console is None:
+            from rich.console import Console
+            self.console = Console()
+        return self.console
+    
+    def end_tick(self):
+        """Marks the end of an update for the collectors and the self-profiler"""
+        self.scheduler.tick()
+        if self.profiler is not None:
+            self.profiler.tick()
+    
+    def finish_self_profile(self):
+        """Closes capture windows and prints the self-profile summary to stderr"""
+        if self.profiler is None:
+            return
+        self.profiler.close()
+        print('\n' + '\n'.join(self.profiler.summary_lines()), file=sys.stderr)
+        print('\n' + '\n'.join(self.scheduler.summary_lines()), file=sys.stderr)
+    
+    def add_collector(self, collector):
+        """Registers a plugin collector, shown in refresh mode and the TUI"""
+        self.scheduler.register(collector)
+        self.plugin_collectors.append(collector)
+    
+    def collector_rows(self, collector):
+        """Display rows of a plugin collector (its error or a placeholder until it has data)"""
+        values = {field: self.scheduler.get(field) for field in collector.fields}
+        if any(value is not None for value in values.values()):
+            return collector.summary(values, self.format_bytes)
+        error = self.scheduler.stats[collector.name]['last_error']
+        return [(collector.name, f"error: {error}" if error else "collecting...")]
+    
+    def display_collectors(self):
+        """Displays plugin collector data in refresh mode"""
+        if not self.plugin_collectors:
+            return
+        print(f"\n{'='*100}")
+        print("COLLECTORS")
+        print(f"{'='*100}\n")
+        for collector in self.plugin_collectors:
+            try:
+                rows = self.collector_rows(collector)
+            except Exception as e:
+                rows = [(collector.name, f"error: {e}")]
+            for label, text in rows:
+                print(f"{label[:29]:<30} {text}")
+    
+    def enable_process_events(self, young_window=2.0):
+        """Tracks processes from proc connector events; returns False on fallback"""
+        self.process_events = ProcessEventMonitor(young_window=young_window)
+        return self.process_events.available
+    
+    def live_pids(self):
+        """PIDs of all processes, from proc events when available else a /proc scan"""
+        if self.process_events is not None and self.process_events.available:
+            return sorted(self.process_events.live_pids())
+        return psutil.pids()
+    
+    def iter_processes(self):
+        """Yields psutil.Process objects, reusing them across ticks with proc events"""
+        if self.process_events is None or not self.process_events.available:
+            yield from psutil.process_iter()
+            return
+        
+        cache = {}
+        for pid, born in sorted(self.process_events.live_pids().items()):
+            proc = self.process_cache.get((pid, born))
+            if proc is None:
+                try:
+                    proc = psutil.Process(pid)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            cache[(pid, born)] = proc
+            yield proc
+        self.process_cache = cache
+    
+    def stop_process_events(self):
+        """Unsubscribes from proc connector events"""
+        if self.process_events is not None:
+            self.process_events.close()
+    
+    def collect_short_lived(self):
+        """Moves short-lived processes seen by the event thread into the history"""
+        if self.process_events is None:
+            return []
+        processes = self.process_events.take_short_lived()
+        self.short_lived.extend(processes)
+        return processes
+    
+    def display_short_lived(self, processes):
+        """Displays short-lived processes that started and exited between ticks"""
+        if not processes:
+            return
+        print(f"\n{'='*100}")
+        print(f"SHORT-LIVED PROCESSES SINCE LAST UPDATE ({len(processes)} processes)")
+        print(f"{'='*100}\n")
+        print(f"{'#':<4} {'PID':<8} {'Name':<30} {'Peak RSS':<15} {'Lifetime':<12} {'Started':<10}")
+        print(f"{'-'*100}")
+        
+        processes = sorted(processes, key=lambda p: p['peak_rss'] or 0, reverse=True)
+        for idx, proc in enumerate(processes[:20], 1):
+            peak = self.format_bytes(proc['peak_rss']) if proc['peak_rss'] is not None else 'N/A'
+            started = datetime.fromtimestamp(proc['started']).strftime('%H:%M:%S')
+            print(
+                f"{idx:<4} {proc['pid']:<8} {str(proc['name'] or 'N/A')[:29]:<30} "
+                f"{peak:<15} {proc['lifetime'] * 1000:>7.0f} ms  {started:<10}"
+            )
+    
+    def iter_process_info(self, attrs=PROCESS_ATTRS):
+        """Yields info dicts for all processes matching the active filter"""
+        for proc in self.iter_processes():
+            pinfo = self.get_process_info(proc, attrs)
+            if pinfo:
+                yield pinfo
+    
+    def get_thread_info(self, proc):
+        """Gets thread information from a process"""
+        try:
+            threads = proc.threads()
+            thread_info = []
+            for thread in threads:
+                thread_info.append({
+                    'id': thread.id,
+                    'user_time': thread.user_time,
+                    'system_time': thread.system_time
+                })
+            return thread_info
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return []
+    
+    def get_worker_pool(self):
+        """Returns the collection pool, creating it on first use"""
+        if self.worker_pool is None:
+            # fork is cheap on Linux; macOS frameworks are not fork-safe, so use threads there
+            if sys.platform.startswith('linux'):
+                self.worker_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('fork')
+                )
+            else:
+                self.worker_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        return self.worker_pool
+    
+    def start_worker_pool(self):
+        """Creates the collection pool and forks its workers right away.
+        
+        Must run before any thread is started: a child forked from a
+        multi-threaded process can inherit locks held by the other threads.
+        One short task per worker also starts every worker on Pythons that
+        spawn them on demand.
+        """
+        if self.workers > 1:
+            pool = self.get_worker_pool()
+            concurrent.futures.wait([pool.submit(time.sleep, 0.02) for _ in range(self.workers)])
+    
+    def shutdown_worker_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+            self.worker_pool = None
+    
+    def collect_all_processes(self, pids=None, shared=False):
+        """Collects all processes sorted by RSS, sharding PIDs across the pool.
+        
+        With shared=True the processes come from the collector scheduler,
+        shared with every other caller of the update; that list and its
+        dicts must not be modified.
+        """
+        with self.stage('collect'):
+            if shared:
+                return self.scheduler.get('processes')
+            return self._collect_all_processes(pids)
+    
+    def _collect_all_processes(self, pids=None):
+        return [pinfo for chunk in self.iter_process_chunks(pids) for pinfo in chunk]
+    
+    def iter_process_chunks(self, pids=None):
+        """Yields lists of process info dicts, largest RSS first, as they are read.
+        
+        On Linux every PID is first ranked by RSS from its status, then rows
+        are read in rank-ordered chunks on the pool, so the largest
+        processes are yielded while the rest are still being read.
+        Elsewhere each shard is collected and sorted by a worker with psutil,
+        and the shards are combined with a k-way merge. Workers send back
+        compact rows (see ROW_FIELDS) rather than dicts.
+        """
+        if pids is None:
+            pids = self.live_pids()
+        pool = self.get_worker_pool() if self.workers > 1 else None
+        process_filter = self.process_filter
+        if pool is not None and process_filter is not None:
+            process_filter = str(process_filter)  # Compiled filters are not picklable
+        
+        if not sys.platform.startswith('linux'):
+            rows = self.merge_pid_shards(pids, pool, process_filter)
+            while True:
+                chunk = [row_pinfo(row) for row in itertools.islice(rows, RANK_CHUNK)]
+                if not chunk:
+                    return
+                yield chunk
+        
+        total = self.scheduler.get('virtual_memory').total
+        if pool is None:
+            ranked = rank_pid_shard(pids, total)
+        else:
+            futures = [pool.submit(rank_pid_shard, pids[i::self.workers], total)
+                       for i in range(self.workers)]
+            ranked = list(heapq.merge(*(future.result() for future in futures),
+                                      key=row_rss, reverse=True))
+        
+        chunks = [ranked[i:i + RANK_CHUNK] for i in range(0, len(ranked), RANK_CHUNK)]
+        if pool is None:
+            for chunk in chunks:
+                yield [row_pinfo(row) for row in read_ranked_chunk(chunk, process_filter)]
+            return
+        
+        futures = [pool.submit(read_ranked_chunk, chunk, process_filter) for chunk in chunks]
+        try:
+            for future in futures:
+                yield [row_pinfo(row) for row in future.result()]
+        finally:
+            for future in futures:
+                future.cancel()  # Consumer stopped early
+    
+    def merge_pid_shards(self, pids, pool, process_filter):
+        """Collects PID shards with psutil and k-way merges their sorted rows"""
+        if pool is None:
+            return iter(collect_pid_shard(pids, process_filter))
+        # Interleaved shards balance cheap kernel threads (low PIDs) across workers
+        shard_count = self.workers * 4
+        shards = [pids[i::shard_count] for i in range(shard_count)]
+        futures = [pool.submit(collect_pid_shard, shard, process_filter) for shard in shards if shard]
+        results = [future.result() for future in concurrent.futures.as_completed(futures)]
+        return heapq.merge(*results, key=row_rss, reverse=True)
+    
+    def collect_processes(self):
+        """Yields chunks of all processes, largest RSS first, keeping them in self.processes"""
+        self.processes = []
+        for chunk in self.iter_process_chunks():
+            self.processes.extend(chunk)
+            yield chunk
+    
+    def display_top_processes(self, top_n=None, chunks=None):
+        """Displays processes that consume the most memory.
+        
+        chunks may be an iterator of process lists, largest first (see
+        collect_processes); each one is printed as soon as it arrives, and
+        the count follows the table since it is only known at the end.
+        """
+        if chunks is None:
+            processes = self.processes if top_n is None else self.processes[:top_n]
+            # Rows are written in batches; one print() per row is slow with thousands of processes
+            chunks = [processes[i:i + 500] for i in range(0, len(processes), 500)]
+            title = f"ALL PROCESSES BY MEMORY USAGE ({len(processes)} processes)"
+            footer = None
+        else:
+            title = "ALL PROCESSES BY MEMORY USAGE"
+            footer = "\n{count} processes\n"
+        
+        print(f"\n{'='*100}")
+        print(title)
+        print(f"{'='*100}\n")
+        
+        print(f"{'#':<4} {'PID':<8} {'Name':<30} {'Memory RSS':<15} {'% Mem':<8} {'Threads':<8} {'Status':<12}")
+        print(f"{'-'*100}")
+        sys.stdout.flush()
+        
+        idx = 0
+        for chunk in chunks:
+            if top_n is not None:
+                chunk = chunk[:top_n - idx]
+            lines = []
+            for idx, proc in enumerate(chunk, idx + 1):
+                pid = str(proc.get('pid', 'N/A'))
+                name = str(proc.get('name', 'N/A'))[:29]
+                mem_info = proc.get('memory_info')
+                rss = self.format_bytes(mem_info.rss) if mem_info else 'N/A'
+                mem_pct = proc.get('memory_percent')
+                mem_percent = f"{mem_pct:.2f}%" if mem_pct is not None else "0.00%"
+                num_threads = str(proc.get('num_threads', 0) or 0)
+                status = str(proc.get('status') or 'N/A')
+                
+                lines.append(f"{idx:<4} {pid:<8} {name:<30} {rss:<15} {mem_percent:<8} {num_threads:<8} {status:<12}\n")
+            sys.stdout.write(''.join(lines))
+            sys.stdout.flush()
+            if top_n is not None and idx >= top_n:
+                break
+        if footer is not None:
+            sys.stdout.write(footer.format(count=idx))
+            sys.stdout.flush()
+    
+    def analyze_threads(self, top_n=5):
+        """Analyzes threads from processes that consume the most memory"""
+        print(f"\n{'='*100}")
+        print(f"THREAD ANALYSIS OF TOP {top_n} PROCESSES")
+        print(f"{'='*100}\n")
+        
+        processes_to_analyze = self.processes[:top_n]
+        
+        for proc_info in processes_to_analyze:
+            try:
+                proc = psutil.Process(proc_info['pid'])
+                threads = self.get_thread_info(proc)
+                
+                print(f"\nProcess: {proc_info['name']} (PID: {proc_info['pid']})")
+                print(f"   Memory RSS: {self.format_bytes(proc_info['memory_info'].rss)}")
+                print(f"   Total Threads: {len(threads)}")
+                
+                if threads:
+                    # Sort threads by CPU time (user_time + system_time)
+                    threads_sorted = sorted(
+                        threads,
+                        key=lambda t: t['user_time'] + t['system_time'],
+                        reverse=True
+                    )
+                    
+                    print(f"\n   {'Thread ID':<15} {'User Time':<15} {'System Time':<15} {'Total Time':<15}")
+                    print(f"   {'-'*60}")
+                    
+                    for thread in threads_sorted[:5]:  # Top 5 threads
+                        total_time = thread['user_time'] + thread['system_time']
+                        print(f"   {thread['id']:<15} {thread['user_time']:<15.2f} {thread['system_time']:<15.2f} {total_time:<15.2f}")
+                
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                print(f"   Unable to access process information")
+    
+    def display_mappings(self, top_n=20):
+        """Displays the mapped files and libraries that dominate resident memory"""
+        if self.mappings_analyzer is None:
+            self.mappings_analyzer = MappingsAnalyzer()
+        entries, totals = self.mappings_analyzer.analyze(self.processes)
+        analyzer = self.mappings_analyzer
+        
+        print(f"\n{'='*100}")
+        print(f"SHARED MAPPINGS - TOP {top_n} FILES BY RESIDENT MEMORY")
+        print(f"{'='*100}\n")
+        
+        if not entries:
+            print("No mappings available (requires Linux /proc/<pid>/smaps)")
+            return
+        
+        print(f"{'#':<4} {'File':<44} {'Procs':<6} {'RSS (sum)':<12} {'PSS':<12} {'Shared':<12} {'Private':<12}")
+        print(f"{'-'*100}")
+        
+        for idx, entry in enumerate(entries[:top_n], 1):
+            path = entry['path']
+            if len(path) > 43:
+                path = "..." + path[-40:]
+            print(
+                f"{idx:<4} {path:<44} {entry['procs']:<6} "
+                f"{self.format_bytes(entry['rss']):<12} {self.format_bytes(entry['pss']):<12} "
+                f"{self.format_bytes(entry['shared']):<12} {self.format_bytes(entry['private']):<12}"
+            )
+        
+        libraries = [e for e in entries if e['kind'] == 'library']
+        print(f"\nSum of process RSS:         {self.format_bytes(totals['rss'])}")
+        print(f"Actual usage (sum of PSS):  {self.format_bytes(totals['pss'])}")
+        print(f"Counted more than once:     {self.format_bytes(totals['rss'] - totals['pss'])} (shared pages)")
+        print(f"Shared libraries:           {len(libraries)} files, "
+              f"{self.format_bytes(sum(e['pss'] for e in libraries))} PSS")
+        if totals['swap']:
+            print(f"Swapped out:                {self.format_bytes(totals['swap'])}")
+        print(f"\nParsed {analyzer.reparsed} processes, reused {analyzer.reused} unchanged, "
+              f"{analyzer.denied} not accessible (try sudo)")
+    
+    def display_system_summary(self):
+        """Displays system summary"""
+        memory = self.scheduler.get('virtual_memory')
+        swap = self.scheduler.get('swap_memory')
+        
+        print(f"\n{'='*100}")
+        print("SYSTEM SUMMARY")
+        print(f"{'='*100}\n")
+        
+        print(f"Total Memory:      {self.format_bytes(memory.total)}")
+        print(f"Available Memory:  {self.format_bytes(memory.available)}")
+        print(f"Used Memory:       {self.format_bytes(memory.used)} ({memory.percent}%)")
+        print(f"Free Memory:       {self.format_bytes(memory.free)}")
+        
+        print(f"\nTotal Swap:        {self.format_bytes(swap.total)}")
+        print(f"Used Swap:         {self.format_bytes(swap.used)} ({swap.percent}%)")
+        print(f"Free Swap:         {self.format_bytes(swap.free)}")
+        
+        print(f"\nTotal Processes:   {len(self.processes)}")
+        
+        # Kernel memory breakdown
+        reader = self.get_kernel_reader()
+        if reader:
+            components, slabs = self.scheduler.get('kernel_memory')
+            print(f"\n{'='*100}")
+            print("KERNEL MEMORY")
+            print(f"{'='*100}\n")
+            for label, value, rate in components:
+                print(f"{label + ':':<21}{self.format_bytes(value):<15} {self.format_growth_text(rate)}")
+            if slabs:
+                print(f"\n{'Slab Cache':<30} {'Size':<15} {'Growth':<15}")
+                print(f"{'-'*100}")
+                for name, value, rate in slabs:
+                    print(f"{name[:29]:<30} {self.format_bytes(value):<15} {self.format_growth_text(rate)}")
+            elif reader.slab_error:
+                print(f"\n{reader.slab_error}")
+        
+        # Docker summary
+        if self.docker_client:
+            containers = self.get_docker_containers()
+            if containers:
+                print(f"\n{'='*100}")
+                print(f"DOCKER CONTAINERS ({len(containers)} running)")
+                print(f"{'='*100}\n")
+                print(f"{'#':<4} {'Name':<30} {'Image':<35} {'Memory':<15} {'%':<8}")
+                print(f"{'-'*100}")
+                
+                for idx, container in enumerate(containers, 1):
+                    mem_usage = self.format_bytes(container['memory_usage'])
+                    mem_percent = f"{container['memory_percent']:.1f}%"
+                    print(
+                        f"{idx:<4} "
+                        f"{container['name'][:29]:<30} "
+                        f"{container['image'][:34]:<35} "
+                        f"{mem_usage:<15} "
+                        f"{mem_percent:<8}"
+                    )
+    
+    def run(self, top_processes=None, analyze_threads_count=5):
+        """Executes the complete analysis"""
+        print("="*100)
+        print("MemInspector - Memory Inspector for macOS")
+        print("="*100)
+        
+        # System summary
+        self.display_system_summary()
+        
+        # Collect and display all processes; the largest are printed while
+        # the rest are still being read
+        self.display_top_processes(top_n=top_processes, chunks=self.collect_processes())
+        
+        # Analyze threads
+        self.analyze_threads(top_n=analyze_threads_count)
+        self.shutdown_worker_pool()
+        
+        # Shared mappings (opt-in, reads smaps of every process)
+        if self.mappings_top:
+            self.display_mappings(top_n=self.mappings_top)
+        
+        print(f"\n{'='*100}")
+        print("Analysis completed!")
+        print(f"{'='*100}\n")
+    
+    def sample_graph_data(self, top_n=10, max_points=60):
+        """Samples system memory and top processes into the graph history"""
+        memory = self.scheduler.get('virtual_memory')
+        now = datetime.now()
+        
+        # Update history
+        current_time = now.strftime('%H:%M:%S')
+        self.history_timestamps.append(current_time)
+        self.history_memory_used.append(memory.used / (1024**3))  # Convert to GB
+        self.history_memory_available.append(memory.available / (1024**3))
+        
+        # Keep only last max_points
+        if len(self.history_timestamps) > max_points:
+            self.history_timestamps = self.history_timestamps[-max_points:]
+            self.history_memory_used = self.history_memory_used[-max_points:]
+            self.history_memory_available = self.history_memory_available[-max_points:]
+        
+        # Get top processes
+        top_processes = [{
+            'name': pinfo['name'],
+            'memory': pinfo['memory_info'].rss / (1024**3)  # GB
+        } for pinfo in self.scheduler.get('process_rows')[:top_n]]
+        
+        # Update top processes history
+        for proc in top_processes:
+            self.history_top_processes[proc['name']].append(proc['memory'])
+        
+        # Keep history aligned
+        for name in list(self.history_top_processes.keys()):
+            if len(self.history_top_processes[name]) > max_points:
+                self.history_top_processes[name] = self.history_top_processes[name][-max_points:]
+        
+        # Full-range recording used by the timeline summary (downsampled when long)
+        if self.record_timeline:
+            self.record_timeline_sample(now)
+            for proc in top_processes:
+                name = proc['name']
+                if proc['memory'] > self.timeline_peaks.get(name, 0):
+                    self.timeline_peaks[name] = proc['memory']
+        
+        return memory, top_processes
+    
+    def record_timeline_sample(self, now):
+        """Appends the latest sample to the timeline, halving it once it is full.
+        
+        Adjacent samples are merged keeping the highest used and lowest
+        available memory so peaks survive; later samples are recorded at the
+        doubled stride to keep the spacing even.
+        """
+        self.timeline_skipped += 1
+        if self.timeline_skipped < self.timeline_stride:
+            return
+        self.timeline_skipped = 0
+        self.timeline_timestamps.append(now)
+        self.timeline_memory_used.append(self.history_memory_used[-1])
+        self.timeline_memory_available.append(self.history_memory_available[-1])
+        
+        if len(self.timeline_timestamps) > TIMELINE_MAX_POINTS:
+            used = self.timeline_memory_used
+            available = self.timeline_memory_available
+            self.timeline_timestamps = self.timeline_timestamps[::2]
+            self.timeline_memory_used = [max(used[i:i + 2]) for i in range(0, len(used), 2)]
+            self.timeline_memory_available = [min(available[i:i + 2])
+                                              for i in range(0, len(available), 2)]
+            self.timeline_stride *= 2
+    
+    def update_graph(self, frame, fig, ax1, ax2, top_n=10, max_points=60):
+        """Updates the real-time graph"""
+        import matplotlib.pyplot as plt
+        
+        # Clear axes
+        ax1.clear()
+        ax2.clear()
+        
+        # Collect current data
+        memory, top_processes = self.sample_graph_data(top_n, max_points)
+        
+        # Plot 1: Total Memory Usage Over Time
+        ax1.plot(self.history_timestamps, self.history_memory_used, 
+                label='Used Memory', color='#e74c3c', linewidth=2)
+        ax1.plot(self.history_timestamps, self.history_memory_available, 
+                label='Available Memory', color='#2ecc71', linewidth=2)
+        ax1.fill_between(range(len(self.history_memory_used)), 
+                         self.history_memory_used, alpha=0.3, color='#e74c3c')
+        
+        ax1.set_title('System Memory Usage Over Time', fontsize=14, fontweight='bold')
+        ax1.set_xlabel('Time', fontsize=10)
+        ax1.set_ylabel('Memory (GB)', fontsize=10)
+        ax1.legend(loc='upper left')
+        ax1.grid(True, alpha=0.3)
+        
+        # Rotate x labels
+        if len(self.history_timestamps) > 10:
+            step = len(self.history_timestamps) // 10
+            ax1.set_xticks(range(0, len(self.history_timestamps), step))
+            ax1.set_xticklabels(self.history_timestamps[::step], rotation=45, ha='right')
+        else:
+            ax1.set_xticks(range(len(self.history_timestamps)))
+            ax1.set_xticklabels(self.history_timestamps, rotation=45, ha='right')
+        
+        # Add current stats
+        total_gb = memory.total / (1024**3)
+        used_gb = memory.used / (1024**3)
+        percent = memory.percent
+        ax1.text(0.02, 0.98, f'Total: {total_gb:.2f} GB\nUsed: {used_gb:.2f} GB ({percent:.1f}%)',
+                transform=ax1.transAxes, verticalalignment='top',
+                bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+                fontsize=9)
+        
+        # Plot 2: Top Processes Memory Usage
+        process_names = [p['name'][:20] for p in top_processes]  # Truncate names
+        process_memory = [p['memory'] for p in top_processes]
+        
+        colors = plt.cm.viridis(range(len(process_names)))
+        bars = ax2.barh(process_names, process_memory, color=colors)
+        
+        ax2.set_title(f'Top {top_n} Processes by Memory Usage', fontsize=14, fontweight='bold')
+        ax2.set_xlabel('Memory (GB)', fontsize=10)
+        ax2.set_ylabel('Process', fontsize=10)
+        ax2.grid(True, alpha=0.3, axis='x')
+        
+        # Add value labels on bars
+        for i, (bar, mem) in enumerate(zip(bars, process_memory)):
+            ax2.text(mem, bar.get_y() + bar.get_height()/2, 
+                    f' {mem:.3f} GB', 
+                    va='center', fontsize=8)
+        
+        # Invert y-axis so highest is on top
+        ax2.invert_yaxis()
+        
+        plt.tight_layout()
+        self.end_tick()
+    
+    def run_realtime_graph(self, top_n=10, update_interval=2000):
+        """Runs real-time graph visualization"""
+        try:
+            import matplotlib.pyplot as plt
+            import matplotlib.animation as animation
+        except ImportError:
+            print("Error: matplotlib is required for graph mode.")
+            print("Install it with: pip install matplotlib")
+            sys.exit(1)
+            
+        print("="*100)
+        print("MemInspector - Real-Time Memory Monitor")
+        print("="*100)
+        print(f"\nStarting real-time monitoring...")
+        print(f"Showing top {top_n} processes")
+        print(f"Update interval: {update_interval/1000:.1f} seconds")
+        print("\nClose the graph window to exit.\n")
+        
+        # Create figure with 2 subplots
+        fig = plt.figure(figsize=(14, 10))
+        ax1 = plt.subplot(2, 1, 1)
+        ax2 = plt.subplot(2, 1, 2)
+        
+        # Set style
+        plt.style.use('seaborn-v0_8-darkgrid')
+        
+        # Create animation
+        ani = animation.FuncAnimation(
+            fig, 
+            self.update_graph,
+            fargs=(fig, ax1, ax2, top_n),
+            interval=update_interval,
+            cache_frame_data=False
+        )
+        
+        plt.show()
+    
+    def create_headless_figure(self, top_n=10):
+        """Creates the reusable figure and artists for headless rendering"""
+        import matplotlib.pyplot as plt
+        
+        fig = plt.figure(figsize=(14, 10))
+        ax1 = fig.add_subplot(2, 1, 1)
+        ax2 = fig.add_subplot(2, 1, 2)
+        
+        # Plot 1: artists are created once and only their data changes per frame
+        used_line, = ax1.plot([], [], label='Used Memory', color='#e74c3c', linewidth=2)
+        avail_line, = ax1.plot([], [], label='Available Memory', color='#2ecc71', linewidth=2)
+        fill = ax1.fill_between([], [], alpha=0.3, color='#e74c3c')
+        ax1.set_title('System Memory Usage Over Time', fontsize=14, fontweight='bold')
+        ax1.set_xlabel('Time', fontsize=10)
+        ax1.set_ylabel('Memory (GB)', fontsize=10)
+        ax1.legend(loc='upper right')
+        ax1.grid(True, alpha=0.3)
+        stats_text = ax1.text(0.02, 0.98, '', transform=ax1.transAxes, verticalalignment='top',
+                              bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+                              fontsize=9)
+        
+        # Plot 2: a fixed pool of top_n bars, resized every frame
+        colors = plt.cm.viridis([i / max(top_n - 1, 1) for i in range(top_n)])
+        bars = ax2.barh(range(top_n), [0] * top_n, color=colors)
+        labels = [
+            ax2.text(0, bar.get_y() + bar.get_height()/2, '', va='center', fontsize=8)
+            for bar in bars
+        ]
+        ax2.set_yticks(range(top_n))
+        ax2.set_title(f'Top {top_n} Processes by Memory Usage', fontsize=14, fontweight='bold')
+        ax2.set_xlabel('Memory (GB)', fontsize=10)
+        ax2.set_ylabel('Process', fontsize=10)
+        ax2.grid(True, alpha=0.3, axis='x')
+        ax2.invert_yaxis()
+        
+        # Fixed margins: running tight_layout every frame would dominate render time
+        fig.subplots_adjust(left=0.14, right=0.97, top=0.95, bottom=0.07, hspace=0.35)
+        
+        return {
+            'fig': fig, 'ax1': ax1, 'ax2': ax2,
+            'used_line': used_line, 'avail_line': avail_line, 'fill': fill,
+            'stats_text': stats_text, 'bars': bars, 'labels': labels,
+        }
+    
+    def render_headless_frame(self, artists, memory, top_processes):
+        """Updates the reusable artists with the latest sample"""
+        ax1 = artists['ax1']
+        ax2 = artists['ax2']
+        x = range(len(self.history_memory_used))
+        
+        artists['used_line'].set_data(x, self.history_memory_used)
+        artists['avail_line'].set_data(x, self.history_memory_available)
+        # The fill polygon runs along the used line and back on the zero baseline
+        verts = [(0, 0)] + list(zip(x, self.history_memory_used)) + [(x[-1], 0)]
+        artists['fill'].set_verts([verts])
+        ax1.relim()
+        ax1.autoscale_view()
+        ax1.set_ylim(bottom=0)
+        
+        step = max(len(self.history_timestamps) // 10, 1)
+        ax1.set_xticks(range(0, len(self.history_timestamps), step))
+        ax1.set_xticklabels(self.history_timestamps[::step], rotation=45, ha='right')
+        
+        total_gb = memory.total / (1024**3)
+        used_gb = memory.used / (1024**3)
+        artists['stats_text'].set_text(
+            f'Total: {total_gb:.2f} GB\nUsed: {used_gb:.2f} GB ({memory.percent:.1f}%)'
+        )
+        
+        names = []
+        max_mem = 0
+        for idx, (bar, label) in enumerate(zip(artists['bars'], artists['labels'])):
+            if idx < len(top_processes):
+                mem = top_processes[idx]['memory']
+                names.append(top_processes[idx]['name'][:20])
+                label.set_text(f' {mem:.3f} GB')
+            else:
+                mem = 0
+                names.append('')
+                label.set_text('')
+            bar.set_width(mem)
+            label.set_x(mem)
+            max_mem = max(max_mem, mem)
+        ax2.set_yticklabels(names)
+        ax2.set_xlim(0, (max_mem or 1) * 1.15)
+    
+    def save_figure(self, fig, path, image_format='png'):
+        """Writes a figure atomically so readers never see a partial image"""
+        tmp_path = f"{path}.tmp"
+        if image_format == 'png':
+            # Fast zlib level: default compression costs more than drawing the frame
+            fig.savefig(tmp_path, format=image_format, pil_kwargs={'compress_level': 1})
+        else:
+            fig.savefig(tmp_path, format=image_format)
+        os.replace(tmp_path, path)
+    
+    def render_timeline_summary(self, path, image_format='png', top_n=10):
+        """Renders the whole recorded time range as a single summary image"""
+        import matplotlib.pyplot as plt
+        
+        if len(self.timeline_timestamps) < 2:
+            return False
+        
+        fig = plt.figure(figsize=(14, 10))
+        ax1 = fig.add_subplot(2, 1, 1)
+        ax2 = fig.add_subplot(2, 1, 2)
+        
+        ax1.plot(self.timeline_timestamps, self.timeline_memory_used,
+                 label='Used Memory', color='#e74c3c', linewidth=1.5)
+        ax1.plot(self.timeline_timestamps, self.timeline_memory_available,
+                 label='Available Memory', color='#2ecc71', linewidth=1.5)
+        ax1.fill_between(self.timeline_timestamps, self.timeline_memory_used,
+                         alpha=0.3, color='#e74c3c')
+        start = self.timeline_timestamps[0].strftime('%Y-%m-%d %H:%M:%S')
+        end = self.timeline_timestamps[-1].strftime('%Y-%m-%d %H:%M:%S')
+        ax1.set_title(f'System Memory Usage ({start} - {end})', fontsize=14, fontweight='bold')
+        ax1.set_xlabel('Time', fontsize=10)
+        ax1.set_ylabel('Memory (GB)', fontsize=10)
+        ax1.legend(loc='upper left')
+        ax1.grid(True, alpha=0.3)
+        peak_used = max(self.timeline_memory_used)
+        ax1.text(0.02, 0.98,
+                 f'Samples: {len(self.timeline_timestamps)}\nPeak used: {peak_used:.2f} GB',
+                 transform=ax1.transAxes, verticalalignment='top',
+                 bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+                 fontsize=9)
+        fig.autofmt_xdate()
+        
+        peaks = sorted(self.timeline_peaks.items(), key=lambda x: x[1], reverse=True)[:top_n]
+        process_names = [name[:20] for name, _ in peaks]
+        process_memory = [mem for _, mem in peaks]
+        colors = plt.cm.viridis([i / max(len(peaks) - 1, 1) for i in range(len(peaks))])
+        bars = ax2.barh(range(len(peaks)), process_memory, color=colors)
+        ax2.set_yticks(range(len(peaks)))
+        ax2.set_yticklabels(process_names)
+        for bar, mem in zip(bars, process_memory):
+            ax2.text(mem, bar.get_y() + bar.get_height()/2,
+                     f' {mem:.3f} GB', va='center', fontsize=8)
+        ax2.set_title(f'Top {top_n} Processes by Peak Memory Usage', fontsize=14, fontweight='bold')
+        ax2.set_xlabel('Peak Memory (GB)', fontsize=10)
+        ax2.set_ylabel('Process', fontsize=10)
+        ax2.grid(True, alpha=0.3, axis='x')
+        ax2.invert_yaxis()
+        
+        fig.tight_layout()
+        self.save_figure(fig, path, image_format)
+        plt.close(fig)
+        return True
+    
+    def run_headless_graph(self, top_n=10, interval=2.0, output_dir='.',
+                           image_format='png', frames=0, keep_frames=False,
+                           summary_path=None):
+        """Renders graph mode to image files without a display (Agg backend)"""
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("Error: matplotlib is required for graph mode.")
+            print("Install it with: pip install matplotlib")
+            sys.exit(1)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        self.record_timeline = summary_path is not None
+        
+        print("="*100)
+        print("MemInspector - Headless Graph Renderer")
+        print("="*100)
+        print(f"\nWriting {image_format.upper()} dashboards to: {os.path.abspath(output_dir)}")
+        print(f"Showing top {top_n} processes")
+        print(f"Update interval: {interval:.1f} seconds")
+        if summary_path:
+            print(f"Timeline summary: {summary_path}")
+        print("\nPress Ctrl+C to exit.\n")
+        
+        plt.style.use('seaborn-v0_8-darkgrid')
+        artists = self.create_headless_figure(top_n)
+        latest_path = os.path.join(output_dir, f"meminspector-dashboard.{image_format}")
+        
+        rendered = 0
+        try:
+            while frames <= 0 or rendered < frames:
+                started = time.perf_counter()
+                memory, top_processes = self.sample_graph_data(top_n)
+                self.render_headless_frame(artists, memory, top_processes)
+                
+                self.save_figure(artists['fig'], latest_path, image_format)
+                if keep_frames:
+                    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+                    frame_path = os.path.join(output_dir, f"meminspector-{stamp}-{rendered + 1:05d}.{image_format}")
+                    shutil.copyfile(latest_path, frame_path)
+                
+                self.end_tick()
+                rendered += 1
+                elapsed = time.perf_counter() - started
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] Frame #{rendered} "
+                      f"written in {elapsed * 1000:.0f} ms")
+                
+                if frames <= 0 or rendered < frames:
+                    time.sleep(max(interval - elapsed, 0))
+        except KeyboardInterrupt:
+            print("\n\nHeadless rendering stopped by user.")
+        finally:
+            plt.close(artists['fig'])
+            if summary_path:
+                summary_format = os.path.splitext(summary_path)[1].lstrip('.').lower() or image_format
+                if self.render_timeline_summary(summary_path, summary_format, top_n):
+                    print(f"Timeline summary written to {summary_path}")
+                else:
+                    print("Not enough samples recorded for a timeline summary.")
+    
+    def run_refresh_mode(self, top_n=20, interval=3):
+        """Runs continuous refresh mode in terminal"""
+        print("="*100)
+        print("MemInspector - Continuous Refresh Mode")
+        print("="*100)
+        print(f"\nRefresh interval: {interval} seconds")
+        print(f"Showing top {top_n} processes")
+        print("\nPress Ctrl+C to exit.\n")
+        
+        try:
+            iteration = 0
+            while True:
+                iteration += 1
+                
+                # Clear screen (works on Unix-like systems)
+                print("\033[2J\033[H", end="")
+                
+                # Show iteration info
+                print("="*100)
+                print(f"MemInspector - Continuous Refresh Mode (Update #{iteration})")
+                print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                print("="*100)
+                
+                # Display system summary
+                with self.stage('write'):
+                    self.display_system_summary()
+                
+                # Collect (sorted by memory usage) and display processes
+                self.processes = self.collect_all_processes(shared=True)
+                
+                if self.alert_engine is not None:
+                    with self.stage('aggregate'):
+                        # Rates are sampled only for rules that use them
+                        processes = [pinfo for pinfo in self.processes if pinfo.get('memory_info')]
+                        rates = self.rate_tracker.sample(processes) if self.alert_engine.needs_rates else None
+                        self.evaluate_alerts(processes, rates)
+                
+                with self.stage('write'):
+                    self.record_pressure_snapshot(self.processes)
+                    
+                    # Display top processes
+                    self.display_top_processes(top_n=top_n)
+                
+                if self.mappings_top:
+                    with self.stage('aggregate'):
+                        self.display_mappings(top_n=self.mappings_top)
+                
+                with self.stage('write'):
+                    self.display_short_lived(self.collect_short_lived())
+                    self.display_collectors()
+                    
+                    print(f"\n{'='*100}")
+                    if self.pressure_monitor is not None:
+                        print(self.pressure_status())
+                    if self.alert_engine is not None:
+                        self.display_alerts()
+                    if self.profiler is not None:
+                        print(self.profiler.overhead_line())
+                    print(f"Next update in {interval} seconds... (Press Ctrl+C to exit)")
+                    print(f"{'='*100}")
+                self.end_tick()
+                
+                # Wait for next refresh
+                self.wait_for_next_tick(interval)
+                
+        except KeyboardInterrupt:
+            print("\n\nRefresh mode stopped by user.")
+        finally:
+            self.stop_pressure_capture()
+            self.shutdown_worker_pool()
+            self.stop_process_events()
+    
+    def enable_pressure_sampling(self, threshold_ms=100, burst_interval=0.25,
+                                 burst_duration=10.0, ring_size=20, capture_dir='.'):
+        """Switches refresh loops to PSI-driven sampling; returns False on fallback.
+        
+        Without PSI no monitor is kept (pressure_error says why), so the
+        fallback does not build ring snapshots every tick.
+        """
+        self.pressure_ring = deque(maxlen=ring_size)
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.capture_dir = capture_dir
+        monitor = PressureMonitor(threshold_ms=threshold_ms)
+        if not monitor.available:
+            self.pressure_error = monitor.error
+            return False
+        self.pressure_monitor = monitor
+        return True
+    
+    def record_pressure_snapshot(self, processes):
+        """Stores a full snapshot in the pre-trigger ring or the active capture"""
+        if self.pressure_monitor is None and self.pressure_capture is None:
+            return
+        records = list(self.iter_snapshot_records(processes))
+        if self.pressure_capture is not None:
+            self.pressure_capture.write_records(records)
+        else:
+            self.pressure_ring.append(records)
+    
+    def start_pressure_capture(self, prefix='psi', capture_dir=None, interval=None):
+        """Opens a capture file and flushes the pre-trigger ring buffer into it.
+        
+        capture_dir and interval apply to this capture only (default: the
+        PSI settings).
+        """
+        capture_dir = capture_dir or self.capture_dir
+        self.capture_interval = interval or self.burst_interval
+        os.makedirs(capture_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.last_capture_path = os.path.join(capture_dir, f"meminspector-{prefix}-{stamp}.ndjson")
+        self.pressure_capture_file = open(self.last_capture_path, 'a')
+        self.pressure_capture = SnapshotWriter(self.pressure_capture_file, 'ndjson')
+        for records in self.pressure_ring:
+            self.pressure_capture.write_records(records)
+        self.pressure_ring.clear()
+    
+    def stop_pressure_capture(self):
+        """Closes the capture file once the burst is over"""
+        if self.pressure_capture is not None:
+            self.pressure_capture_file.close()
+            self.pressure_capture = None
+            self.pressure_capture_file = None
+            self.capture_interval = None
+    
+    def in_pressure_burst(self):
+        return self.pressure_capture is not None
+    
+    def wait_for_next_tick(self, interval):
+        """Waits for the next sample: interval normally, faster during a PSI or alert burst"""
+        if self.pressure_monitor is None:
+            if self.in_pressure_burst():
+                # Snapshot capture started by an alert rule
+                time.sleep(self.capture_interval)
+                if time.monotonic() >= self.burst_until:
+                    self.stop_pressure_capture()
+            else:
+                time.sleep(interval)
+            return
+        
+        in_burst = self.in_pressure_burst()
+        if self.pressure_monitor.wait(self.capture_interval if in_burst else interval):
+            if not in_burst:
+                self.start_pressure_capture()
+            # Sustained pressure keeps extending the burst
+            self.burst_until = time.monotonic() + self.burst_duration
+        elif in_burst and time.monotonic() >= self.burst_until:
+            self.stop_pressure_capture()
+    
+    def pressure_status(self):
+        """Short human-readable PSI sampling status"""
+        if self.pressure_monitor is None:
+            return None
+        if self.in_pressure_burst():
+            return f"PSI BURST -> {os.path.basename(self.last_capture_path)}"
+        return f"PSI armed ({self.pressure_monitor.events} events)"
+    
+    def enable_alerts(self, path):
+        """Loads alert rules from a JSON file (raises ValueError on invalid rules)"""
+        self.alert_engine = AlertEngine.from_file(path, snapshot_callback=self.start_alert_capture)
+    
+    def start_alert_capture(self, action, rule):
+        """Snapshot action: samples at the action's interval into a capture file for a while"""
+        duration = float(action.get('duration', 10))
+        if not self.in_pressure_burst():
+            interval = float(action['interval']) if 'interval' in action else None
+            self.start_pressure_capture(prefix='alert-' + re.sub(r'[^\w.-]+', '_', rule.name),
+                                        capture_dir=action.get('dir'), interval=interval)
+        self.burst_until = max(self.burst_until, time.monotonic() + duration)
+    
+    def evaluate_alerts(self, processes, rates):
+        """Feeds the current processes, containers and system memory to the alert engine.
+        
+        ``rates`` are the rate tracker rows of ``processes``; they may be None
+        when no rule uses a rate metric.
+        """
+        engine = self.alert_engine
+        observations = {}
+        records = {}
+        
+        metrics = engine.metrics('process')
+        if metrics:
+            keys = [(pinfo['pid'], pinfo.get('create_time')) for pinfo in processes]
+            records['process'] = dict(zip(keys, processes))
+            tracker = self.rate_tracker
+            columns = {
+                'rss': lambda: [process_rss(pinfo) for pinfo in processes],
+                'rss_slope': lambda: rates[:, tracker.RSS] * 60,
+                'faults': lambda: rates[:, tracker.MINFLT] + rates[:, tracker.MAJFLT],
+                'major_faults': lambda: rates[:, tracker.MAJFLT],
+                'swapin': lambda: rates[:, tracker.SWAP],
+                'memory_percent': lambda: [pinfo.get('memory_percent') or 0.0 for pinfo in processes],
+            }
+            for metric in metrics:
+                column = columns[metric]()
+                values = column.tolist() if hasattr(column, 'tolist') else column
+                observations[('process', metric)] = dict(zip(keys, values))
+        
+        metrics = engine.metrics('container')
+        if metrics:
+            containers = {c['full_id']: dict(c, rss=c['memory_usage']) for c in self.get_docker_containers()}
+            records['container'] = containers
+            if 'rss' in metrics:
+                observations[('container', 'rss')] = {cid: c['rss'] for cid, c in containers.items()}
+            if 'memory_limit_percent' in metrics:
+                observations[('container', 'memory_limit_percent')] = {
+                    cid: c['memory_percent'] for cid, c in containers.items()}
+        
+        metrics = engine.metrics('system')
+        if metrics:
+            memory = self.scheduler.get('virtual_memory')
+            system = {'memory_percent': memory.percent, 'available': memory.available}
+            if 'swap_percent' in metrics:
+                system['swap_percent'] = self.scheduler.get('swap_memory').percent
+            records['system'] = {'system': {'name': 'system'}}
+            for metric in metrics:
+                observations[('system', metric)] = {'system': system[metric]}
+        
+        engine.evaluate(observations, records)
+    
+    def display_alerts(self):
+        """Displays rule status and the latest firing alerts in refresh mode"""
+        engine = self.alert_engine
+        print(f"\n{engine.status()} ({engine.fired} fired since start)")
+        for when, name, label, value in list(engine.recent)[-5:]:
+            print(f"  {when.strftime('%H:%M:%S')} {name}: {label} = {value}")
+    
+    def take_process_snapshot(self):
+        """Collects all processes sorted by memory usage, without progress output"""
+        with self.stage('collect'):
+            # Shared with the rest of the update (already sorted); must not be modified
+            return self.scheduler.get('process_rows')
+    
+    def iter_snapshot_records(self, processes, ts=None):
+        """Yields one record per process, ordered like SNAPSHOT_FIELDS"""
+        ts = round(ts if ts is not None else time.time(), 3)
+        # memory_percent is derived from RSS here instead of asking psutil per process
+        scale = 100.0 / self.scheduler.get('virtual_memory').total
+        for pinfo in processes:
+            mem_info = pinfo['memory_info']
+            if mem_info is None:
+                continue  # Access denied
+            yield (
+                ts, pinfo['pid'], pinfo['name'], pinfo.get('username'),
+                mem_info.rss, mem_info.vms, mem_info.rss * scale,
+                pinfo.get('num_threads') or 0, pinfo.get('status')
+            )
+    
+    def run_stream_mode(self, output_format='ndjson', top_n=None, interval=None):
+        """Streams snapshots as NDJSON/CSV records (once, or every interval)"""
+        writer = SnapshotWriter(sys.stdout, output_format)
+        try:
+            while True:
+                started = time.monotonic()
+                processes = self.take_process_snapshot()
+                self.record_pressure_snapshot(processes)
+                if top_n is not None:
+                    processes = processes[:top_n]
+                with self.stage('write'):
+                    writer.write_records(self.iter_snapshot_records(processes))
+                self.end_tick()
+                
+                if interval is None:
+                    break
+                if self.pressure_monitor is not None:
+                    self.wait_for_next_tick(interval)
+                else:
+                    time.sleep(max(interval - (time.monotonic() - started), 0))
+        except KeyboardInterrupt:
+            pass
+    
+    def group_label(self, tag):
+        """Snapshot label of a cgroup tag: 'container:<name>' or 'unit:<name>'"""
+        if tag is None:
+            return None
+        if tag[0] == 'container':
+            return f"container:{self.container_display_name(tag[1])}"
+        return f"unit:{tag[1]}"
+    
+    def take_diff_snapshot(self):
+        """Collects snapshot records for diffing, keyed by (pid, create_time)"""
+        if self.docker_client:
+            self.get_docker_containers()  # Container names for group labels
+        ts = round(time.time(), 3)
+        total = self.scheduler.get('virtual_memory').total
+        records = []
+        for pinfo in self.iter_process_info(['pid', 'name', 'username', 'memory_info', 'create_time']):
+            mem_info = pinfo['memory_info']
+            if not mem_info:
+                continue
+            create_time = pinfo['create_time']
+            records.append({
+                'ts': ts,
+                'pid': pinfo['pid'],
+                'create_time': round(create_time, 2) if create_time else None,
+                'name': pinfo['name'],
+                'username': pinfo['username'],
+                'rss': mem_info.rss,
+                'vms': mem_info.vms,
+                'memory_percent': round(mem_info.rss * 100.0 / total, 3),
+                'group': self.group_label(self.cgroup_resolver.resolve(pinfo['pid'], create_time)),
+            })
+        return records
+    
+    def save_snapshot(self, path, interval=None):
+        """Appends a snapshot to an NDJSON file (once, or every interval)"""
+        try:
+            while True:
+                started = time.monotonic()
+                records = self.take_diff_snapshot()
+                with open(path, 'a') as f:
+                    f.write(''.join(json.dumps(record, separators=(',', ':')) + '\n'
+                                    for record in records))
+                print(f"Saved {len(records)} processes to {path} "
+                      f"at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", file=sys.stderr)
+                
+                if interval is None:
+                    break
+                time.sleep(max(interval - (time.monotonic() - started), 0))
+        except KeyboardInterrupt:
+            pass
+    
+    def run_diff(self, specs, output_format='text', top_n=None):
+        """Diffs a saved snapshot against another one, or against the live system"""
+        path, at = parse_snapshot_selector(specs[0])
+        before = load_snapshot(path, at)
+        if len(specs) > 1:
+            path, at = parse_snapshot_selector(specs[1])
+            after = load_snapshot(path, at)
+        else:
+            after = self.take_diff_snapshot()
+        
+        if self.process_filter is not None:
+            if self.process_filter.uses('mem'):
+                # Older --save-snapshot files carry no percentage to filter on
+                for spec, records in zip(specs, (before, after)):
+                    if any('memory_percent' not in r for r in records):
+                        raise ValueError(f"{spec} has no memory_percent, so 'mem' cannot be "
+                                         f"filtered on; filter on rss instead")
+            before = [r for r in before if self.process_filter.match_record(r)]
+            after = [r for r in after if self.process_filter.match_record(r)]
         
-        # Ordena por uso de memória (RSS)
-        self.processes.sort(
-            key=lambda x: x['memory_info'].rss if x['memory_info'] else 0,
-            reverse=True
-        )
+        result = diff_snapshots(before, after)
+        if output_format == 'text':
+            self.display_snapshot_diff(result, top_n=top_n)
+        else:
+            self.write_snapshot_diff(result, output_format, top_n=top_n)
     
-    def display_top_processes(self, top_n=None):
-        """Displays processes that consume the most memory"""
-        processes_to_show = self.processes if top_n is None else self.processes[:top_n]
-        count = len(processes_to_show)
+    def format_delta(self, delta):
+        """Formats a signed byte delta"""
+        sign = "+" if delta > 0 else "-" if delta < 0 else ""
+        return f"{sign}{self.format_bytes(abs(delta))}"
+    
+    def display_snapshot_diff(self, result, top_n=None):
+        """Displays per-group and per-process deltas between two snapshots"""
+        def when(ts):
+            return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S') if ts else 'N/A'
+        
+        processes = result['processes']
+        counts = defaultdict(int)
+        for row in processes:
+            counts[row[5]] += 1
         
         print(f"\n{'='*100}")
-        print(f"ALL PROCESSES BY MEMORY USAGE ({count} processes)")
+        print(f"SNAPSHOT DIFF: {when(result['before_ts'])} -> {when(result['after_ts'])}")
         print(f"{'='*100}\n")
         
-        print(f"{'#':<4} {'PID':<8} {'Name':<30} {'Memory RSS':<15} {'% Mem':<8} {'Threads':<8} {'Status':<12}")
-        print(f"{'-'*100}")
+        print(f"Total RSS:         {self.format_bytes(result['before_total'])} -> "
+              f"{self.format_bytes(result['after_total'])} "
+              f"({self.format_delta(result['after_total'] - result['before_total'])})")
+        print(f"Processes:         {result['before_count']} -> {result['after_count']} "
+              f"({counts['appeared']} appeared, {counts['disappeared']} disappeared, "
+              f"{counts['restarted']} restarted)")
         
-        for idx, proc in enumerate(processes_to_show, 1):
-            pid = str(proc.get('pid', 'N/A'))
-            name = str(proc.get('name', 'N/A'))[:29]
-            mem_info = proc.get('memory_info')
-            rss = self.format_bytes(mem_info.rss) if mem_info else 'N/A'
-            mem_pct = proc.get('memory_percent')
-            mem_percent = f"{mem_pct:.2f}%" if mem_pct is not None else "0.00%"
-            num_threads = str(proc.get('num_threads', 0) or 0)
-            status = str(proc.get('status') or 'N/A')
+        groups = largest_changes(result['groups'], top_n)
+        if groups:
+            print(f"\n{'='*100}")
+            print("CONTAINERS AND SERVICES")
+            print(f"{'='*100}\n")
+            print(f"{'#':<4} {'Kind':<10} {'Name':<36} {'Before':<15} {'After':<15} {'Delta':<15}")
+            print(f"{'-'*100}")
+            for idx, (_, name, kind, old_rss, new_rss, _) in enumerate(groups, 1):
+                print(f"{idx:<4} {kind:<10} {name[:35]:<36} {self.format_bytes(old_rss):<15} "
+                      f"{self.format_bytes(new_rss):<15} {self.format_delta(new_rss - old_rss):<15}")
+        
+        sections = (
+            ("PROCESSES BY MEMORY CHANGE", ('grew', 'shrank', 'restarted')),
+            ("APPEARED PROCESSES", ('appeared',)),
+            ("DISAPPEARED PROCESSES", ('disappeared',)),
+        )
+        for title, changes in sections:
+            rows = largest_changes(processes, top_n, changes)
+            if not rows:
+                continue
+            print(f"\n{'='*100}")
+            print(f"{title} ({sum(counts[c] for c in changes)} processes)")
+            print(f"{'='*100}\n")
+            print(f"{'#':<4} {'PID':<8} {'Name':<25} {'Container/Unit':<20} {'Before':<12} "
+                  f"{'After':<12} {'Delta':<12} {'Change':<10}")
+            print(f"{'-'*100}")
             
-            print(f"{idx:<4} {pid:<8} {name:<30} {rss:<15} {mem_percent:<8} {num_threads:<8} {status:<12}")
+            lines = []
+            for idx, (pid, name, group, old_rss, new_rss, change) in enumerate(rows, 1):
+                group = (group or '-').partition(':')[2] or '-'
+                lines.append(
+                    f"{idx:<4} {pid:<8} {str(name)[:24]:<25} {group[:19]:<20} "
+                    f"{self.format_bytes(old_rss):<12} {self.format_bytes(new_rss):<12} "
+                    f"{self.format_delta(new_rss - old_rss):<12} {change:<10}\n"
+                )
+            sys.stdout.write(''.join(lines))
+        sys.stdout.flush()
     
-    def analyze_threads(self, top_n=5):
-        """Analyzes threads from processes that consume the most memory"""
-        print(f"\n{'='*100}")
-        print(f"THREAD ANALYSIS OF TOP {top_n} PROCESSES")
-        print(f"{'='*100}\n")
-        
-        processes_to_analyze = self.processes[:top_n]
+    def write_snapshot_diff(self, result, output_format, top_n=None):
+        """Writes diff rows as NDJSON or CSV (unchanged processes are omitted)"""
+        rows = [('process',) + row for row in largest_changes(
+            result['processes'], top_n, ('grew', 'shrank', 'restarted', 'appeared', 'disappeared'))]
+        rows += [(row[2], None, row[1], None) + row[3:] for row in largest_changes(result['groups'])]
         
-        for proc_info in tqdm(processes_to_analyze, desc="Analyzing threads", unit="proc"):
-            try:
-                proc = psutil.Process(proc_info['pid'])
-                threads = self.get_thread_info(proc)
-                
-                print(f"\nProcess: {proc_info['name']} (PID: {proc_info['pid']})")
-                print(f"   Memory RSS: {self.format_bytes(proc_info['memory_info'].rss)}")
-                print(f"   Total Threads: {len(threads)}")
-                
-                if threads:
-                    # Sort threads by CPU time (user_time + system_time)
-                    threads_sorted = sorted(
-                        threads,
-                        key=lambda t: t['user_time'] + t['system_time'],
-                        reverse=True
-                    )
-                    
-                    print(f"\n   {'Thread ID':<15} {'User Time':<15} {'System Time':<15} {'Total Time':<15}")
-                    print(f"   {'-'*60}")
-                    
-                    for thread in threads_sorted[:5]:  # Top 5 threads
-                        total_time = thread['user_time'] + thread['system_time']
-                        print(f"   {thread['id']:<15} {thread['user_time']:<15.2f} {thread['system_time']:<15.2f} {total_time:<15.2f}")
-                
-                time.sleep(0.001)
-                
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                print(f"   Unable to access process information")
+        if output_format == 'csv':
+            writer = csv.writer(sys.stdout, lineterminator='\n')
+            writer.writerow(DIFF_FIELDS)
+            writer.writerows(
+                (kind, '' if pid is None else pid, name, group or '', old_rss, new_rss,
+                 new_rss - old_rss, change)
+                for kind, pid, name, group, old_rss, new_rss, change in rows
+            )
+        else:
+            out = []
+            for kind, pid, name, group, old_rss, new_rss, change in rows:
+                out.append(json.dumps(dict(zip(DIFF_FIELDS, (
+                    kind, pid, name, group, old_rss, new_rss, new_rss - old_rss, change
+                ))), separators=(',', ':')) + '\n')
+            sys.stdout.write(''.join(out))
+        sys.stdout.flush()
     
-    def display_system_summary(self):
-        """Displays system summary"""
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-        
-        print(f"\n{'='*100}")
-        print("SYSTEM SUMMARY")
-        print(f"{'='*100}\n")
+    def build_fleet_snapshot(self):
+        """Collects system memory, process rows and container rows for agents.
         
-        print(f"Total Memory:      {self.format_bytes(memory.total)}")
-        print(f"Available Memory:  {self.format_bytes(memory.available)}")
-        print(f"Used Memory:       {self.format_bytes(memory.used)} ({memory.percent}%)")
-        print(f"Free Memory:       {self.format_bytes(memory.free)}")
+        Process rows are keyed by "pid:create_time" so PID reuse shows up as a
+        new process, and hold [pid, name, username, rss]. Container rows are
+        keyed by container ID and hold [name, image, memory_usage, memory_limit].
+        """
+        memory = self.scheduler.get('virtual_memory')
+        system = {
+            'total': memory.total,
+            'used': memory.used,
+            'available': memory.available,
+            'percent': memory.percent,
+        }
         
-        print(f"\nTotal Swap:        {self.format_bytes(swap.total)}")
-        print(f"Used Swap:         {self.format_bytes(swap.used)} ({swap.percent}%)")
-        print(f"Free Swap:         {self.format_bytes(swap.free)}")
+        processes = {}
+        for pinfo in self.scheduler.get('process_rows'):
+            key = f"{pinfo['pid']}:{pinfo['create_time'] or 0:.2f}"
+            processes[key] = [pinfo['pid'], pinfo['name'], pinfo['username'], pinfo['memory_info'].rss]
         
-        print(f"\nTotal Processes:   {len(self.processes)}")
+        containers = {}
+        for container in self.get_docker_containers():
+            containers[container['id']] = [
+                container['name'], container['image'],
+                container['memory_usage'], container['memory_limit']
+            ]
         
-        # Docker summary
-        if self.docker_client:
-            containers = self.get_docker_containers()
-            if containers:
-                print(f"\n{'='*100}")
-                print(f"DOCKER CONTAINERS ({len(containers)} running)")
-                print(f"{'='*100}\n")
-                print(f"{'#':<4} {'Name':<30} {'Image':<35} {'Memory':<15} {'%':<8}")
-                print(f"{'-'*100}")
-                
-                for idx, container in enumerate(containers, 1):
-                    mem_usage = self.format_bytes(container['memory_usage'])
-                    mem_percent = f"{container['memory_percent']:.1f}%"
-                    print(
-                        f"{idx:<4} "
-                        f"{container['name'][:29]:<30} "
-                        f"{container['image'][:34]:<35} "
-                        f"{mem_usage:<15} "
-                        f"{mem_percent:<8}"
-                    )
+        return system, processes, containers
     
-    def run(self, top_processes=None, analyze_threads_count=5):
-        """Executes the complete analysis"""
+    def run_agent(self, address, interval=2.0, name=None):
+        """Serves snapshots to fleet aggregators over TCP or a Unix socket"""
+        import asyncio
+        name = name or socket.gethostname()
         print("="*100)
-        print("MemInspector - Memory Inspector for macOS")
+        print("MemInspector - Fleet Agent")
         print("="*100)
+        print(f"\nAgent name: {name}")
+        print(f"Listening on: {address}")
+        print(f"Snapshot interval: {interval} seconds")
+        print("\nPress Ctrl+C to exit.\n")
         
-        # System summary
-        self.display_system_summary()
+        try:
+            asyncio.run(self._agent_main(address, interval, name))
+        except KeyboardInterrupt:
+            print("\n\nAgent stopped by user.")
+    
+    async def _agent_main(self, address, interval, name):
+        """Agent event loop: one sampler, deltas broadcast to every client"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        clients = set()
+        state = {'ts': None, 'system': None, 'processes': {}, 'containers': {}}
         
-        # Collect processes
-        self.collect_processes()
+        def full_message():
+            return encode_message({
+                'type': 'full', 'host': name, 'ts': state['ts'], 'interval': interval,
+                'system': state['system'], 'processes': state['processes'],
+                'containers': state['containers'],
+            })
         
-        # Display all processes
-        self.display_top_processes(top_n=top_processes)
+        async def handle_client(reader, writer):
+            # New clients get the latest full snapshot, then the shared deltas
+            if state['ts'] is not None:
+                writer.write(full_message())
+            clients.add(writer)
+            try:
+                await reader.read()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                clients.discard(writer)
+                writer.close()
         
-        # Analyze threads
-        self.analyze_threads(top_n=analyze_threads_count)
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            if os.path.exists(target):
+                os.unlink(target)
+            # The socket is created owner-only; a chmod afterwards would leave a window
+            old_umask = os.umask(0o177)
+            try:
+                server = await asyncio.start_unix_server(handle_client, path=target)
+            finally:
+                os.umask(old_umask)
+        else:
+            server = await asyncio.start_server(handle_client, target[0], target[1])
         
-        print(f"\n{'='*100}")
-        print("Analysis completed!")
-        print(f"{'='*100}\n")
+        try:
+            while True:
+                started = loop.time()
+                system, processes, containers = await loop.run_in_executor(
+                    None, self.build_fleet_snapshot
+                )
+                self.end_tick()
+                
+                if state['ts'] is None:
+                    state.update(ts=time.time(), system=system,
+                                 processes=processes, containers=containers)
+                    message = full_message()
+                else:
+                    message = encode_message({
+                        'type': 'delta', 'ts': time.time(), 'system': system,
+                        'processes': diff_rows(state['processes'], processes),
+                        'containers': diff_rows(state['containers'], containers),
+                    })
+                    state.update(ts=time.time(), system=system,
+                                 processes=processes, containers=containers)
+                
+                for writer in list(clients):
+                    if writer.transport.get_write_buffer_size() > FLEET_MAX_CLIENT_BACKLOG:
+                        # Too slow to keep up; it will reconnect and resync
+                        clients.discard(writer)
+                        writer.close()
+                        continue
+                    writer.write(message)
+                
+                await asyncio.sleep(max(interval - (loop.time() - started), 0))
+        finally:
+            server.close()
+            if kind == 'unix' and os.path.exists(target):
+                os.unlink(target)
     
-    def update_graph(self, frame, fig, ax1, ax2, top_n=10, max_points=60):
-        """Updates the real-time graph"""
-        # Clear axes
-        ax1.clear()
-        ax2.clear()
+    def apply_fleet_message(self, host_state, message):
+        """Applies a full snapshot or delta message to an aggregator host state"""
+        if message.get('type') == 'full':
+            host_state['name'] = message.get('host') or host_state['address']
+            host_state['processes'] = message.get('processes') or {}
+            host_state['containers'] = message.get('containers') or {}
+            host_state['synced'] = True
+        elif message.get('type') == 'delta' and host_state['synced']:
+            apply_rows_delta(host_state['processes'], message.get('processes', {}))
+            apply_rows_delta(host_state['containers'], message.get('containers', {}))
+        else:
+            return
+        host_state['system'] = message.get('system')
+        host_state['last_update'] = time.time()
+    
+    async def _fleet_agent_reader(self, host_state):
+        """Keeps a connection to one agent open, reconnecting with backoff"""
+        import asyncio
+        backoff = 1
+        kind, target = parse_address(host_state['address'])
+        while not self.stop_tui:
+            try:
+                if kind == 'unix':
+                    reader, writer = await asyncio.open_unix_connection(target, limit=FLEET_LINE_LIMIT)
+                else:
+                    reader, writer = await asyncio.open_connection(target[0], target[1],
+                                                                   limit=FLEET_LINE_LIMIT)
+            except OSError as e:
+                host_state['error'] = e.strerror or str(e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            
+            backoff = 1
+            host_state.update(connected=True, synced=False, error=None)
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        host_state['error'] = "Connection closed by agent"
+                        break
+                    self.apply_fleet_message(host_state, json.loads(line))
+            except (OSError, ValueError) as e:
+                host_state['error'] = str(e)
+            finally:
+                host_state['connected'] = False
+                writer.close()
+            await asyncio.sleep(backoff)
+    
+    def run_fleet_tui(self, addresses, top_n=20, interval=2.0):
+        """Runs the fleet aggregator TUI over many agents"""
+        import asyncio
+        self.get_console().print("\n[bold cyan]MemInspector - Fleet View[/bold cyan]")
+        self.console.print(f"[dim]Connecting to {len(addresses)} agents | "
+                           f"Press 'q' or 'ESC' to exit | Ctrl+C to force quit[/dim]\n")
         
-        # Collect current data
-        memory = psutil.virtual_memory()
+        old_settings = None
+        if sys.stdin.isatty():
+            old_settings = termios.tcgetattr(sys.stdin)
+        input_queue = queue.Queue()
+        self.start_keyboard_listener(input_queue, old_settings)
         
-        # Update history
-        current_time = datetime.now().strftime('%H:%M:%S')
-        self.history_timestamps.append(current_time)
-        self.history_memory_used.append(memory.used / (1024**3))  # Convert to GB
-        self.history_memory_available.append(memory.available / (1024**3))
+        try:
+            asyncio.run(self._fleet_main(addresses, top_n, interval, input_queue))
+            self.console.print("\n[green]Application closed.[/green]")
+        except KeyboardInterrupt:
+            self.stop_tui = True
+            self.console.print("\n[yellow]Monitoring stopped by user.[/yellow]")
+        finally:
+            if old_settings and sys.stdin.isatty():
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+    
+    async def _fleet_main(self, addresses, top_n, interval, input_queue):
+        """Aggregator event loop: one reader task per agent plus the renderer"""
+        import asyncio
+        from rich.live import Live
+        hosts = [{
+            'address': address, 'name': address, 'connected': False, 'synced': False,
+            'error': None, 'system': None, 'processes': {}, 'containers': {},
+            'last_update': None,
+        } for address in addresses]
+        readers = [asyncio.ensure_future(self._fleet_agent_reader(host)) for host in hosts]
         
-        # Keep only last max_points
-        if len(self.history_timestamps) > max_points:
-            self.history_timestamps = self.history_timestamps[-max_points:]
-            self.history_memory_used = self.history_memory_used[-max_points:]
-            self.history_memory_available = self.history_memory_available[-max_points:]
+        try:
+            with Live(self.create_fleet_layout(hosts, top_n), refresh_per_second=1,
+                      console=self.console) as live:
+                next_render = 0
+                while not self.stop_tui:
+                    try:
+                        if input_queue.get_nowait() == 'quit':
+                            self.stop_tui = True
+                            break
+                    except queue.Empty:
+                        pass
+                    
+                    now = time.monotonic()
+                    if now >= next_render:
+                        live.update(self.create_fleet_layout(hosts, top_n))
+                        next_render = now + interval
+                    await asyncio.sleep(0.1)
+        finally:
+            self.stop_tui = True
+            for task in readers:
+                task.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+    
+    def iter_fleet_processes(self, hosts):
+        """Yields (rss, host, row) for every process of every synced host"""
+        for host in hosts:
+            for row in host['processes'].values():
+                if self.process_filter is not None and not self.process_filter.match_record(
+                        {'pid': row[0], 'name': row[1], 'username': row[2], 'rss': row[3]}):
+                    continue
+                yield row[3], host, row
+    
+    def create_fleet_layout(self, hosts, top_n):
+        """Creates the layout for the fleet aggregator TUI"""
+        from rich import box
+        from rich.layout import Layout
+        from rich.panel import Panel
+        from rich.table import Table
+        from rich.text import Text
+        layout = Layout()
+        layout.split_column(
+            Layout(name="header", size=3),
+            Layout(name="hosts", size=len(hosts) + 5),
+            Layout(name="body"),
+        )
+        layout["body"].split_row(
+            Layout(name="processes", ratio=3),
+            Layout(name="containers", ratio=2),
+        )
         
-        # Get top processes
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-            try:
-                pinfo = proc.info
-                if pinfo['memory_info']:
-                    processes.append({
-                        'name': pinfo['name'],
-                        'memory': pinfo['memory_info'].rss / (1024**3)  # GB
-                    })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        connected = sum(1 for host in hosts if host['connected'])
+        total_processes = sum(len(host['processes']) for host in hosts)
+        header_text = Text()
+        header_text.append("MemInspector Fleet", style="bold cyan")
+        header_text.append(" | ", style="dim")
+        header_text.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), style="bold white")
+        header_text.append(" | ", style="dim")
+        header_text.append(f"Agents: {connected}/{len(hosts)} connected",
+                           style="green" if connected == len(hosts) else "yellow")
+        header_text.append(" | ", style="dim")
+        header_text.append(f"Processes: {total_processes}", style="green")
+        if self.process_filter is not None:
+            header_text.append(" | ", style="dim")
+            header_text.append(f"Filter: {self.process_filter}", style="magenta")
+        header_text.append(" | ", style="dim")
+        header_text.append("Press 'q' or 'ESC' to exit", style="yellow italic")
+        layout["header"].update(Panel(header_text, border_style="blue"))
         
-        processes.sort(key=lambda x: x['memory'], reverse=True)
-        top_processes = processes[:top_n]
+        # Hosts overview
+        hosts_table = Table(show_header=True, header_style="bold blue", box=box.SIMPLE, padding=(0, 1))
+        hosts_table.add_column("Host", style="green bold", width=20)
+        hosts_table.add_column("Address", style="dim", width=24)
+        hosts_table.add_column("Used Memory", width=40)
+        hosts_table.add_column("Procs", style="cyan", width=7)
+        hosts_table.add_column("Containers", style="blue", width=10)
+        hosts_table.add_column("Status", width=30)
+        for host in hosts:
+            system = host['system']
+            if system:
+                used = (f"{self.create_memory_bar(system['used'], system['total'], width=15)} "
+                        f"{self.format_bytes(system['used'])} ({system['percent']}%)")
+            else:
+                used = "[dim]-[/dim]"
+            if host['connected'] and host['last_update']:
+                status = f"[green]OK[/green] [dim]{time.time() - host['last_update']:.0f}s ago[/dim]"
+            elif host['connected']:
+                status = "[yellow]Waiting for snapshot[/yellow]"
+            else:
+                status = f"[red]{host['error'] or 'Connecting...'}[/red]"
+            hosts_table.add_row(host['name'][:20], host['address'][:24], used,
+                                str(len(host['processes'])), str(len(host['containers'])), status)
+        layout["hosts"].update(Panel(hosts_table, title="[bold cyan]Agents[/bold cyan]",
+                                     border_style="cyan", box=box.ROUNDED))
         
-        # Update top processes history
-        for proc in top_processes:
-            self.history_top_processes[proc['name']].append(proc['memory'])
+        # Fleet-wide top processes
+        table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            box=box.ROUNDED,
+            title=f"[bold yellow]Fleet Top {top_n} Processes by Memory Usage[/bold yellow]",
+            title_style="bold yellow"
+        )
+        table.add_column("#", style="dim", width=4)
+        table.add_column("Host", style="cyan", width=16)
+        table.add_column("PID", style="cyan", width=8)
+        table.add_column("Name", style="green", width=24)
+        table.add_column("User", style="blue", width=10)
+        table.add_column("Memory", style="yellow", width=12)
+        table.add_column("%", style="magenta", width=7)
+        top_processes = heapq.nlargest(top_n, self.iter_fleet_processes(hosts), key=lambda x: x[0])
+        for idx, (rss, host, row) in enumerate(top_processes, 1):
+            total = host['system']['total'] if host['system'] else 0
+            mem_pct = rss * 100.0 / total if total else 0
+            if mem_pct > 5:
+                mem_style = "bold red"
+            elif mem_pct > 2:
+                mem_style = "bold yellow"
+            else:
+                mem_style = "white"
+            table.add_row(
+                str(idx), host['name'][:16], str(row[0]), str(row[1])[:24], str(row[2] or '')[:10],
+                f"[{mem_style}]{self.format_bytes(rss)}[/{mem_style}]",
+                f"[{mem_style}]{mem_pct:.2f}%[/{mem_style}]"
+            )
+        layout["processes"].update(table)
         
-        # Keep history aligned
-        for name in list(self.history_top_processes.keys()):
-            if len(self.history_top_processes[name]) > max_points:
-                self.history_top_processes[name] = self.history_top_processes[name][-max_points:]
+        # Fleet-wide top containers
+        containers_table = Table(show_header=True, header_style="bold blue", box=box.SIMPLE, padding=(0, 1))
+        containers_table.add_column("#", style="dim", width=3)
+        containers_table.add_column("Host", style="cyan", width=14)
+        containers_table.add_column("Name", style="green bold", width=18)
+        containers_table.add_column("Memory", style="magenta", width=12)
+        containers_table.add_column("%", style="red bold", width=7)
+        top_containers = heapq.nlargest(
+            top_n,
+            ((row[2], host, row) for host in hosts for row in host['containers'].values()),
+            key=lambda x: x[0]
+        )
+        for idx, (usage, host, row) in enumerate(top_containers, 1):
+            mem_pct = usage * 100.0 / row[3] if row[3] else 0
+            if mem_pct > 80:
+                mem_style = "bold red"
+            elif mem_pct > 50:
+                mem_style = "bold yellow"
+            else:
+                mem_style = "white"
+            containers_table.add_row(
+                str(idx), host['name'][:14], str(row[0])[:18],
+                f"[{mem_style}]{self.format_bytes(usage)}[/{mem_style}]",
+                f"[{mem_style}]{mem_pct:.1f}%[/{mem_style}]"
+            )
+        total_containers = sum(len(host['containers']) for host in hosts)
+        layout["containers"].update(Panel(
+            containers_table,
+            title=f"[bold blue]Fleet Containers ({total_containers} running)[/bold blue]",
+            border_style="blue",
+            box=box.ROUNDED
+        ))
         
-        # Plot 1: Total Memory Usage Over Time
-        ax1.plot(self.history_timestamps, self.history_memory_used, 
-                label='Used Memory', color='#e74c3c', linewidth=2)
-        ax1.plot(self.history_timestamps, self.history_memory_available, 
-                label='Available Memory', color='#2ecc71', linewidth=2)
-        ax1.fill_between(range(len(self.history_memory_used)), 
-                         self.history_memory_used, alpha=0.3, color='#e74c3c')
+        return layout
+    
+    def build_remote_snapshot(self):
+        """Collects system memory, process rows with rates and container rows for --serve-stdio.
         
-        ax1.set_title('System Memory Usage Over Time', fontsize=14, fontweight='bold')
-        ax1.set_xlabel('Time', fontsize=10)
-        ax1.set_ylabel('Memory (GB)', fontsize=10)
-        ax1.legend(loc='upper left')
-        ax1.grid(True, alpha=0.3)
+        Process rows are keyed by "pid:create_time" and ordered like
+        REMOTE_PROCESS_FIELDS. Rates are rounded (byte rates to whole pages)
+        so idle processes produce no delta.
+        """
+        memory = self.scheduler.get('virtual_memory')
+        swap = self.scheduler.get('swap_memory')
+        system = {
+            'total': memory.total,
+            'used': memory.used,
+            'available': memory.available,
+            'percent': memory.percent,
+            'swap_total': swap.total,
+            'swap_used': swap.used,
+            'swap_percent': swap.percent,
+        }
         
-        # Rotate x labels
-        if len(self.history_timestamps) > 10:
-            step = len(self.history_timestamps) // 10
-            ax1.set_xticks(range(0, len(self.history_timestamps), step))
-            ax1.set_xticklabels(self.history_timestamps[::step], rotation=45, ha='right')
-        else:
-            ax1.set_xticks(range(len(self.history_timestamps)))
-            ax1.set_xticklabels(self.history_timestamps, rotation=45, ha='right')
+        containers = {}
+        for container in self.get_docker_containers():
+            containers[container['id']] = [
+                container['name'], container['image'],
+                container['memory_usage'], container['memory_limit']
+            ]
         
-        # Add current stats
-        total_gb = memory.total / (1024**3)
-        used_gb = memory.used / (1024**3)
-        percent = memory.percent
-        ax1.text(0.02, 0.98, f'Total: {total_gb:.2f} GB\nUsed: {used_gb:.2f} GB ({percent:.1f}%)',
-                transform=ax1.transAxes, verticalalignment='top',
-                bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
-                fontsize=9)
+        def rounded(value, step):
+            return None if value != value else int(round(value / step)) * step
+        
+        processes = {}
+        # Copies: aggregation tags each process with its container
+        all_processes = [dict(pinfo) for pinfo in self.collect_all_processes(shared=True)]
+        for pinfo, rate in self.aggregate_processes(all_processes, len(all_processes)):
+            key = f"{pinfo['pid']}:{pinfo.get('create_time') or 0:.2f}"
+            processes[key] = [
+                pinfo['pid'], pinfo['name'], pinfo.get('username'), process_rss(pinfo),
+                pinfo.get('num_threads'), pinfo.get('status'), self.group_label(pinfo.get('group')),
+                rounded(rate[RateTracker.RSS], 4096), rounded(rate[RateTracker.MINFLT], 1),
+                rounded(rate[RateTracker.MAJFLT], 1), rounded(rate[RateTracker.SWAP], 4096),
+            ]
+        
+        return system, processes, containers
+    
+    def run_stdio_server(self, interval=2.0):
+        """Streams snapshots to a --remote client on stdout: one full snapshot, then row deltas"""
+        # Frames own the real stdout; stray prints go to stderr instead of corrupting the stream
+        out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        compressor = zlib.compressobj()
+        name = socket.gethostname()
+        previous = None
+        
+        try:
+            while True:
+                started = time.monotonic()
+                system, processes, containers = self.build_remote_snapshot()
+                if previous is None:
+                    message = {
+                        'type': 'full', 'host': name, 'ts': time.time(), 'interval': interval,
+                        'system': system, 'processes': processes, 'containers': containers,
+                    }
+                else:
+                    message = {
+                        'type': 'delta', 'ts': time.time(), 'system': system,
+                        'processes': diff_rows(previous[0], processes),
+                        'containers': diff_rows(previous[1], containers),
+                    }
+                previous = (processes, containers)
+                
+                with self.stage('write'):
+                    out.write(encode_frame(compressor, message))
+                    out.flush()
+                self.end_tick()
+                if not self.wait_for_stdin(started + interval):
+                    break  # The client closed the channel
+        except BrokenPipeError:
+            pass
+        finally:
+            self.shutdown_worker_pool()
+            self.stop_process_events()
+    
+    def wait_for_stdin(self, deadline):
+        """Sleeps until deadline; returns False early when stdin reaches end of file"""
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return True
+            if select.select([sys.stdin], [], [], timeout)[0] and not os.read(sys.stdin.fileno(), 4096):
+                return False
+    
+    def read_remote_frames(self, child, remote, lock, updated):
+        """Applies frames from a --serve-stdio command to the remote state until it exits"""
+        decompressor = zlib.decompressobj()
+        error = None
+        try:
+            while True:
+                frame = read_frame(child.stdout, decompressor)
+                if frame is None:
+                    break
+                message, wire_bytes, json_bytes = frame
+                with lock:
+                    self.apply_fleet_message(remote, message)
+                    remote['interval'] = message.get('interval') or remote['interval']
+                    remote['wire_bytes'] += wire_bytes
+                    remote['json_bytes'] += json_bytes
+                updated.set()
+        except (OSError, ValueError, zlib.error) as e:
+            error = str(e)
+        
+        child.wait()
+        with lock:
+            remote['connected'] = False
+            remote['error'] = error or (remote['stderr'][-1] if remote['stderr']
+                                        else f"Remote command exited ({child.returncode})")
+        updated.set()
+    
+    def run_remote_tui(self, command, top_n=20):
+        """Runs the TUI on snapshots streamed by a --serve-stdio command (e.g. over SSH).
         
-        # Plot 2: Top Processes Memory Usage
-        process_names = [p['name'][:20] for p in top_processes]  # Truncate names
-        process_memory = [p['memory'] for p in top_processes]
+        Only row deltas cross the link; sorting, scrolling and filtering are
+        applied locally, so keys never wait for a round trip.
+        """
+        from rich.live import Live
+        self.get_console().print("\n[bold cyan]MemInspector - Remote View[/bold cyan]")
+        self.console.print("[dim]Press 'q' or 'ESC' to exit | 's' sort | j/k, arrows, space/b scroll | "
+                           "'/' filter | Ctrl+C to force quit[/dim]\n")
+        try:
+            child = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except (OSError, ValueError) as e:
+            self.console.print(f"[red]Cannot start remote command: {e}[/red]")
+            return
         
-        colors = plt.cm.viridis(range(len(process_names)))
-        bars = ax2.barh(process_names, process_memory, color=colors)
+        remote = {
+            'address': command, 'name': command, 'connected': True, 'synced': False,
+            'error': None, 'system': None, 'processes': {}, 'containers': {},
+            'last_update': None, 'interval': None, 'started': time.monotonic(),
+            'wire_bytes': 0, 'json_bytes': 0, 'stderr': deque(maxlen=5),
+        }
+        lock = threading.Lock()
+        updated = threading.Event()
         
-        ax2.set_title(f'Top {top_n} Processes by Memory Usage', fontsize=14, fontweight='bold')
-        ax2.set_xlabel('Memory (GB)', fontsize=10)
-        ax2.set_ylabel('Process', fontsize=10)
-        ax2.grid(True, alpha=0.3, axis='x')
+        def read_stderr():
+            for line in child.stderr:
+                remote['stderr'].append(line.decode(errors='replace').strip())
         
-        # Add value labels on bars
-        for i, (bar, mem) in enumerate(zip(bars, process_memory)):
-            ax2.text(mem, bar.get_y() + bar.get_height()/2, 
-                    f' {mem:.3f} GB', 
-                    va='center', fontsize=8)
+        threading.Thread(target=read_stderr, daemon=True).start()
+        threading.Thread(target=self.read_remote_frames, args=(child, remote, lock, updated),
+                         daemon=True).start()
         
-        # Invert y-axis so highest is on top
-        ax2.invert_yaxis()
+        old_settings = None
+        input_queue = queue.Queue()
+        view = {'offset': 0, 'editing': None, 'error': None}
         
-        plt.tight_layout()
-    
-    def run_realtime_graph(self, top_n=10, update_interval=2000):
-        """Runs real-time graph visualization"""
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib.animation as animation
-        except ImportError:
-            print("Error: matplotlib is required for graph mode.")
-            print("Install it with: pip install matplotlib")
-            sys.exit(1)
+            # The terminal stays untouched until the first snapshot: ssh may
+            # still be prompting on it for a password or host key
+            self.console.print("[dim]Waiting for the first snapshot...[/dim]")
+            while not remote['synced'] and remote['connected']:
+                updated.wait(0.1)
+                updated.clear()
+            if not remote['synced']:
+                self.console.print(f"[red]Remote command failed: {remote['error']}[/red]")
+                return
             
-        print("="*100)
-        print("MemInspector - Real-Time Memory Monitor")
-        print("="*100)
-        print(f"\nStarting real-time monitoring...")
-        print(f"Showing top {top_n} processes")
-        print(f"Update interval: {update_interval/1000:.1f} seconds")
-        print("\nClose the graph window to exit.\n")
+            if sys.stdin.isatty():
+                old_settings = termios.tcgetattr(sys.stdin)
+            self.start_keyboard_listener(input_queue, old_settings, raw=True)
+            with lock:
+                layout = self.create_remote_layout(remote, view, top_n)
+            with Live(layout, auto_refresh=False, console=self.console) as live:
+                last_render = time.monotonic()
+                while not self.stop_tui:
+                    dirty = updated.wait(0.05)
+                    updated.clear()
+                    while not input_queue.empty():
+                        self.handle_remote_key(input_queue.get_nowait(), view, top_n)
+                        dirty = True
+                    if self.stop_tui:
+                        break
+                    
+                    # Keys and new frames render at once; otherwise once a second for the age
+                    if dirty or time.monotonic() - last_render >= 1:
+                        with lock:
+                            layout = self.create_remote_layout(remote, view, top_n)
+                        live.update(layout, refresh=True)
+                        last_render = time.monotonic()
+            self.console.print("\n[green]Application closed.[/green]")
+        except KeyboardInterrupt:
+            self.console.print("\n[yellow]Monitoring stopped by user.[/yellow]")
+        finally:
+            self.stop_tui = True
+            try:
+                child.stdin.close()  # The server exits on end of file
+                child.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                child.kill()
+            if old_settings and sys.stdin.isatty():
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+    
+    def handle_remote_key(self, key, view, page):
+        """Applies a key press to the remote view: sort, scroll or edit the filter"""
+        if view['editing'] is not None:
+            if key in ('\n', '\r'):
+                expression = view['editing'].strip()
+                try:
+                    self.process_filter = ProcessFilter(expression) if expression else None
+                    view['error'] = None
+                except ValueError as e:
+                    view['error'] = str(e)
+                view['editing'] = None
+                view['offset'] = 0
+            elif key == '\x1b':
+                view['editing'] = None
+            elif key in ('\x7f', '\b'):
+                view['editing'] = view['editing'][:-1]
+            elif len(key) == 1 and key.isprintable():
+                view['editing'] += key
+            return
         
-        # Create figure with 2 subplots
-        fig = plt.figure(figsize=(14, 10))
-        ax1 = plt.subplot(2, 1, 1)
-        ax2 = plt.subplot(2, 1, 2)
+        if key in ('q', 'Q', '\x1b'):
+            self.stop_tui = True
+        elif key in ('s', 'S'):
+            self.cycle_sort_key()
+            view['offset'] = 0
+        elif key in ('j', 'down'):
+            view['offset'] += 1
+        elif key in ('k', 'up'):
+            view['offset'] = max(view['offset'] - 1, 0)
+        elif key in (' ', 'pgdn'):
+            view['offset'] += page
+        elif key in ('b', 'pgup'):
+            view['offset'] = max(view['offset'] - page, 0)
+        elif key == 'g':
+            view['offset'] = 0
+        elif key == '/':
+            view['editing'] = str(self.process_filter or '')
+        elif key == 'x':
+            self.process_filter = None
+            view['offset'] = 0
+    
+    def remote_sort_value(self, row):
+        """Sort value of a remote process row for the selected sort key (None sorts last)"""
+        if self.sort_key == 'rss':
+            return row[3]
+        if self.sort_key == 'rss_rate':
+            value = row[7]
+        elif self.sort_key == 'faults':
+            value = None if row[8] is None or row[9] is None else row[8] + row[9]
+        elif self.sort_key == 'major_faults':
+            value = row[9]
+        else:
+            value = row[10]
+        return -float('inf') if value is None else value
+    
+    def create_remote_layout(self, remote, view, top_n):
+        """Creates the remote TUI layout from the streamed rows, sorted and filtered locally"""
+        from rich import box
+        from rich.layout import Layout
+        from rich.panel import Panel
+        from rich.table import Table
+        from rich.text import Text
+        layout = Layout()
+        layout.split_column(
+            Layout(name="header", size=3),
+            Layout(name="body"),
+            Layout(name="footer", size=3),
+        )
+        layout["body"].split_row(
+            Layout(name="processes", ratio=3),
+            Layout(name="side", ratio=1),
+        )
+        layout["side"].split_column(
+            Layout(name="system", size=9),
+            Layout(name="containers"),
+        )
         
-        # Set style
-        plt.style.use('seaborn-v0_8-darkgrid')
+        system = remote['system']
+        total = system['total'] if system else 0
+        rows = list(remote['processes'].values())
+        if self.process_filter is not None:
+            rows = [row for row in rows if self.process_filter.match_record({
+                'pid': row[0], 'name': row[1], 'username': row[2], 'rss': row[3],
+                'memory_percent': row[3] * 100.0 / total if total else None,
+                'num_threads': row[4], 'status': row[5],
+            })]
+        rows.sort(key=self.remote_sort_value, reverse=True)
+        view['offset'] = min(view['offset'], max(len(rows) - top_n, 0))
+        offset = view['offset']
+        visible = rows[offset:offset + top_n]
         
-        # Create animation
-        ani = animation.FuncAnimation(
-            fig, 
-            self.update_graph,
-            fargs=(fig, ax1, ax2, top_n),
-            interval=update_interval,
-            cache_frame_data=False
+        # Header
+        header_text = Text()
+        header_text.append("MemInspector Remote", style="bold cyan")
+        header_text.append(" | ", style="dim")
+        header_text.append(remote['name'][:40], style="bold white")
+        header_text.append(" | ", style="dim")
+        if remote['connected'] and remote['last_update']:
+            header_text.append(f"Updated {time.time() - remote['last_update']:.0f}s ago", style="green")
+        elif remote['connected']:
+            header_text.append("Waiting for snapshot", style="yellow")
+        else:
+            header_text.append(remote['error'] or "Disconnected", style="bold red")
+        header_text.append(" | ", style="dim")
+        header_text.append(f"Processes: {len(remote['processes'])}", style="green")
+        elapsed = time.monotonic() - remote['started']
+        if remote['wire_bytes'] and elapsed > 0:
+            ratio = remote['json_bytes'] / remote['wire_bytes']
+            header_text.append(" | ", style="dim")
+            header_text.append(f"RX {self.format_bytes(remote['wire_bytes'] / elapsed)}/s "
+                               f"(compressed {ratio:.0f}x)", style="blue")
+        layout["header"].update(Panel(header_text, border_style="blue"))
+        
+        # Processes
+        sort_label = RateTracker.SORT_LABELS[self.sort_key]
+        shown = f"{offset + 1}-{offset + len(visible)} of {len(rows)}" if visible else f"0 of {len(rows)}"
+        table = Table(
+            show_header=True,
+            header_style="bold magenta",
+            box=box.ROUNDED,
+            title=f"[bold yellow]Processes {shown} by {sort_label}[/bold yellow] "
+                  f"[dim](s: sort, j/k: scroll, /: filter)[/dim]",
+            title_style="bold yellow"
         )
+        table.add_column("PID", style="cyan", width=8)
+        table.add_column("Name", style="green", width=18)
+        table.add_column("Container/Unit", style="blue", width=14)
+        table.add_column("Memory", style="yellow", width=11)
+        table.add_column("%", style="magenta", width=7)
+        table.add_column("RSS/s", style="yellow", width=11)
+        table.add_column("Flt/s", style="cyan", width=7)
+        table.add_column("MajFlt/s", style="red", width=8)
+        table.add_column("SwapIn/s", style="red", width=10)
+        table.add_column("Threads", style="blue", width=7)
+        table.add_column("Status", style="white", width=9)
+        nan = float('nan')
+        for row in visible:
+            rss_rate, minflt, majflt, swapin = (nan if value is None else value for value in row[7:11])
+            mem_pct = row[3] * 100.0 / total if total else 0
+            if mem_pct > 5:
+                mem_style = "bold red"
+            elif mem_pct > 2:
+                mem_style = "bold yellow"
+            else:
+                mem_style = "white"
+            group = row[6].partition(':')[2] if row[6] else "[dim]-[/dim]"
+            table.add_row(
+                str(row[0]),
+                str(row[1])[:17],
+                group[:14],
+                f"[{mem_style}]{self.format_bytes(row[3])}[/{mem_style}]",
+                f"[{mem_style}]{mem_pct:.2f}%[/{mem_style}]",
+                self.format_rate(rss_rate, 'B'),
+                self.format_rate(minflt + majflt),
+                self.format_rate(majflt),
+                self.format_rate(swapin, 'B'),
+                str(row[4] or 0),
+                str(row[5] or '')
+            )
+        layout["processes"].update(table)
         
-        plt.show()
-    
-    def run_refresh_mode(self, top_n=20, interval=3):
-        """Runs continuous refresh mode in terminal"""
-        print("="*100)
-        print("MemInspector - Continuous Refresh Mode")
-        print("="*100)
-        print(f"\nRefresh interval: {interval} seconds")
-        print(f"Showing top {top_n} processes")
-        print("\nPress Ctrl+C to exit.\n")
+        # System memory
+        system_table = Table(show_header=False, box=box.SIMPLE, padding=(0, 1))
+        system_table.add_column("Label", style="cyan bold")
+        system_table.add_column("Value", style="white")
+        if system:
+            system_table.add_row("Used", f"{self.format_bytes(system['used'])} ({system['percent']}%)")
+            system_table.add_row("", self.create_memory_bar(system['used'], system['total'], width=20))
+            system_table.add_row("Available", self.format_bytes(system['available']))
+            system_table.add_row("Total", self.format_bytes(system['total']))
+            if system.get('swap_total'):
+                system_table.add_row("Swap", f"{self.format_bytes(system['swap_used'])} "
+                                             f"({system['swap_percent']}%)")
+        layout["system"].update(Panel(system_table, title="[bold cyan]System Memory[/bold cyan]",
+                                      border_style="cyan", box=box.ROUNDED))
         
-        try:
-            iteration = 0
-            while True:
-                iteration += 1
-                
-                # Clear screen (works on Unix-like systems)
-                print("\033[2J\033[H", end="")
-                
-                # Show iteration info
-                print("="*100)
-                print(f"MemInspector - Continuous Refresh Mode (Update #{iteration})")
-                print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                print("="*100)
-                
-                # Display system summary
-                self.display_system_summary()
-                
-                # Collect and display processes
-                self.processes = []
-                all_processes = list(psutil.process_iter())
-                
-                for proc in all_processes:
-                    pinfo = self.get_process_info(proc)
-                    if pinfo:
-                        self.processes.append(pinfo)
-                
-                # Sort by memory usage
-                self.processes.sort(
-                    key=lambda x: x['memory_info'].rss if x['memory_info'] else 0,
-                    reverse=True
-                )
-                
-                # Display top processes
-                self.display_top_processes(top_n=top_n)
-                
-                print(f"\n{'='*100}")
-                print(f"Next update in {interval} seconds... (Press Ctrl+C to exit)")
-                print(f"{'='*100}")
-                
-                # Wait for next refresh
-                time.sleep(interval)
-                
-        except KeyboardInterrupt:
-            print("\n\nRefresh mode stopped by user.")
+        # Containers
+        containers_table = Table(show_header=True, header_style="bold blue", box=box.SIMPLE, padding=(0, 1))
+        containers_table.add_column("Name", style="green bold", width=16)
+        containers_table.add_column("Memory", style="magenta", width=11)
+        containers_table.add_column("%", style="red bold", width=6)
+        for row in heapq.nlargest(top_n, remote['containers'].values(), key=lambda row: row[2]):
+            mem_pct = row[2] * 100.0 / row[3] if row[3] else 0
+            containers_table.add_row(str(row[0])[:16], self.format_bytes(row[2]), f"{mem_pct:.1f}%")
+        layout["containers"].update(Panel(
+            containers_table,
+            title=f"[bold blue]Docker ({len(remote['containers'])} running)[/bold blue]",
+            border_style="blue",
+            box=box.ROUNDED
+        ))
+        
+        # Footer: filter prompt, filter error or key help
+        footer_text = Text()
+        if view['editing'] is not None:
+            footer_text.append("Filter: ", style="bold magenta")
+            footer_text.append(view['editing'] + "█")
+            footer_text.append("  (Enter: apply, ESC: cancel, empty: clear)", style="dim")
+        elif view['error']:
+            footer_text.append(f"Invalid filter: {view['error']}", style="bold red")
+        else:
+            if self.process_filter is not None:
+                footer_text.append(f"Filter: {self.process_filter}", style="magenta")
+                footer_text.append(" (x: clear) | ", style="dim")
+            footer_text.append("q: quit | s: sort | j/k ↑/↓: scroll | space/b: page | g: top | /: filter",
+                               style="yellow italic")
+        layout["footer"].update(Panel(footer_text, border_style="dim", box=box.ROUNDED))
+        
+        return layout
     
     def create_memory_bar(self, used, total, width=50):
         """Creates a colored memory usage bar"""
@@ -445,10 +4700,68 @@ class MemInspector:
         bar = "█" * filled + "░" * (width - filled)
         return f"[{color}]{bar}[/{color}]"
     
+    def get_kernel_reader(self):
+        """Opens the kernel memory reader on first use (None when /proc/meminfo is missing)"""
+        if self.kernel_reader is None:
+            self.kernel_reader = KernelMemoryReader()
+        return self.kernel_reader if self.kernel_reader.available else None
+    
+    def format_growth(self, rate):
+        """Formats a kernel memory growth rate, colored by direction"""
+        if rate is None:
+            return "[dim]-[/dim]"
+        if abs(rate) < 1:
+            return "[dim]0 B/s[/dim]"
+        color = "red" if rate > 0 else "green"
+        sign = "+" if rate > 0 else "-"
+        return f"[{color}]{sign}{self.format_bytes(abs(rate))}/s[/{color}]"
+    
+    def format_growth_text(self, rate):
+        """Plain-text kernel memory growth rate for list and refresh modes"""
+        if rate is None:
+            return "-"
+        if abs(rate) < 1:
+            return "0 B/s"
+        return f"{'+' if rate > 0 else '-'}{self.format_bytes(abs(rate))}/s"
+    
+    def create_kernel_panel(self):
+        """Creates a panel with the kernel memory breakdown and top slab caches"""
+        from rich import box
+        from rich.panel import Panel
+        from rich.table import Table
+        reader = self.get_kernel_reader()
+        components, slabs = self.scheduler.get('kernel_memory')
+        
+        table = Table(show_header=False, box=box.SIMPLE, padding=(0, 1))
+        table.add_column("Label", style="cyan bold")
+        table.add_column("Value", style="white", justify="right")
+        table.add_column("Growth", justify="right")
+        
+        for label, value, rate in components:
+            if value or rate:
+                table.add_row(label, self.format_bytes(value), self.format_growth(rate))
+        
+        if slabs:
+            table.add_row("", "", "")  # Spacer
+            for name, value, rate in slabs:
+                table.add_row(f"[magenta]{name[:22]}[/magenta]", self.format_bytes(value), self.format_growth(rate))
+        elif reader.slab_error:
+            table.add_row("[dim]Slab caches[/dim]", "", f"[dim]{reader.slab_error}[/dim]")
+        
+        return Panel(
+            table,
+            title="[bold magenta]Kernel Memory[/bold magenta]",
+            border_style="magenta",
+            box=box.ROUNDED
+        )
+    
     def create_system_panel(self):
         """Creates a panel with system memory information"""
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        from rich import box
+        from rich.panel import Panel
+        from rich.table import Table
+        memory = self.scheduler.get('virtual_memory')
+        swap = self.scheduler.get('swap_memory')
         
         # Create table for system info
         table = Table(show_header=False, box=box.SIMPLE, padding=(0, 1))
@@ -489,6 +4802,16 @@ class MemInspector:
                 swap_bar
             )
         
+        # Plugin collectors (JVM heaps, tracemalloc dumps, ...)
+        for collector in self.plugin_collectors:
+            table.add_row("", "", "")  # Spacer
+            try:
+                rows = self.collector_rows(collector)
+            except Exception as e:
+                rows = [(collector.name, f"error: {e}")]
+            for label, text in rows:
+                table.add_row(label[:20], text, "")
+        
         return Panel(
             table,
             title="[bold cyan]System Memory[/bold cyan]",
@@ -496,43 +4819,121 @@ class MemInspector:
             box=box.ROUNDED
         )
     
+    def format_rate(self, value, unit=''):
+        """Formats a per-second rate for the processes table ('-' when unknown)"""
+        if math.isnan(value):
+            return "-"
+        if unit == 'B':
+            sign = "-" if value < 0 else "+" if value > 0 else ""
+            return f"{sign}{self.format_bytes(abs(value))}"
+        return f"{value:.0f}"
+    
+    def container_display_name(self, container_id):
+        """Docker name of a container when known, else its short ID"""
+        return self.container_names.get(container_id) or container_id[:12]
+    
+    def format_group(self, tag):
+        """Formats a cgroup tag for the Container/Unit column"""
+        if tag is None:
+            return "[dim]-[/dim]"
+        if tag[0] == 'container':
+            return self.container_display_name(tag[1])[:14]
+        return f"[dim]{tag[1][:14]}[/dim]"
+    
+    def cycle_selected_container(self):
+        """Drills down into the next container (largest attributed RSS first)"""
+        containers = sorted(self.container_usage, key=lambda c: self.container_usage[c][1], reverse=True)
+        if not containers:
+            self.selected_container = None
+        elif self.selected_container not in containers:
+            self.selected_container = containers[0]
+        else:
+            position = containers.index(self.selected_container) + 1
+            self.selected_container = containers[position] if position < len(containers) else None
+    
+    def cycle_sort_key(self):
+        """Switches the processes table to the next sort key"""
+        keys = RateTracker.SORT_KEYS
+        self.sort_key = keys[(keys.index(self.sort_key) + 1) % len(keys)]
+    
+    def aggregate_processes(self, processes, top_n):
+        """Attributes processes to containers, computes rates and returns the top rows"""
+        # Attribute processes to containers/units and total them per container
+        container_usage = defaultdict(lambda: [0, 0])
+        for pinfo in processes:
+            tag = self.cgroup_resolver.resolve(pinfo['pid'], pinfo.get('create_time'))
+            pinfo['group'] = tag
+            if tag is not None and tag[0] == 'container':
+                usage = container_usage[tag[1]]
+                usage[0] += 1
+                usage[1] += process_rss(pinfo)
+        self.container_usage = dict(container_usage)
+        self.cgroup_resolver.prune({pinfo['pid'] for pinfo in processes})
+        if self.selected_container is not None and self.selected_container not in self.container_usage:
+            self.selected_container = None
+        
+        # Rates since the previous tick, then order by the selected sort key
+        rates = self.rate_tracker.sample(processes)
+        order = self.rate_tracker.sort_order(rates, self.sort_key)
+        if self.selected_container is not None:
+            # Drill-down: only processes of the selected container
+            selected = ('container', self.selected_container)
+            order = [i for i in order if processes[i]['group'] == selected]
+        
+        if self.alert_engine is not None:
+            self.evaluate_alerts(processes, rates)
+        return [(processes[i], rates[i]) for i in order[:top_n]]
+    
     def create_processes_table(self, top_n=20):
         """Creates a colored table with top processes"""
+        from rich import box
+        from rich.table import Table
         # Collect current processes
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'memory_percent', 'num_threads', 'status']):
-            try:
-                pinfo = proc.info
-                if pinfo['memory_info']:
-                    processes.append(pinfo)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        with self.stage('collect'):
+            # Copies: the cached rows are shared, and aggregation tags each with its container
+            processes = [dict(pinfo) for pinfo in self.scheduler.get('process_rows')]
+            
+            # Sort by memory
+            processes.sort(key=lambda x: x['memory_info'].rss if x['memory_info'] else 0, reverse=True)
+        with self.stage('write'):
+            self.record_pressure_snapshot(processes)
         
-        # Sort by memory
-        processes.sort(key=lambda x: x['memory_info'].rss if x['memory_info'] else 0, reverse=True)
-        top_processes = processes[:top_n]
+        with self.stage('aggregate'):
+            top_processes = self.aggregate_processes(processes, top_n)
         
         # Create table
+        sort_label = RateTracker.SORT_LABELS[self.sort_key]
+        if self.selected_container is not None:
+            container_name = self.container_display_name(self.selected_container)
+            title = (f"[bold yellow]Processes in {container_name} by {sort_label}[/bold yellow] "
+                     f"[dim](c: next container, x: all)[/dim]")
+        else:
+            title = f"[bold yellow]Top {top_n} Processes by {sort_label}[/bold yellow] [dim](s: sort, c: container)[/dim]"
         table = Table(
             show_header=True,
             header_style="bold magenta",
             box=box.ROUNDED,
-            title=f"[bold yellow]Top {top_n} Processes by Memory Usage[/bold yellow]",
+            title=title,
             title_style="bold yellow"
         )
         
         table.add_column("#", style="dim", width=4)
         table.add_column("PID", style="cyan", width=8)
-        table.add_column("Name", style="green", width=30)
-        table.add_column("Memory", style="yellow", width=15)
-        table.add_column("%", style="magenta", width=8)
-        table.add_column("Threads", style="blue", width=8)
-        table.add_column("Status", style="white", width=10)
+        table.add_column("Name", style="green", width=18)
+        table.add_column("Container/Unit", style="blue", width=14)
+        table.add_column("Memory", style="yellow", width=11)
+        table.add_column("%", style="magenta", width=7)
+        table.add_column("RSS/s", style="yellow", width=11)
+        table.add_column("Flt/s", style="cyan", width=7)
+        table.add_column("MajFlt/s", style="red", width=8)
+        table.add_column("SwapIn/s", style="red", width=10)
+        table.add_column("Threads", style="blue", width=7)
+        table.add_column("Status", style="white", width=9)
         
         # Add rows
-        for idx, proc in enumerate(top_processes, 1):
+        for idx, (proc, rate) in enumerate(top_processes, 1):
             pid = str(proc.get('pid', 'N/A'))
-            name = proc.get('name', 'N/A')[:29]
+            name = proc.get('name', 'N/A')[:17]
             mem_info = proc.get('memory_info')
             rss = self.format_bytes(mem_info.rss) if mem_info else 'N/A'
             mem_pct = proc.get('memory_percent', 0)
@@ -552,8 +4953,13 @@ class MemInspector:
                 str(idx),
                 pid,
                 name,
+                self.format_group(proc.get('group')),
                 f"[{mem_style}]{rss}[/{mem_style}]",
                 f"[{mem_style}]{mem_percent}[/{mem_style}]",
+                self.format_rate(rate[RateTracker.RSS], 'B'),
+                self.format_rate(rate[RateTracker.MINFLT] + rate[RateTracker.MAJFLT]),
+                self.format_rate(rate[RateTracker.MAJFLT]),
+                self.format_rate(rate[RateTracker.SWAP], 'B'),
                 num_threads,
                 status
             )
@@ -562,7 +4968,8 @@ class MemInspector:
     
     def create_memory_graph_ascii(self, width=60, height=10):
         """Creates an ASCII graph of memory usage"""
-        memory = psutil.virtual_memory()
+        from rich.text import Text
+        memory = self.scheduler.get('virtual_memory')
         
         # Get historical data or use current
         if len(self.history_memory_used) < 2:
@@ -596,10 +5003,17 @@ class MemInspector:
         return Text.from_markup(graph_text)
     
     def get_docker_containers(self):
-        """Gets Docker containers and their memory usage"""
+        """Gets Docker containers and their memory usage from the docker collector.
+        
+        Fetching calls the stats endpoint once per container, so callers within
+        the same update (header, Docker table, snapshots) share one fetch.
+        """
         if not self.docker_client:
             return []
-        
+        return self.scheduler.get('containers', [])
+    
+    def fetch_docker_containers(self):
+        """Queries the Docker API for running containers and their memory stats"""
         try:
             containers = []
             running_containers = self.docker_client.containers.list()
@@ -646,6 +5060,7 @@ class MemInspector:
                     
                     containers.append({
                         'id': container.short_id,
+                        'full_id': container.id,
                         'name': container.name,
                         'image': image_name,
                         'status': container.status,
@@ -659,6 +5074,7 @@ class MemInspector:
             
             # Sort by memory usage
             containers.sort(key=lambda x: x['memory_usage'], reverse=True)
+            self.container_names = {c['full_id']: c['name'] for c in containers}
             
             # Clear error if we got containers successfully
             if containers:
@@ -671,6 +5087,9 @@ class MemInspector:
     
     def create_docker_table(self):
         """Creates a table with Docker containers"""
+        from rich import box
+        from rich.panel import Panel
+        from rich.table import Table
         if not DOCKER_AVAILABLE:
             return Panel(
                 "[yellow]Docker library not installed[/yellow]\n[dim]Install with: pip install docker[/dim]",
@@ -714,6 +5133,7 @@ class MemInspector:
         table.add_column("Name", style="green bold", width=18, no_wrap=False)
         table.add_column("Memory", style="magenta", width=12)
         table.add_column("%", style="red bold", width=7)
+        table.add_column("Procs", style="cyan", width=5)
         
         # Add rows - show all containers or top 15
         display_count = min(len(containers), 15)
@@ -734,11 +5154,16 @@ class MemInspector:
             if len(name) > 18:
                 name = name[:15] + "..."
             
+            # Processes attributed to this container through their cgroup
+            usage = self.container_usage.get(container['full_id'])
+            
             table.add_row(
                 str(idx),
                 name,
                 f"[{mem_style}]{mem_usage}[/{mem_style}]",
-                f"[{mem_style}]{mem_percent}[/{mem_style}]"
+                f"[{mem_style}]{mem_percent}[/{mem_style}]",
+                str(usage[0]) if usage else "-",
+                style="reverse" if container['full_id'] == self.selected_container else None
             )
         
         title_text = f"[bold blue]Docker Containers ({len(containers)} running)[/bold blue]"
@@ -749,20 +5174,13 @@ class MemInspector:
             box=box.ROUNDED
         )
     
-    def run_colored_tui(self, top_n=20, interval=2):
-        """Runs a colored terminal UI with live updates"""
-        self.console.print("\n[bold cyan]MemInspector - Colored Terminal Interface[/bold cyan]")
-        self.console.print("[dim]Press 'q' or 'ESC' to exit | Ctrl+C to force quit[/dim]\n")
-        time.sleep(1)  # Give user time to read the message
-        
-        # Save terminal settings
-        old_settings = None
-        if sys.stdin.isatty():
-            old_settings = termios.tcgetattr(sys.stdin)
-        
-        # Create a queue for keyboard input
-        input_queue = queue.Queue()
+    def start_keyboard_listener(self, input_queue, old_settings, raw=False):
+        """Starts a thread that forwards key presses to input_queue.
         
+        'q' and ESC are reported as 'quit' (and stop the listener); any other
+        key is forwarded as the character itself. With raw=True every key is
+        forwarded (see split_keys) and the caller decides when to quit.
+        """
         def keyboard_listener():
             """Thread to listen for keyboard input"""
             try:
@@ -771,6 +5189,13 @@ class MemInspector:
                 
                 while not self.stop_tui:
                     if select.select([sys.stdin], [], [], 0.1)[0]:
+                        if raw:
+                            data = os.read(sys.stdin.fileno(), 64)
+                            if not data:
+                                break
+                            for key in split_keys(data.decode(errors='ignore')):
+                                input_queue.put(key)
+                            continue
                         char = sys.stdin.read(1)
                         if char.lower() == 'q':
                             input_queue.put('quit')
@@ -778,6 +5203,8 @@ class MemInspector:
                         elif char == '\x1b':  # ESC key
                             input_queue.put('quit')
                             break
+                        else:
+                            input_queue.put(char)
             except Exception as e:
                 pass
             finally:
@@ -787,21 +5214,46 @@ class MemInspector:
         # Start keyboard listener thread
         listener_thread = threading.Thread(target=keyboard_listener, daemon=True)
         listener_thread.start()
+        return listener_thread
+    
+    def run_colored_tui(self, top_n=20, interval=2):
+        """Runs a colored terminal UI with live updates"""
+        from rich.live import Live
+        self.get_console().print("\n[bold cyan]MemInspector - Colored Terminal Interface[/bold cyan]")
+        self.console.print("[dim]Press 'q' or 'ESC' to exit | 's' sort | 'c'/'x' container drill-down | Ctrl+C to force quit[/dim]\n")
+        time.sleep(1)  # Give user time to read the message
+        
+        # One Docker fetch per update, shared by the header and the Docker table
+        self.scheduler.set_cadence('docker', max(self.scheduler.collectors['docker'].cadence, interval / 2))
+        
+        # Save terminal settings
+        old_settings = None
+        if sys.stdin.isatty():
+            old_settings = termios.tcgetattr(sys.stdin)
+        
+        # Create a queue for keyboard input
+        input_queue = queue.Queue()
+        self.start_keyboard_listener(input_queue, old_settings)
         
         try:
             with Live(self.create_layout(top_n), refresh_per_second=1, console=self.console) as live:
                 while not self.stop_tui:
                     # Check for keyboard input
-                    try:
+                    while not input_queue.empty():
                         command = input_queue.get_nowait()
                         if command == 'quit':
                             self.stop_tui = True
-                            break
-                    except queue.Empty:
-                        pass
+                        elif command.lower() == 's':
+                            self.cycle_sort_key()
+                        elif command.lower() == 'c':
+                            self.cycle_selected_container()
+                        elif command.lower() == 'x':
+                            self.selected_container = None
+                    if self.stop_tui:
+                        break
                     
                     # Update history for graph
-                    memory = psutil.virtual_memory()
+                    memory = self.scheduler.get('virtual_memory')
                     self.history_memory_used.append(memory.used / (1024**3))
                     self.history_memory_available.append(memory.available / (1024**3))
                     
@@ -811,8 +5263,10 @@ class MemInspector:
                         self.history_memory_available = self.history_memory_available[-60:]
                     
                     # Update display
-                    live.update(self.create_layout(top_n))
-                    time.sleep(interval)
+                    with self.stage('render'):
+                        live.update(self.create_layout(top_n), refresh=True)
+                    self.end_tick()
+                    self.wait_for_next_tick(interval)
             
             self.console.print("\n[green]Application closed.[/green]")
                     
@@ -820,54 +5274,52 @@ class MemInspector:
             self.stop_tui = True
             self.console.print("\n[yellow]Monitoring stopped by user.[/yellow]")
         finally:
+            self.stop_pressure_capture()
+            self.stop_process_events()
             # Restore terminal settings
             if old_settings and sys.stdin.isatty():
                 termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
     
     def create_layout(self, top_n):
         """Creates the complete layout for the TUI"""
+        from rich import box
+        from rich.layout import Layout
+        from rich.panel import Panel
+        from rich.text import Text
         layout = Layout()
         
-        # Check if Docker is available to adjust layout
+        # Check if Docker and kernel memory stats are available to adjust layout
         has_docker = self.docker_client is not None
+        has_kernel = self.get_kernel_reader() is not None
+        
+        layout.split_column(
+            Layout(name="header", size=3),
+            Layout(name="body"),
+            Layout(name="footer", size=3 if self.profiler is None else 4),
+        )
         
         if has_docker:
-            layout.split_column(
-                Layout(name="header", size=3),
-                Layout(name="body"),
-                Layout(name="footer", size=3),
-            )
-            
             layout["body"].split_row(
                 Layout(name="left", ratio=3),
                 Layout(name="right", ratio=2),
             )
-            
-            layout["left"].split_column(
-                Layout(name="processes"),
-                Layout(name="graph", size=12),
-            )
-            
-            layout["right"].split_column(
-                Layout(name="system"),
-                Layout(name="docker"),
-            )
         else:
-            layout.split_column(
-                Layout(name="header", size=3),
-                Layout(name="body"),
-                Layout(name="footer", size=3),
-            )
-            
             layout["body"].split_row(
                 Layout(name="left", ratio=2),
                 Layout(name="right", ratio=1),
             )
-            
-            layout["left"].split_column(
-                Layout(name="processes"),
-                Layout(name="graph", size=12),
-            )
+        
+        layout["left"].split_column(
+            Layout(name="processes"),
+            Layout(name="graph", size=12),
+        )
+        
+        right_panels = [Layout(name="system")]
+        if has_kernel:
+            right_panels.append(Layout(name="kernel"))
+        if has_docker:
+            right_panels.append(Layout(name="docker"))
+        layout["right"].split_column(*right_panels)
         
         # Header
         header_text = Text()
@@ -875,7 +5327,28 @@ class MemInspector:
         header_text.append(" | ", style="dim")
         header_text.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), style="bold white")
         header_text.append(" | ", style="dim")
-        header_text.append(f"Total Processes: {len(list(psutil.process_iter()))}", style="green")
+        header_text.append(f"Total Processes: {len(self.live_pids())}", style="green")
+        if self.process_events is not None and self.process_events.available:
+            self.collect_short_lived()
+            header_text.append(" | ", style="dim")
+            if self.short_lived:
+                latest = self.short_lived[-1]
+                peak = self.format_bytes(latest['peak_rss']) if latest['peak_rss'] is not None else 'N/A'
+                header_text.append(f"Short-lived: {len(self.short_lived)} (last: {latest['name']} {peak})",
+                                   style="magenta")
+            else:
+                header_text.append("Short-lived: 0", style="magenta")
+        if self.process_filter is not None:
+            header_text.append(" | ", style="dim")
+            header_text.append(f"Filter: {self.process_filter}", style="magenta")
+        if self.pressure_monitor is not None:
+            header_text.append(" | ", style="dim")
+            header_text.append(self.pressure_status(),
+                               style="bold red" if self.in_pressure_burst() else "cyan")
+        if self.alert_engine is not None:
+            firing = any(rule.firing for rule in self.alert_engine.rules)
+            header_text.append(" | ", style="dim")
+            header_text.append(self.alert_engine.status(), style="bold red" if firing else "cyan")
         if has_docker:
             containers_count = len(self.get_docker_containers())
             header_text.append(" | ", style="dim")
@@ -885,15 +5358,15 @@ class MemInspector:
         
         layout["header"].update(Panel(header_text, border_style="blue"))
         
+        # Processes table (first, so the Docker table sees this tick's attribution)
+        layout["processes"].update(self.create_processes_table(top_n))
+        
         # System info
+        layout["system"].update(self.create_system_panel())
+        if has_kernel:
+            layout["kernel"].update(self.create_kernel_panel())
         if has_docker:
-            layout["system"].update(self.create_system_panel())
             layout["docker"].update(self.create_docker_table())
-        else:
-            layout["right"].update(self.create_system_panel())
-        
-        # Processes table
-        layout["processes"].update(self.create_processes_table(top_n))
         
         # Memory graph
         graph = self.create_memory_graph_ascii()
@@ -911,12 +5384,44 @@ class MemInspector:
         footer_text.append("Jaccon", style="bold cyan")
         footer_text.append(" | ", style="dim")
         footer_text.append("github.com/jaccon/meminspector", style="blue italic")
+        if self.profiler is not None:
+            footer_text.append("\n")
+            footer_text.append(self.profiler.overhead_line(), style="yellow")
         
         layout["footer"].update(Panel(footer_text, border_style="dim", box=box.ROUNDED))
         
         return layout
 
 
+# Modes that collect every process, on the worker pool
+POOL_MODES = ('list', 'refresh', 'stream', 'tui', 'graph', 'headless_graph', 'agent', 'serve_stdio')
+
+
+def select_mode(args):
+    """Returns the run mode picked by the command line, in dispatch order"""
+    if args.save_snapshot:
+        return 'save_snapshot'
+    if args.diff:
+        return 'diff'
+    if args.agent:
+        return 'agent'
+    if args.serve_stdio:
+        return 'serve_stdio'
+    if args.remote:
+        return 'remote'
+    if args.fleet:
+        return 'fleet'
+    if args.format != 'text':
+        return 'stream'
+    if args.tui:
+        return 'tui'
+    if args.graph:
+        return 'headless_graph' if args.headless else 'graph'
+    if args.refresh:
+        return 'refresh'
+    return 'list'
+
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(
@@ -930,9 +5435,26 @@ Examples:
   python3 meminspector.py --graph      # Show real-time graphs
   python3 meminspector.py -g -t 15     # Show graphs with top 15 processes
   python3 meminspector.py -g -i 1      # Update graphs every 1 second
+  python3 meminspector.py -g --headless -o /var/tmp/mem   # Write PNG dashboards (no display)
+  python3 meminspector.py -g --headless --frames 60 --summary run.svg
   python3 meminspector.py --refresh    # Continuous refresh in terminal
   python3 meminspector.py -r -t 20 -i 5 # Refresh top 20 every 5 seconds
   python3 meminspector.py --tui -t 30  # TUI with top 30 processes
+  python3 meminspector.py --format ndjson | jq .     # One snapshot as NDJSON
+  python3 meminspector.py -r -i 1 --format csv       # Stream CSV every second
+  python3 meminspector.py --tui -f 'user=app and rss>100M'  # Filter processes
+  python3 meminspector.py -r -i 30 --psi               # Burst sampling on memory pressure
+  python3 meminspector.py -r --proc-events             # Catch short-lived processes
+  python3 meminspector.py -r -i 5 --alerts rules.json  # Run alert rules and actions
+  python3 meminspector.py -r --collector jstat=/var/log/jvm/*.jstat  # Add JVM heaps
+  python3 meminspector.py --tui --self-profile --profile-cprofile 60  # Where does time go?
+  python3 meminspector.py -l -m 30                     # Top 30 shared libraries/mapped files
+  python3 meminspector.py --save-snapshot mem.ndjson -r -i 60  # Snapshot log for --diff
+  python3 meminspector.py --diff mem.ndjson@02:00 mem.ndjson@02:15  # What grew in between
+  python3 meminspector.py --diff before.ndjson         # Saved snapshot vs. now
+  python3 meminspector.py --agent 0.0.0.0:7777         # Serve snapshots to aggregators
+  python3 meminspector.py --fleet web1:7777 web2:7777  # Fleet-wide TUI
+  python3 meminspector.py --remote 'ssh db1 meminspector --serve-stdio'  # TUI over SSH
         """
     )
     
@@ -948,36 +5470,222 @@ Examples:
                        help='Number of top processes to show (default: 10 for graph/refresh, 20 for TUI, all for list)')
     parser.add_argument('-i', '--interval', type=float, default=2.0,
                        help='Update interval in seconds (default: 2.0)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                       help='Worker processes for collection in list/refresh modes (default: CPU count, max 8)')
+    parser.add_argument('-m', '--mappings', type=int, nargs='?', const=20, default=0, metavar='N',
+                       help='Aggregate resident memory by mapped file/library across processes '
+                            '(list/refresh modes, Linux; shows top N, default: 20; in refresh mode '
+                            'smaps is re-read when maps change or every 30s)')
+    parser.add_argument('-s', '--sort', choices=RateTracker.SORT_KEYS, default='rss',
+                       help="Initial sort of the TUI processes table: rss, rss_rate, faults, "
+                            "major_faults or swapin (default: rss; press 's' to cycle)")
+    parser.add_argument('-f', '--filter', metavar='EXPR',
+                       help="Only include matching processes, e.g. 'user=app and rss>100M and name~java' "
+                            "(fields: pid, name, user, rss, vms, mem, threads, status, cmdline)")
+    parser.add_argument('--format', choices=['text', 'ndjson', 'csv'], default='text',
+                       help='Output format for list and refresh modes (default: text)')
+    parser.add_argument('--save-snapshot', metavar='FILE',
+                       help='Append a snapshot to an NDJSON file for --diff (every interval with --refresh)')
+    parser.add_argument('--diff', nargs='+', metavar='SNAPSHOT',
+                       help='Show memory deltas between two snapshots, or one snapshot and now '
+                            '(FILE or FILE@HH:MM to pick a snapshot from a log)')
+    parser.add_argument('--agent', metavar='ADDRESS',
+                       help='Run as a fleet agent serving snapshots on host:port or unix:/path')
+    parser.add_argument('--agent-name', metavar='NAME',
+                       help='Name reported by the agent (default: hostname)')
+    parser.add_argument('--fleet', nargs='+', metavar='ADDRESS',
+                       help='Fleet TUI aggregating the given agents (host:port or unix:/path)')
+    parser.add_argument('--serve-stdio', action='store_true',
+                       help='Stream snapshots as compressed row deltas on stdout for --remote (e.g. over SSH)')
+    parser.add_argument('--remote', metavar='COMMAND',
+                       help="Remote TUI over a --serve-stdio command, e.g. 'ssh host meminspector --serve-stdio'")
+    parser.add_argument('--psi', action='store_true',
+                       help='Sample on Linux memory pressure (PSI) events: slow baseline, '
+                            'high-frequency bursts and captures under pressure (TUI/refresh/streams)')
+    parser.add_argument('--psi-threshold', type=int, default=100, metavar='MS',
+                       help='Memory stall time per 1s window that triggers a burst (default: 100)')
+    parser.add_argument('--psi-burst-interval', type=float, default=0.25, metavar='SECONDS',
+                       help='Sampling interval during a pressure burst (default: 0.25)')
+    parser.add_argument('--psi-burst-duration', type=float, default=10.0, metavar='SECONDS',
+                       help='How long a burst lasts after the last pressure event (default: 10)')
+    parser.add_argument('--psi-ring', type=int, default=20, metavar='N',
+                       help='Number of pre-trigger snapshots kept for captures (default: 20)')
+    parser.add_argument('--psi-capture-dir', default='.', metavar='DIR',
+                       help='Directory for PSI burst captures in NDJSON (default: current directory)')
+    parser.add_argument('--alerts', metavar='RULES.json',
+                       help='Evaluate alert rules from a JSON file on every update (TUI/refresh)')
+    parser.add_argument('--collector', action='append', default=[], metavar='SPEC',
+                       help='Add a collector: jstat=GLOB, tracemalloc=GLOB, module:Class[=ARG] '
+                            'or path/to/file.py:Class[=ARG] '
+                            '(repeatable; shown in refresh mode and the TUI)')
+    parser.add_argument('--proc-events', action='store_true',
+                       help='Track processes from netlink proc connector events instead of '
+                            'rescanning /proc, and report short-lived processes (Linux, root)')
+    parser.add_argument('--self-profile', action='store_true',
+                       help='Time collect/docker/aggregate/render/write stages and print a summary on exit')
+    parser.add_argument('--profile-cprofile', type=float, default=0, metavar='SECONDS',
+                       help='Run cProfile for the first SECONDS and write a .prof file (implies --self-profile)')
+    parser.add_argument('--profile-tracemalloc', type=float, default=0, metavar='SECONDS',
+                       help='Trace allocations for the first SECONDS and write a snapshot (implies --self-profile)')
+    parser.add_argument('--profile-dir', default='.', metavar='DIR',
+                       help='Directory for cProfile/tracemalloc output (default: current directory)')
+    parser.add_argument('--headless', action='store_true',
+                       help='Render graph mode to image files instead of a window (no display needed)')
+    parser.add_argument('-o', '--output-dir', default='.',
+                       help='Directory for headless graph images (default: current directory)')
+    parser.add_argument('--image-format', choices=['png', 'svg'], default='png',
+                       help='Image format for headless graph mode (default: png)')
+    parser.add_argument('--frames', type=int, default=0,
+                       help='Number of headless frames to render, 0 for unlimited (default: 0)')
+    parser.add_argument('--keep-frames', action='store_true',
+                       help='Keep a timestamped image per headless frame besides the latest dashboard')
+    parser.add_argument('--summary', metavar='FILE',
+                       help='Write a summary image of the whole recorded time range on exit (headless mode)')
     parser.add_argument('-a', '--analyze', type=int, default=5,
                        help='Number of processes to analyze threads (list mode only, default: 5)')
     
     args = parser.parse_args()
     
+    if args.format != 'text' and (args.tui or args.graph or args.agent or args.fleet
+                                  or args.serve_stdio or args.remote):
+        parser.error('--format is only supported in list, refresh and diff modes')
+    if args.diff:
+        if len(args.diff) > 2:
+            parser.error('--diff takes one or two snapshots')
+        try:
+            for spec in args.diff:
+                parse_snapshot_selector(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    for address in [args.agent] + (args.fleet or []):
+        if address:
+            try:
+                parse_address(address)
+            except ValueError as e:
+                parser.error(str(e))
+    
+    process_filter = None
+    if args.filter:
+        try:
+            process_filter = ProcessFilter(args.filter)
+        except ValueError as e:
+            parser.error(f"invalid --filter: {e}")
+    
+    inspector = None
     try:
         # Check if running on macOS
-        if sys.platform != 'darwin':
+        if sys.platform != 'darwin' and (args.format != 'text' or args.agent or args.save_snapshot
+                                         or args.serve_stdio):
+            # Machine-readable output and background agents must not prompt
+            print("Warning: This application was designed for macOS.", file=sys.stderr)
+        elif sys.platform != 'darwin':
             print("Warning: This application was designed for macOS.")
             response = input("Do you want to continue anyway? (y/n): ")
             if response.lower() != 'y':
                 sys.exit(0)
         
-        inspector = MemInspector()
+        inspector = MemInspector(process_filter=process_filter, workers=args.workers)
+        inspector.sort_key = args.sort
+        inspector.mappings_top = args.mappings
+        
+        # Fork the pool of collecting modes before the profiler, PSI, proc
+        # event and collector threads start
+        mode = select_mode(args)
+        if mode in POOL_MODES:
+            inspector.start_worker_pool()
+        
+        if args.self_profile or args.profile_cprofile or args.profile_tracemalloc:
+            inspector.enable_self_profile(
+                cprofile_seconds=args.profile_cprofile,
+                tracemalloc_seconds=args.profile_tracemalloc,
+                output_dir=args.profile_dir
+            )
+        
+        if args.psi:
+            if not inspector.enable_pressure_sampling(
+                threshold_ms=args.psi_threshold,
+                burst_interval=args.psi_burst_interval,
+                burst_duration=args.psi_burst_duration,
+                ring_size=args.psi_ring,
+                capture_dir=args.psi_capture_dir
+            ):
+                print(f"Warning: {inspector.pressure_error}; "
+                      f"falling back to fixed interval sampling.", file=sys.stderr)
+        
+        if args.alerts:
+            try:
+                inspector.enable_alerts(args.alerts)
+            except (OSError, ValueError) as e:
+                parser.error(f"invalid --alerts: {e}")
+        
+        for spec in args.collector:
+            try:
+                inspector.add_collector(load_collector(spec))
+            except (ImportError, ValueError) as e:
+                parser.error(f"invalid --collector {spec}: {e}")
+        
+        if args.proc_events:
+            if not inspector.enable_process_events(young_window=args.interval):
+                print(f"Warning: {inspector.process_events.error}; "
+                      f"falling back to /proc rescans.", file=sys.stderr)
         
+        # Snapshot log for later diffs
+        if mode == 'save_snapshot':
+            inspector.save_snapshot(args.save_snapshot,
+                                    interval=args.interval if args.refresh else None)
+        # Snapshot diff (saved vs. saved, or saved vs. live)
+        elif mode == 'diff':
+            default_top = 20 if args.format == 'text' else None  # Machine formats: all changes
+            try:
+                inspector.run_diff(args.diff, output_format=args.format,
+                                   top_n=args.top if args.top != 10 else default_top)
+            except (OSError, ValueError) as e:
+                parser.error(f"invalid --diff: {e}")
+        # Fleet agent: serve snapshots to aggregators
+        elif mode == 'agent':
+            inspector.run_agent(args.agent, interval=args.interval, name=args.agent_name)
+        # Remote TUI: stream snapshots to a --remote client, or render them locally
+        elif mode == 'serve_stdio':
+            inspector.run_stdio_server(interval=args.interval)
+        elif mode == 'remote':
+            top_count = args.top if args.top != 10 else 20  # Default to 20 for remote view
+            inspector.run_remote_tui(args.remote, top_n=top_count)
+        # Fleet aggregator TUI
+        elif mode == 'fleet':
+            top_count = args.top if args.top != 10 else 20  # Default to 20 for fleet view
+            inspector.run_fleet_tui(args.fleet, top_n=top_count, interval=args.interval)
+        # Machine-readable streaming (ndjson/csv) for list and refresh modes
+        elif mode == 'stream':
+            inspector.run_stream_mode(
+                output_format=args.format,
+                top_n=args.top if args.top != 10 else None,  # Default to all processes
+                interval=args.interval if args.refresh else None
+            )
         # If TUI flag is set, run colored terminal interface
-        if args.tui:
+        elif mode == 'tui':
             top_count = args.top if args.top != 10 else 20  # Default to 20 for TUI
             inspector.run_colored_tui(
                 top_n=top_count,
                 interval=args.interval
             )
         # If graph flag is set, run real-time graph mode
-        elif args.graph:
+        elif mode == 'headless_graph':
+            inspector.run_headless_graph(
+                top_n=args.top,
+                interval=args.interval,
+                output_dir=args.output_dir,
+                image_format=args.image_format,
+                frames=args.frames,
+                keep_frames=args.keep_frames,
+                summary_path=args.summary
+            )
+        elif mode == 'graph':
             inspector.run_realtime_graph(
                 top_n=args.top,
                 update_interval=int(args.interval * 1000)
             )
         # If refresh flag is set, run continuous refresh mode
-        elif args.refresh:
+        elif mode == 'refresh':
             top_count = args.top if args.top != 10 else 20  # Default to 20 for refresh mode
             inspector.run_refresh_mode(
                 top_n=top_count,
@@ -990,11 +5698,20 @@ Examples:
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user.")
         sys.exit(0)
+    except BrokenPipeError:
+        # The consumer of a stream (e.g. `head`) went away; exit quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(0)
     except Exception as e:
         print(f"\nError: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if inspector is not None:
+            inspector.finish_self_profile()
+            inspector.scheduler.close()
 
 
 if __name__ == "__main__":
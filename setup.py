@@ -24,9 +24,9 @@ setup(
     
     install_requires=[
         'psutil>=5.9.0',
-        'tqdm>=4.65.0',
         'rich>=13.0.0',
         'matplotlib>=3.5.0',
+        'numpy>=1.17.0',
     ],
     
     extras_require={